@@ -7,21 +7,33 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from django.db import models
 from django.utils import timezone
 from decimal import Decimal
+import logging
 import random
 
 from .models import (
     Household, Member, Survey, SurveyResponse,
     MembershipConfig, Subscription, Receipt, Announcement, ServiceRequest,
-    Ledger, Supplier, JournalEntry, JournalItem, StaffRole, StaffMember
+    Ledger, Supplier, JournalEntry, JournalItem, StaffRole, StaffMember, PaymentOrder,
+    DuplicateCandidate, CustomFieldDefinition,
 )
 from .serializers import SurveySerializer, SurveyResponseSerializer, StaffRoleSerializer, StaffMemberSerializer
-from .services import MembershipService, ProfileService, NotificationService
+from .services import MembershipService, ProfileService, NotificationService, PaymentService
+
+logger = logging.getLogger(__name__)
 
 
 # ============================================================================
 # SERIALIZERS
 # ============================================================================
 
+def _validate_custom_data(entity, value):
+    from .custom_fields import CustomFieldError, normalize_custom_data
+    try:
+        return normalize_custom_data(entity, value)
+    except CustomFieldError as e:
+        raise serializers.ValidationError(e.args[0])
+
+
 class MemberSerializer(serializers.ModelSerializer):
     age = serializers.SerializerMethodField()
     
@@ -30,8 +42,11 @@ class MemberSerializer(serializers.ModelSerializer):
         fields = ['id', 'full_name', 'is_head_of_family', 'relationship_to_head',
                   'gender', 'dob', 'age', 'marital_status', 'profession', 
                   'education', 'skills', 'is_employed', 'monthly_income', 
-                  'requirements', 'is_alive', 'is_approved', 'household']
+                  'requirements', 'is_alive', 'is_approved', 'household', 'custom_data']
     
+    def validate_custom_data(self, value):
+        return _validate_custom_data(CustomFieldDefinition.Entity.MEMBER, value)
+
     def get_age(self, obj):
         if obj.dob:
             from datetime import date
@@ -52,9 +67,12 @@ class HouseholdSerializer(serializers.ModelSerializer):
                   'phone_number', 'is_verified', 'zakat_score', 'member_count', 
                   'head_name', 'is_membership_active', 'members', 'custom_data', 'created_at']
         read_only_fields = ['zakat_score', 'member_count', 'is_membership_active']
+
+    def validate_custom_data(self, value):
+        return _validate_custom_data(CustomFieldDefinition.Entity.HOUSEHOLD, value)
     
     def get_head_name(self, obj):
-        head = obj.members.filter(is_head_of_family=True).first()
+        head = obj.head_of_family()
         return head.full_name if head else "Unknown"
 
 
@@ -97,11 +115,11 @@ class ServiceRequestSerializer(serializers.ModelSerializer):
 
     def get_requester_name(self, obj):
         # Get head of household name
-        head = obj.household.members.filter(is_head_of_family=True).first()
+        head = obj.household.head_of_family()
         if head:
             return head.full_name
         # Fallback to first member
-        first_member = obj.household.members.first()
+        first_member = next(iter(obj.household.members.all()), None)
         if first_member:
             return first_member.full_name
         return obj.household.membership_id or "Unknown"
@@ -112,10 +130,19 @@ class MembershipConfigSerializer(serializers.ModelSerializer):
         model = MembershipConfig
         fields = ['id', 'cycle', 'minimum_fee', 'currency', 'membership_id_prefix', 
                   'household_label', 'member_label', 'masjid_name', 'is_active',
-                  'payment_gateway_provider', 'razorpay_key_id', 'razorpay_key_secret',
+                  'payment_gateway_provider', 'razorpay_key_id', 'razorpay_key_secret', 'razorpay_webhook_secret',
                   'cashfree_app_id', 'cashfree_secret_key',
                   'organization_name', 'organization_address', 'organization_pan', 'registration_number_80g',
-                  'telegram_enabled', 'telegram_auto_reminders', 'telegram_notify_profile_updates', 'telegram_notify_announcements']
+                  'telegram_enabled', 'telegram_auto_reminders', 'telegram_notify_profile_updates', 'telegram_notify_announcements',
+                  'zakat_rules']
+
+    def validate_zakat_rules(self, value):
+        from .zakat import normalize_rules
+        try:
+            normalize_rules(value)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+        return value or {}
 
 
 # ============================================================================
@@ -133,8 +160,13 @@ class LedgerSerializer(serializers.ModelSerializer):
         read_only_fields = ['is_system']
 
     def get_children(self, obj):
-        children = obj.children.filter(is_active=True)
-        return LedgerSerializer(children, many=True).data if children.exists() else []
+        # The list view passes every active ledger grouped by parent
+        tree = self.context.get('ledger_children')
+        if tree is not None:
+            children = tree.get(obj.id, [])
+        else:
+            children = list(obj.children.filter(is_active=True).with_totals())
+        return LedgerSerializer(children, many=True, context=self.context).data if children else []
 
 
 class SupplierSerializer(serializers.ModelSerializer):
@@ -185,6 +217,7 @@ class JournalEntrySerializer(serializers.ModelSerializer):
                 
                 for item_data in items_data:
                     JournalItem.objects.create(journal_entry=journal_entry, **item_data)
+                journal_entry.update_total()
                 
                 # Run validation after items are created
                 journal_entry.full_clean()
@@ -212,6 +245,7 @@ class JournalEntrySerializer(serializers.ModelSerializer):
                     instance.items.all().delete()
                     for item_data in items_data:
                         JournalItem.objects.create(journal_entry=instance, **item_data)
+                    instance.update_total()
                 
                 instance.full_clean()
         except DjangoValidationError as e:
@@ -353,7 +387,7 @@ class MemberPortalProfileView(APIView):
         username = request.user.username
         if username.startswith('member_'):
             household_id = int(username.split('_')[1])
-            household = Household.objects.prefetch_related('members').get(id=household_id)
+            household = Household.objects.for_listing().get(id=household_id)
             
             # Get membership status
             membership_status = MembershipService.get_membership_status(household)
@@ -408,7 +442,9 @@ class MemberPortalServiceRequestView(APIView):
         username = request.user.username
         if username.startswith('member_'):
             household_id = int(username.split('_')[1])
-            requests = ServiceRequest.objects.filter(household_id=household_id)
+            requests = ServiceRequest.objects.filter(household_id=household_id).select_related(
+                'household'
+            ).prefetch_related('household__members')
             return Response(ServiceRequestSerializer(requests, many=True).data)
         return Response({'error': 'Invalid member session'}, status=400)
     
@@ -524,7 +560,12 @@ class AdminMembershipConfigView(APIView):
         config = MembershipService.get_or_create_config()
         serializer = MembershipConfigSerializer(config, data=request.data, partial=True)
         if serializer.is_valid():
+            old_rules = config.zakat_rules
             serializer.save()
+            if config.zakat_rules != old_rules:
+                from django.db import connection
+                from .tasks import recompute_zakat_scores
+                recompute_zakat_scores.delay(connection.schema_name)
             return Response(serializer.data)
         return Response(serializer.errors, status=400)
 
@@ -533,23 +574,146 @@ class AdminMembershipConfigView(APIView):
 # EXISTING VIEWSETS (Updated)
 # ============================================================================
 
+def _custom_filtered(queryset, entity, request):
+    """Apply ?cf.<key>=... custom field filters (see custom_fields.py)."""
+    from .custom_fields import CustomFieldError, apply_custom_filters
+    try:
+        return apply_custom_filters(queryset, entity, request.query_params)
+    except CustomFieldError as e:
+        raise serializers.ValidationError({'custom_fields': e.args[0]})
+
+
 class HouseholdViewSet(viewsets.ModelViewSet):
-    queryset = Household.objects.prefetch_related('members').distinct()
+    queryset = Household.objects.all()
     serializer_class = HouseholdSerializer
     filter_backends = [filters.SearchFilter]
     search_fields = ['membership_id', 'address', 'phone_number', 'members__full_name']
 
+    def get_queryset(self):
+        # Built per request: for_listing() compares subscriptions against today
+        queryset = Household.objects.for_listing().distinct()
+        return _custom_filtered(queryset, CustomFieldDefinition.Entity.HOUSEHOLD, self.request)
+
+    @action(detail=False, methods=['post'], url_path='recompute-zakat', permission_classes=[IsAdminUser])
+    def recompute_zakat(self, request):
+        """
+        Rescore all households with the current zakat rules.
+        With dry_run the changes are computed and reported but not saved;
+        otherwise the recompute runs in the background.
+        """
+        from django.db import connection
+        from .tasks import recompute_zakat_scores
+        from .zakat import recompute_all
+
+        dry_run = str(request.data.get('dry_run', request.query_params.get('dry_run', ''))).lower() in ('1', 'true', 'yes')
+        if dry_run:
+            return Response(recompute_all(dry_run=True))
+        recompute_zakat_scores.delay(connection.schema_name)
+        return Response({'status': 'queued'}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['post'], url_path='import', permission_classes=[IsAdminUser])
+    def import_census(self, request):
+        """
+        Bulk import from an uploaded CSV/XLSX census sheet (field 'file').
+        Pass dry_run=true to validate without saving.
+        """
+        from .importers import CensusImportError, import_census
+
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({'error': 'Upload a file in the "file" field'}, status=400)
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        try:
+            summary = import_census(upload, upload.name, dry_run=dry_run)
+        except CensusImportError as e:
+            return Response({'error': str(e)}, status=400)
+        return Response(summary, status=200 if dry_run else 201)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def export(self, request):
+        """
+        Download the census as CSV or XLSX.
+        ?level=households|members&output=csv|xlsx&columns=a,b,custom.village
+        &economic_status=...&is_verified=true&zakat_min=..&zakat_max=..
+        """
+        from apps.shared.http import is_async_request
+        from .exporters import ExportError, export_census
+
+        params = request.query_params
+        try:
+            return export_census(
+                params.get('level', 'households'), params, params.get('output', 'csv'),
+                use_async=is_async_request(request),
+            )
+        except ExportError as e:
+            return Response({'error': str(e)}, status=400)
 
 
 class MemberViewSet(viewsets.ModelViewSet):
     queryset = Member.objects.filter(is_approved=True)
     serializer_class = MemberSerializer
 
+    def get_queryset(self):
+        return _custom_filtered(super().get_queryset(), CustomFieldDefinition.Entity.MEMBER, self.request)
+
+
+class CustomFieldDefinitionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CustomFieldDefinition
+        fields = ['id', 'entity', 'key', 'label', 'field_type', 'choices', 'is_filterable', 'created_at']
+
+    def validate_key(self, value):
+        from .custom_fields import KEY_RE
+        if not KEY_RE.match(value):
+            raise serializers.ValidationError("Use lowercase letters, digits and underscores, starting with a letter.")
+        return value
+
+    def validate_choices(self, value):
+        if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+            raise serializers.ValidationError("Choices must be a list of strings.")
+        return value
+
+
+class CustomFieldDefinitionViewSet(viewsets.ModelViewSet):
+    """Tenant registry of custom_data fields; filterable ones are indexed."""
+    queryset = CustomFieldDefinition.objects.all()
+    serializer_class = CustomFieldDefinitionSerializer
+    permission_classes = [IsAdminUser]
+
 
 class SurveyViewSet(viewsets.ModelViewSet):
     queryset = Survey.objects.all()
     serializer_class = SurveySerializer
 
+    @action(detail=True, methods=['get'])
+    def analytics(self, request, pk=None):
+        """
+        Aggregate results for a survey.
+        ?filter=q1:Yes (repeatable) restricts to matching responses;
+        ?cross=q1,q2 adds a cross-tabulation of two questions.
+        """
+        from .survey_analytics import AnalyticsError, crosstab, get_survey_analytics
+
+        survey = self.get_object()
+        filters = {}
+        for item in request.query_params.getlist('filter'):
+            qid, sep, value = item.partition(':')
+            if not sep:
+                return Response({'error': "filter must look like question_id:value"}, status=400)
+            filters[qid] = value
+
+        try:
+            data = get_survey_analytics(survey, filters)
+            cross = request.query_params.get('cross')
+            if cross:
+                qids = [q.strip() for q in cross.split(',')]
+                if len(qids) != 2:
+                    return Response({'error': "cross must name two questions, e.g. q1,q2"}, status=400)
+                data['crosstab'] = crosstab(survey, qids[0], qids[1], filters)
+        except AnalyticsError as e:
+            return Response({'error': str(e)}, status=400)
+        return Response(data)
+
 
 class SurveyResponseViewSet(viewsets.ModelViewSet):
     queryset = SurveyResponse.objects.filter(survey__is_active=True)
@@ -560,6 +724,26 @@ class SurveyResponseViewSet(viewsets.ModelViewSet):
         instance = serializer.save()
         JamathService.process_survey_response(instance)
 
+    @action(detail=False, methods=['post'])
+    def sync(self, request):
+        """
+        Offline batch upload: {"since": token, "responses": [{client_uuid,
+        survey, household, answers, collected_at}, ...]}. Safe to retry.
+        Households come back a page at a time; while changes.has_more is
+        true, sync again with the returned token.
+        """
+        from .survey_sync import SyncError, sync_responses
+
+        try:
+            result = sync_responses(
+                request.data.get('responses', []),
+                auditor=request.user,
+                since_token=request.data.get('since'),
+            )
+        except SyncError as e:
+            return Response({'error': str(e)}, status=400)
+        return Response(result)
+
 
 class AnnouncementViewSet(viewsets.ModelViewSet):
     queryset = Announcement.objects.all()
@@ -581,7 +765,7 @@ class ServiceRequestViewSet(viewsets.ModelViewSet):
     serializer_class = ServiceRequestSerializer
     
     def get_queryset(self):
-        queryset = ServiceRequest.objects.all()
+        queryset = ServiceRequest.objects.select_related('household').prefetch_related('household__members')
         status_param = self.request.query_params.get('status')
         if status_param:
             queryset = queryset.filter(status=status_param)
@@ -603,6 +787,81 @@ class ServiceRequestViewSet(viewsets.ModelViewSet):
         return Response({'error': 'Invalid status'}, status=400)
 
 
+class DuplicateCandidateSerializer(serializers.ModelSerializer):
+    household_a = serializers.SerializerMethodField()
+    household_b = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DuplicateCandidate
+        fields = ['id', 'household_a', 'household_b', 'score', 'reasons', 'status', 'created_at']
+
+    def _summary(self, household):
+        heads = getattr(household, 'heads', None)
+        return {
+            'id': household.id,
+            'membership_id': household.membership_id,
+            'address': household.address,
+            'phone_number': household.phone_number,
+            'head_name': heads[0].full_name if heads else None,
+        }
+
+    def get_household_a(self, obj):
+        return self._summary(obj.household_a)
+
+    def get_household_b(self, obj):
+        return self._summary(obj.household_b)
+
+
+class DuplicateCandidateViewSet(viewsets.ReadOnlyModelViewSet):
+    """Review queue for likely duplicate households."""
+    serializer_class = DuplicateCandidateSerializer
+    permission_classes = [IsAdminUser]
+    queryset = DuplicateCandidate.objects.all()
+
+    def get_queryset(self):
+        heads = Member.objects.filter(is_head_of_family=True)
+        return DuplicateCandidate.objects.filter(
+            status=self.request.query_params.get('status', DuplicateCandidate.Status.PENDING)
+        ).select_related('household_a', 'household_b').prefetch_related(
+            models.Prefetch('household_a__members', queryset=heads, to_attr='heads'),
+            models.Prefetch('household_b__members', queryset=heads, to_attr='heads'),
+        )
+
+    @action(detail=False, methods=['post'])
+    def scan(self, request):
+        from django.db import connection
+        from .tasks import scan_duplicate_households
+        scan_duplicate_households.delay(connection.schema_name)
+        return Response({'status': 'queued'}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['post'])
+    def merge(self, request, pk=None):
+        """Merge the pair; 'keep' picks the surviving household (default: the older one)."""
+        from .dedupe import MergeError, merge_households
+
+        candidate = self.get_object()
+        pair = (candidate.household_a_id, candidate.household_b_id)
+        try:
+            keep = int(request.data.get('keep', pair[0]))
+        except (TypeError, ValueError):
+            keep = None
+        if keep not in pair:
+            return Response({'error': 'keep must be one of the two households'}, status=400)
+        drop = pair[1] if keep == pair[0] else pair[0]
+        try:
+            household = merge_households(keep, drop)
+        except MergeError as e:
+            return Response({'error': str(e)}, status=400)
+        return Response(HouseholdSerializer(household).data)
+
+    @action(detail=True, methods=['post'])
+    def dismiss(self, request, pk=None):
+        from .dedupe import dismiss
+        candidate = self.get_object()
+        dismiss(candidate, request.user)
+        return Response(self.get_serializer(candidate).data)
+
+
 # ============================================================================
 # PAYMENT API
 # PAYMENT API
@@ -611,120 +870,85 @@ class PortalPaymentOrderView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        import razorpay
-        import requests
-        import uuid
+        from .payment_gateways import get_gateway, new_order_id, PaymentGatewayError
         
         # Get Tenant Config
         config = MembershipConfig.objects.filter(is_active=True).first()
         if not config:
              return Response({'error': 'Membership config missing'}, status=400)
-             
-        provider = config.payment_gateway_provider
-        
-        if provider == MembershipConfig.GatewayProvider.NONE:
-             return Response({'error': 'Online payments are currently disabled.'}, status=400)
 
         amount = request.data.get('amount')
-        if not amount or float(amount) < 1:
+        try:
+            amount = Decimal(str(amount))
+        except Exception:
+            amount = None
+        if not amount or amount < 1:
              return Response({'error': 'Invalid amount'}, status=400)
-             
-        # 1. RAZORPAY FLOW
-        if provider == MembershipConfig.GatewayProvider.RAZORPAY:
-            if not config.razorpay_key_id:
-                return Response({'error': 'Razorpay not configured'}, status=400)
-                
-            client = razorpay.Client(auth=(config.razorpay_key_id, config.razorpay_key_secret))
-            try:
-                payment = client.order.create({'amount': int(float(amount) * 100), 'currency': config.currency, 'payment_capture': '1'})
-                return Response({
-                    'provider': 'RAZORPAY',
-                    'order_id': payment['id'],
-                    'amount': payment['amount'],
-                    'currency': payment['currency'],
-                    'key_id': config.razorpay_key_id
-                })
-            except Exception as e:
-                return Response({'error': str(e)}, status=500)
-
-        # 2. CASHFREE FLOW
-        elif provider == MembershipConfig.GatewayProvider.CASHFREE:
-            if not config.cashfree_app_id:
-                return Response({'error': 'Cashfree not configured'}, status=400)
-            
-            # Use Sandbox for Development (User requested test creds context)
-            # Ideally use a toggle. Defaulting to SANDBOX. 
-            base_url = "https://sandbox.cashfree.com/pg"
-            
-            headers = {
-                "x-client-id": config.cashfree_app_id,
-                "x-client-secret": config.cashfree_secret_key,
-                "x-api-version": "2023-08-01",
-                "Content-Type": "application/json"
-            }
-            
-            # Get User Info
-            username = request.user.username
-            phone = "9999999999" # Default
-            if username.startswith('member_'):
-                 try:
-                     hid = int(username.split('_')[1])
-                     h = Household.objects.get(id=hid)
-                     if h.phone_number:
-                         phone = h.phone_number
-                 except:
-                     pass
-            
-            customer_id = f"cust_{username}"
-            order_id = f"order_{uuid.uuid4().hex[:10]}"
-            
-            # Extract PAN from request to embed in Return URL (for persistence across redirect)
-            donor_pan = request.data.get('donor_pan', '')
-            
-            payload = {
-                "order_amount": float(amount),
-                "order_currency": config.currency,
-                "customer_details": {
-                    "customer_id": customer_id,
-                    "customer_phone": phone,
-                    "customer_name": request.user.first_name or username
+
+        try:
+            gateway = get_gateway(config)
+        except PaymentGatewayError as e:
+            return Response({'error': str(e)}, status=400)
+        
+        # Get User Info
+        username = request.user.username
+        household = None
+        if username.startswith('member_'):
+             try:
+                 hid = int(username.split('_')[1])
+                 household = Household.objects.get(id=hid)
+             except:
+                 pass
+
+        if not household:
+            return Response({'error': 'Invalid member session'}, status=400)
+        phone = household.phone_number or "9999999999"
+        
+        order_id = new_order_id()
+        
+        # Embed PAN in the return URL (for persistence across redirect)
+        donor_pan = request.data.get('donor_pan', '')
+        return_url = f"{request.scheme}://{request.get_host()}/portal/dashboard?order_id={order_id}&pan={donor_pan}"
+        
+        try:
+            order = gateway.create_order(
+                amount=amount,
+                currency=config.currency,
+                order_id=order_id,
+                customer={
+                    'id': f"cust_{username}",
+                    'phone': phone,
+                    'name': request.user.first_name or username
                 },
-                "order_meta": {
-                    "return_url": f"{request.scheme}://{request.get_host()}/portal/dashboard?order_id={order_id}&pan={donor_pan}"
-                }
-            }
-            
-            try:
-                resp = requests.post(f"{base_url}/orders", json=payload, headers=headers)
-                if resp.status_code == 200:
-                    data = resp.json()
-                    return Response({
-                        'provider': 'CASHFREE',
-                        'payment_session_id': data['payment_session_id'],
-                        'order_id': data['order_id'],
-                        'env': 'SANDBOX'
-                    })
-                else:
-                    return Response({'error': f"Cashfree Error: {resp.text}"}, status=400)
-            except Exception as e:
-                return Response({'error': str(e)}, status=500)
-                
-        return Response({'error': 'Invalid Provider'}, status=400)
+                return_url=return_url
+            )
+        except PaymentGatewayError as e:
+            return Response({'error': str(e)}, status=502)
+
+        # Stored server-side so webhooks and reconciliation can settle the order
+        PaymentOrder.objects.create(
+            provider=gateway.provider,
+            order_id=order['order_id'],
+            household=household,
+            amount=amount,
+            currency=config.currency,
+            donor_pan=(donor_pan or '')[:15],
+        )
+        
+        return Response(order)
 
 
 class PortalPaymentVerifyView(APIView):
     permission_classes = [IsAuthenticated]
     
     def post(self, request):
-        import razorpay
-        import requests
+        from .payment_gateways import get_gateway, PaymentGatewayError
         
         config = MembershipConfig.objects.filter(is_active=True).first()
         if not config:
              return Response({'error': 'Config missing'}, status=400)
              
         data = request.data
-        provider = config.payment_gateway_provider
         
         # Get Household
         username = request.user.username
@@ -739,64 +963,66 @@ class PortalPaymentVerifyView(APIView):
         if not household:
             return Response({'error': 'Invalid member session'}, status=400)
 
-        # 1. RAZORPAY VERIFY
-        if provider == MembershipConfig.GatewayProvider.RAZORPAY:
-            try:
-                 client = razorpay.Client(auth=(config.razorpay_key_id, config.razorpay_key_secret))
-                 params_dict = {
-                     'razorpay_order_id': data.get('razorpay_order_id'),
-                     'razorpay_payment_id': data.get('razorpay_payment_id'),
-                     'razorpay_signature': data.get('razorpay_signature')
-                 }
-                 client.utility.verify_payment_signature(params_dict)
-                 
-                 amount = Decimal(str(data.get('amount')))
-                 donor_pan = data.get('donor_pan')
-                 receipt = MembershipService.process_payment(
-                     household, 
-                     amount, 
-                     notes=f"Razorpay: {data.get('razorpay_payment_id')}",
-                     donor_pan=donor_pan
-                 )
-                 return Response({'status': 'success', 'receipt': receipt.receipt_number})
-            except Exception as e:
-                 return Response({'error': str(e)}, status=400)
-                 
-        # 2. CASHFREE VERIFY
-        elif provider == MembershipConfig.GatewayProvider.CASHFREE:
-            order_id = data.get('order_id')
-            if not order_id:
-                return Response({'error': 'Order ID missing'}, status=400)
-                
-            base_url = "https://sandbox.cashfree.com/pg"
-            headers = {
-                "x-client-id": config.cashfree_app_id,
-                "x-client-secret": config.cashfree_secret_key,
-                "x-api-version": "2023-08-01"
-            }
-            
-            try:
-                resp = requests.get(f"{base_url}/orders/{order_id}", headers=headers)
-                if resp.status_code == 200:
-                    order_data = resp.json()
-                    if order_data.get('order_status') == 'PAID':
-                        amount = Decimal(str(order_data.get('order_amount')))
-                        donor_pan = data.get('donor_pan')
-                        receipt = MembershipService.process_payment(
-                             household, 
-                             amount, 
-                             notes=f"Cashfree: {order_id}",
-                             donor_pan=donor_pan
-                        )
-                        return Response({'status': 'success', 'receipt': receipt.receipt_number})
-                    else:
-                        return Response({'error': f"Payment status: {order_data.get('order_status')}"}, status=400)
-                else:
-                    return Response({'error': "Failed to verify with Cashfree"}, status=400)
-            except Exception as e:
-                return Response({'error': str(e)}, status=500)
+        try:
+            gateway = get_gateway(config)
+            payment = gateway.verify_payment(data)
+        except PaymentGatewayError as e:
+            return Response({'error': str(e)}, status=400)
+        
+        if not payment['paid']:
+            return Response({'error': f"Payment status: {payment['status']}"}, status=400)
+        
+        # Only orders created by PortalPaymentOrderView are settled: their amount
+        # was stored server-side, whereas a Razorpay callback amount is client-supplied
+        order = PaymentOrder.objects.filter(order_id=payment['order_id']).first()
+        if order is None:
+            return Response({'error': 'Unknown payment order'}, status=404)
+        if order.household_id != household.id:
+            return Response({'error': 'Order does not belong to this member'}, status=403)
+
+        reference = payment['payment_id'] if gateway.provider == MembershipConfig.GatewayProvider.RAZORPAY else payment['order_id']
+        receipt = PaymentService.record_gateway_payment(order.order_id, reference, label=gateway.label)
+        if receipt is None:
+            # Paid earlier, but its receipt has since been deleted
+            return Response({'error': 'Payment is recorded but its receipt is no longer available'}, status=409)
+        return Response({'status': 'success', 'receipt': receipt.receipt_number})
+
+
+class PaymentWebhookView(APIView):
+    """
+    Gateway webhook receiver (/api/portal/payment/webhook/).
+    Verifies the signature against the raw body, then hands the event to a
+    background task so the gateway gets a fast 200.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
 
-        return Response({'error': 'Provider mismatch'}, status=400)
+    def post(self, request):
+        from django.db import connection
+        from .payment_gateways import get_gateway, PaymentGatewayError
+        from .tasks import process_payment_event
+
+        config = MembershipConfig.objects.filter(is_active=True).first()
+        if not config:
+            return Response({'error': 'Config missing'}, status=400)
+
+        try:
+            gateway = get_gateway(config)
+            event = gateway.parse_webhook(request.body, request.headers)
+        except PaymentGatewayError as e:
+            logger.warning(f"Rejected payment webhook: {e}")
+            return Response({'error': str(e)}, status=400)
+        except ValueError:
+            return Response({'error': 'Invalid payload'}, status=400)
+
+        if event:
+            process_payment_event.delay(connection.schema_name, {
+                'paid': event['paid'],
+                'order_id': event['order_id'],
+                'payment_id': event['payment_id'],
+                'label': gateway.label,
+            })
+        return Response({'status': 'ok'})
 
 # USER PROFILE API
 # ============================================================================
@@ -935,7 +1161,8 @@ class TelegramStatsView(APIView):
         
         total_households = Household.objects.count()
         linked_count = TelegramLink.objects.filter(is_verified=True).count()
-        pending_renewals = Household.objects.filter(is_membership_active=False).count()
+        active = Subscription.objects.filter(status='ACTIVE', end_date__gte=timezone.now().date()).values('household_id')
+        pending_renewals = Household.objects.exclude(id__in=active).count()
         
         return Response({
             'total_households': total_households,
@@ -972,7 +1199,7 @@ class LedgerViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAdminUser]
 
     def get_queryset(self):
-        queryset = Ledger.objects.filter(is_active=True)
+        queryset = Ledger.objects.filter(is_active=True).with_totals()
         account_type = self.request.query_params.get('type')
         flat = self.request.query_params.get('flat')
         
@@ -986,6 +1213,16 @@ class LedgerViewSet(viewsets.ModelViewSet):
         # Hierarchical (top-level only, children via serializer)
         return queryset.filter(parent=None).order_by('code')
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == 'list' and not self.request.query_params.get('flat'):
+            # The whole tree in one query instead of one per node
+            tree = {}
+            for ledger in Ledger.objects.filter(is_active=True, parent__isnull=False).with_totals().order_by('code'):
+                tree.setdefault(ledger.parent_id, []).append(ledger)
+            context['ledger_children'] = tree
+        return context
+
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         if instance.is_system:
@@ -1019,7 +1256,7 @@ class JournalEntryViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAdminUser]
 
     def get_queryset(self):
-        queryset = JournalEntry.objects.all()
+        queryset = JournalEntry.objects.for_listing()
         voucher_type = self.request.query_params.get('type')
         date_from = self.request.query_params.get('from')
         date_to = self.request.query_params.get('to')
@@ -1048,7 +1285,7 @@ class JournalEntryViewSet(viewsets.ModelViewSet):
 
 
 class LedgerReportsView(APIView):
-    """Ledger reports: Day Book, Trial Balance."""
+    """Ledger reports: Day Book, Trial Balance, Monthly Summary."""
     permission_classes = [IsAdminUser]
 
     def get(self, request, report_type):
@@ -1056,20 +1293,22 @@ class LedgerReportsView(APIView):
 
         if report_type == 'day-book':
             date = request.query_params.get('date', timezone.now().date().isoformat())
-            entries = JournalEntry.objects.filter(date=date).order_by('created_at')
+            entries = JournalEntry.objects.filter(date=date).for_listing().order_by('created_at')
+            summary = entries.aggregate(
+                total_receipts=Sum('total_amount', filter=models.Q(voucher_type='RECEIPT')),
+                total_payments=Sum('total_amount', filter=models.Q(voucher_type='PAYMENT')),
+            )
             return Response({
                 'date': date,
                 'entries': JournalEntrySerializer(entries, many=True).data,
                 'summary': {
-                    'total_receipts': entries.filter(voucher_type='RECEIPT').aggregate(
-                        total=Sum('items__credit_amount'))['total'] or 0,
-                    'total_payments': entries.filter(voucher_type='PAYMENT').aggregate(
-                        total=Sum('items__debit_amount'))['total'] or 0,
+                    'total_receipts': summary['total_receipts'] or 0,
+                    'total_payments': summary['total_payments'] or 0,
                 }
             })
 
         elif report_type == 'trial-balance':
-            ledgers = Ledger.objects.filter(is_active=True).order_by('code')
+            ledgers = Ledger.objects.filter(is_active=True).with_totals().order_by('code')
             data = []
             total_debit = Decimal('0.00')
             total_credit = Decimal('0.00')
@@ -1098,6 +1337,28 @@ class LedgerReportsView(APIView):
                 'is_balanced': total_debit == total_credit
             })
 
+        elif report_type == 'monthly-summary':
+            from .ledger_summary import monthly_totals, top_income_sources
+            try:
+                months = min(max(int(request.query_params.get('months', 12)), 1), 60)
+            except ValueError:
+                return Response({'error': 'Invalid months'}, status=400)
+            fund_type = request.query_params.get('fund_type')
+            ledger = request.query_params.get('ledger')
+            if ledger and not ledger.isdigit():
+                return Response({'error': 'Invalid ledger'}, status=400)
+
+            monthly = monthly_totals(months, fund_type=fund_type, ledger=ledger)
+            return Response({
+                'months': monthly,
+                'total_income': sum(m['income'] for m in monthly),
+                'total_expense': sum(m['expense'] for m in monthly),
+                'top_income_sources': [
+                    {'ledger': row['ledger__name'], 'amount': row['total']}
+                    for row in top_income_sources(start=f"{monthly[0]['month']}-01", fund_type=fund_type)
+                ],
+            })
+
         return Response({'error': 'Invalid report type'}, status=400)
 
 
@@ -1127,7 +1388,7 @@ class TallyExportView(APIView):
         entries = JournalEntry.objects.filter(
             date__gte=start_date,
             date__lte=end_date
-        ).prefetch_related('items__ledger', 'donor').order_by('date', 'voucher_number')
+        ).for_listing().order_by('date', 'voucher_number')
 
         # Create workbook
         wb = Workbook()
@@ -1298,6 +1559,7 @@ class ReceiptPDFView(APIView):
     permission_classes = [IsAdminUser]
     
     def get(self, request, entry_id):
+        from django.http import HttpResponse
         from apps.jamath.receipt_generator import generate_receipt_pdf
         
         try:
@@ -1312,8 +1574,7 @@ class ReceiptPDFView(APIView):
         # Get organization config
         config = MembershipConfig.objects.filter(is_active=True).first()
         
-        # Calculate amount from journal items (credit side)
-        amount = sum(item.credit_amount for item in entry.items.all())
+        amount = entry.total_amount
         
         # Generate receipt number if not exists
         receipt_number = f"RCP-{entry.date.strftime('%Y%m%d')}-{entry.id:04d}"
@@ -1322,7 +1583,7 @@ class ReceiptPDFView(APIView):
         pdf_bytes = generate_receipt_pdf(
             receipt_number=receipt_number,
             payment_date=entry.date,
-            donor_name=entry.donor_name or entry.narration or "Member",
+            donor_name=(entry.donor.full_name if entry.donor else entry.donor_name_manual) or entry.narration or "Member",
             donor_address="",
             donor_pan=entry.donor_pan or "",
             amount=amount,
@@ -1364,12 +1625,11 @@ class PortalReceiptListView(APIView):
         
         receipts = []
         for entry in entries:
-            amount = sum(item.credit_amount for item in entry.items.all())
             receipts.append({
                 'id': entry.id,
                 'receipt_number': f"RCP-{entry.date.strftime('%Y%m%d')}-{entry.id:04d}",
                 'date': entry.date.isoformat(),
-                'amount': float(amount),
+                'amount': float(entry.total_amount),
                 'description': entry.narration,
                 'payment_mode': entry.payment_mode or 'Online',
             })
@@ -1382,6 +1642,7 @@ class PortalReceiptPDFView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request, entry_id):
+        from django.http import HttpResponse
         from apps.jamath.receipt_generator import generate_receipt_pdf
         
         if not request.user.username.startswith('member_'):
@@ -1390,7 +1651,9 @@ class PortalReceiptPDFView(APIView):
         household_id = int(request.user.username.split('_')[1])
         
         try:
-            entry = JournalEntry.objects.get(id=entry_id, donor__household_id=household_id)
+            entry = JournalEntry.objects.select_related('donor__household').get(
+                id=entry_id, donor__household_id=household_id
+            )
         except JournalEntry.DoesNotExist:
             return Response({'error': 'Receipt not found'}, status=404)
         
@@ -1399,16 +1662,16 @@ class PortalReceiptPDFView(APIView):
         
         # Get organization config
         config = MembershipConfig.objects.filter(is_active=True).first()
-        household = entry.household
+        household = entry.donor.household if entry.donor else None
         head = household.members.filter(is_head_of_family=True).first() if household else None
         
-        amount = sum(item.credit_amount for item in entry.items.all())
+        amount = entry.total_amount
         receipt_number = f"RCP-{entry.date.strftime('%Y%m%d')}-{entry.id:04d}"
         
         pdf_bytes = generate_receipt_pdf(
             receipt_number=receipt_number,
             payment_date=entry.date,
-            donor_name=head.full_name if head else entry.donor_name or "Member",
+            donor_name=head.full_name if head else entry.donor_name_manual or "Member",
             donor_address=household.address if household else "",
             donor_pan=entry.donor_pan or "",
             amount=amount,
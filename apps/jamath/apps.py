@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class JamathConfig(AppConfig):
+    name = 'apps.jamath'
+    label = 'jamath'
+
+    def ready(self):
+        from . import signals  # noqa: F401
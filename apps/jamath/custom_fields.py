@@ -0,0 +1,222 @@
+"""
+Typed, index-backed filters on Household/Member custom_data.
+
+CustomFieldDefinition declares which custom_data keys can be filtered and
+their types. Lookups compile to JSONB operations that Postgres can answer
+from an index:
+
+    ?cf.village=Ward 3                 custom_data @> '{"village": "Ward 3"}'   (GIN)
+    ?cf.blood_group__in=O-,O+          OR of containments                      (GIN)
+    ?cf.family_size__gte=5             (custom_data -> 'family_size') >= '5'    (expression btree)
+
+Each filterable definition gets an expression index on (custom_data -> 'key')
+in the tenant's schema. Number, boolean and date values are coerced on write,
+so comparisons see JSON numbers/booleans and ISO date strings.
+"""
+import re
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, Func, Q, TextField
+from django.db.models.fields.json import KeyTransform
+
+from apps.shared.tenant_cache import tenant_cache_key
+
+from .models import CustomFieldDefinition
+
+PARAM_PREFIX = 'cf.'
+KEY_RE = re.compile(r'^[a-z][a-z0-9_]{0,39}$')
+TRUE_VALUES = ('true', 'yes', '1', 'y')
+FALSE_VALUES = ('false', 'no', '0', 'n')
+# NUMBER values stay within what JSON clients read exactly (2**53 ~ 9e15)
+MAX_NUMBER = Decimal('1e15')
+
+TABLES = {
+    CustomFieldDefinition.Entity.HOUSEHOLD: ('jamath_household', 'hh'),
+    CustomFieldDefinition.Entity.MEMBER: ('jamath_member', 'mb'),
+}
+
+Type = CustomFieldDefinition.FieldType
+ORDERED_TYPES = (Type.NUMBER, Type.DATE)
+JSON_TYPES = {Type.NUMBER: 'number', Type.BOOLEAN: 'boolean', Type.DATE: 'string', Type.TEXT: 'string', Type.CHOICE: 'string'}
+
+
+class CustomFieldError(ValueError):
+    pass
+
+
+# ============================================================================
+# REGISTRY
+# ============================================================================
+
+def _cache_key(entity):
+    return tenant_cache_key('custom_fields', entity)
+
+
+def get_definitions(entity) -> dict:
+    """{key: {'type', 'choices', 'filterable'}} for one entity, cached per tenant."""
+    def load():
+        return {
+            d.key: {'type': d.field_type, 'choices': d.choices or [], 'filterable': d.is_filterable}
+            for d in CustomFieldDefinition.objects.filter(entity=entity)
+        }
+    return cache.get_or_set(_cache_key(entity), load, 300)
+
+
+def invalidate_definitions(entity) -> None:
+    cache.delete(_cache_key(entity))
+
+
+def index_name(entity, key) -> str:
+    return f"cf_{TABLES[entity][1]}_{key}_idx"
+
+
+def ensure_index(definition) -> None:
+    """Create (or drop) the expression index for one definition in the current schema."""
+    if not KEY_RE.match(definition.key):
+        raise CustomFieldError(f"Invalid custom field key '{definition.key}'")
+    table, _ = TABLES[definition.entity]
+    name = index_name(definition.entity, definition.key)
+    with connection.cursor() as cursor:
+        if definition.is_filterable:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ((custom_data -> %s))',
+                [definition.key],
+            )
+        else:
+            cursor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+def drop_index(entity, key) -> None:
+    if KEY_RE.match(key):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP INDEX IF EXISTS "{index_name(entity, key)}"')
+
+
+def coerce_existing(definition) -> int:
+    """Convert stored string values of a number/boolean field to JSON numbers/booleans."""
+    table, _ = TABLES[definition.entity]
+    if definition.field_type == Type.NUMBER:
+        cast, condition = "to_jsonb((custom_data ->> %s)::numeric)", "custom_data ->> %s ~ '^\\s*-?[0-9]+(\\.[0-9]+)?\\s*$'"
+    elif definition.field_type == Type.BOOLEAN:
+        cast, condition = "to_jsonb(lower(custom_data ->> %s) IN ('true', 'yes', '1', 'y'))", \
+            "lower(custom_data ->> %s) IN ('true', 'yes', '1', 'y', 'false', 'no', '0', 'n')"
+    else:
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE \"{table}\" SET custom_data = jsonb_set(custom_data, ARRAY[%s], {cast}) "
+            f"WHERE jsonb_typeof(custom_data -> %s) = 'string' AND {condition}",
+            [definition.key, definition.key, definition.key, definition.key],
+        )
+        return cursor.rowcount
+
+
+# ============================================================================
+# VALUES
+# ============================================================================
+
+def coerce(field_type, value, choices=()):
+    """Turn a query/input value into the JSON value stored for this type."""
+    if field_type == Type.NUMBER:
+        if isinstance(value, bool):
+            raise CustomFieldError("expected a number")
+        try:
+            number = Decimal(str(value).strip())
+        except InvalidOperation:
+            raise CustomFieldError(f"'{value}' is not a number")
+        if not number.is_finite():
+            raise CustomFieldError(f"'{value}' is not a number")
+        if number.copy_abs() >= MAX_NUMBER:
+            raise CustomFieldError(f"'{value}' is too large")
+        return int(number) if number == number.to_integral_value() else float(number)
+    if field_type == Type.BOOLEAN:
+        if isinstance(value, bool):
+            return value
+        text = str(value).strip().lower()
+        if text in TRUE_VALUES:
+            return True
+        if text in FALSE_VALUES:
+            return False
+        raise CustomFieldError(f"'{value}' is not yes/no")
+    if field_type == Type.DATE:
+        if isinstance(value, date):
+            return value.isoformat()
+        try:
+            return date.fromisoformat(str(value).strip()).isoformat()
+        except ValueError:
+            raise CustomFieldError(f"'{value}' is not a date (YYYY-MM-DD)")
+    value = str(value).strip()
+    if field_type == Type.CHOICE and choices and value not in choices:
+        raise CustomFieldError(f"'{value}' is not one of {', '.join(map(str, choices))}")
+    return value
+
+
+def normalize_custom_data(entity, data) -> dict:
+    """Coerce declared keys in a custom_data payload; undeclared keys pass through."""
+    if not data:
+        return data or {}
+    if not isinstance(data, dict):
+        raise CustomFieldError("custom_data must be an object")
+    definitions = get_definitions(entity)
+    cleaned = dict(data)
+    errors = {}
+    for key, spec in definitions.items():
+        if cleaned.get(key) in (None, ''):
+            continue
+        try:
+            cleaned[key] = coerce(spec['type'], cleaned[key], spec['choices'])
+        except CustomFieldError as e:
+            errors[key] = str(e)
+    if errors:
+        raise CustomFieldError(errors)
+    return cleaned
+
+
+# ============================================================================
+# FILTERS
+# ============================================================================
+
+def apply_custom_filters(queryset, entity, params):
+    """Apply every ?cf.<key>[__op]=value parameter to the queryset."""
+    definitions = None
+    for param in params:
+        if not param.startswith(PARAM_PREFIX):
+            continue
+        if definitions is None:
+            definitions = get_definitions(entity)
+        key, _, op = param[len(PARAM_PREFIX):].partition('__')
+        spec = definitions.get(key)
+        if spec is None or not spec['filterable']:
+            raise CustomFieldError(f"'{key}' is not a filterable custom field")
+        queryset = _apply(queryset, key, spec, op or 'exact', params.get(param))
+    return queryset
+
+
+def _apply(queryset, key, spec, op, raw):
+    field_type = spec['type']
+    if op == 'isnull':
+        present = Q(custom_data__has_key=key)
+        return queryset.exclude(present) if str(raw).lower() in TRUE_VALUES else queryset.filter(present)
+    if op == 'exact':
+        return queryset.filter(custom_data__contains={key: coerce(field_type, raw, spec['choices'])})
+    if op == 'in':
+        values = [coerce(field_type, v, spec['choices']) for v in str(raw).split(',') if v.strip()]
+        condition = Q()
+        for value in values:
+            condition |= Q(custom_data__contains={key: value})
+        return queryset.filter(condition) if values else queryset.none()
+    if op == 'icontains' and field_type in (Type.TEXT, Type.CHOICE):
+        return queryset.filter(**{f'custom_data__{key}__icontains': str(raw)})
+    if op in ('gt', 'gte', 'lt', 'lte') and field_type in ORDERED_TYPES:
+        # Same expression as the index; jsonb_typeof drops values of other JSON types
+        alias = f'_cf_{key}_type'
+        return queryset.alias(**{
+            alias: Func(KeyTransform(key, F('custom_data')), function='jsonb_typeof', output_field=TextField()),
+        }).filter(**{
+            f'custom_data__{key}__{op}': coerce(field_type, raw),
+            alias: JSON_TYPES[field_type],
+        })
+    raise CustomFieldError(f"Unsupported filter '{op}' for {field_type.lower()} field '{key}'")
@@ -0,0 +1,364 @@
+"""
+Synthetic tenant data for benchmarks and query-plan tests.
+
+Generates households, members, subscriptions with receipts, journal
+entries with items, survey responses and Telegram links at configurable
+volumes. Output is deterministic for a given seed and schema. Rows whose
+ids are needed later (households, subscriptions, vouchers) go through
+bulk_create. The large leaf tables (members, receipts, journal items,
+survey responses) are streamed with Postgres COPY. Either way there are
+no per-object saves, so 100k households take minutes rather than hours.
+
+bulk_create and COPY skip signals, so the derived data is rebuilt at the
+end: the daily ledger summary, census stats and zakat scores.
+"""
+import io
+import json
+import random
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import (
+    Household, JournalEntry, JournalItem, Ledger, Member, MembershipConfig, Receipt,
+    Subscription, Survey, SurveyResponse, TelegramLink,
+)
+
+BATCH_SIZE = 5000
+SURVEY_TITLE = 'Synthetic Household Survey'
+
+MALE_NAMES = ['Mohammed', 'Ahmed', 'Abdul', 'Yusuf', 'Ibrahim', 'Imran', 'Salman', 'Faisal', 'Irfan',
+              'Zaid', 'Hamza', 'Bilal', 'Rashid', 'Sameer', 'Tariq', 'Nadeem', 'Asif', 'Javed']
+FEMALE_NAMES = ['Fatima', 'Ayesha', 'Zainab', 'Maryam', 'Khadija', 'Sana', 'Rukhsar', 'Nazia', 'Shabana',
+                'Amina', 'Heena', 'Farah', 'Rehana', 'Sumaiya', 'Asma', 'Noor']
+SURNAMES = ['Khan', 'Shaikh', 'Syed', 'Ansari', 'Qureshi', 'Pathan', 'Siddiqui', 'Mirza', 'Baig', 'Patel']
+AREAS = ['Noor Nagar', 'Masjid Road', 'Station Road', 'Ward 3', 'Bazaar Gali', 'Idgah Colony',
+         'Qila Mohalla', 'Green Park', 'Karim Nagar', 'Old Town']
+PROFESSIONS = ['Daily Wage', 'Driver', 'Shopkeeper', 'Tailor', 'Teacher', 'Mechanic', 'Engineer',
+               'Electrician', 'Business', 'Clerk', None]
+EDUCATION = ['Primary', '10th Pass', '12th Pass', 'Graduate', 'Post Graduate', 'Hafiz', None]
+
+SURVEY_SCHEMA = [
+    {'id': 'water_source', 'label': 'Water source', 'type': 'select', 'options': ['Tap', 'Well', 'Tanker']},
+    {'id': 'family_income', 'label': 'Family income', 'type': 'number', 'min': 0},
+    {'id': 'has_ration_card', 'label': 'Has ration card', 'type': 'boolean'},
+    {'id': 'notes', 'label': 'Notes', 'type': 'text', 'max_length': 200},
+]
+
+
+# ============================================================================
+# COPY
+# ============================================================================
+
+def _copy_value(value) -> str:
+    if value is None:
+        return r'\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False)
+    elif isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def copy_rows(model, rows, use_copy: bool = True, batch_size: int = BATCH_SIZE) -> int:
+    """
+    Insert rows (dicts of field name -> value) without returning ids.
+    Missing fields take the model default; auto_now fields get now().
+    Falls back to bulk_create when COPY is off or unavailable.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    if not use_copy or connection.vendor != 'postgresql':
+        model.objects.bulk_create([model(**row) for row in rows], batch_size=batch_size)
+        return len(rows)
+
+    now = timezone.now()
+    fields = [f for f in model._meta.concrete_fields if not f.primary_key or f.name in rows[0]]
+    defaults = {}
+    for field in fields:
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+            defaults[field.name] = now
+        elif field.has_default():
+            defaults[field.name] = field.get_default()
+        else:
+            defaults[field.name] = None
+
+    columns = ', '.join(f'"{f.column}"' for f in fields)
+    sql = f'COPY "{model._meta.db_table}" ({columns}) FROM STDIN'
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            buffer = io.StringIO()
+            for row in rows[start:start + batch_size]:
+                buffer.write('\t'.join(
+                    _copy_value(row.get(f.name, row.get(f.attname, defaults[f.name]))) for f in fields
+                ))
+                buffer.write('\n')
+            buffer.seek(0)
+            cursor.cursor.copy_expert(sql, buffer)
+    return len(rows)
+
+
+# ============================================================================
+# GENERATOR
+# ============================================================================
+
+class TenantDataGenerator:
+    """Fill the current tenant schema with synthetic data; see the module docstring."""
+
+    def __init__(self, households: int = 1000, members_per_household: int = 4, years: int = 2,
+                 vouchers_per_day: int = 5, survey_ratio: float = 0.5, telegram_ratio: float = 0.3,
+                 seed: int = 0, use_copy: bool = True, batch_size: int = BATCH_SIZE, log=None):
+        self.households = households
+        self.members_per_household = max(members_per_household, 1)
+        self.years = years
+        self.vouchers_per_day = vouchers_per_day
+        self.survey_ratio = survey_ratio
+        self.telegram_ratio = telegram_ratio
+        self.use_copy = use_copy
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        # Same seed and schema -> same data
+        self.random = random.Random(f"{seed}:{connection.schema_name}")
+        self.today = timezone.localdate()
+        self.summary = {
+            'schema': connection.schema_name, 'households': 0, 'members': 0, 'subscriptions': 0,
+            'receipts': 0, 'journal_entries': 0, 'journal_items': 0, 'survey_responses': 0,
+            'telegram_links': 0,
+        }
+
+    def run(self) -> dict:
+        with transaction.atomic():
+            households = self.create_households()
+            heads = self.create_members(households)
+            self.create_subscriptions(households)
+            self.create_journal(heads)
+            self.create_survey_responses(households)
+            self.create_telegram_links(households)
+        self.rebuild_derived()
+        return self.summary
+
+    # ------------------------------------------------------------------ census
+
+    def create_households(self) -> list:
+        rnd = self.random
+        ids = Household.allocate_membership_ids(self.households)
+        households = []
+        for membership_id in ids:
+            number = int(''.join(ch for ch in membership_id if ch.isdigit()) or 0)
+            households.append(Household(
+                membership_id=membership_id,
+                # Derived from the membership number, so repeated runs never collide
+                phone_number=f"6{number:09d}",
+                address=f"{rnd.randint(1, 400)}-{rnd.choice('ABCD')}, {rnd.choice(AREAS)}",
+                housing_status=rnd.choice(Household.HousingStatus.values),
+                is_verified=rnd.random() < 0.7,
+                custom_data={'village': rnd.choice(AREAS), 'family_size': rnd.randint(1, 9)},
+            ))
+        created = []
+        for start in range(0, len(households), self.batch_size):
+            created.extend(Household.objects.bulk_create(households[start:start + self.batch_size]))
+        self.summary['households'] = len(created)
+        self.log(f"  households: {len(created)}")
+        return created
+
+    def _member(self, household, surname, relationship, gender, age, head=False):
+        rnd = self.random
+        employed = 18 <= age < 60 and rnd.random() < 0.6
+        return {
+            'household_id': household.pk,
+            'full_name': f"{rnd.choice(MALE_NAMES if gender == Member.Gender.MALE else FEMALE_NAMES)} {surname}",
+            'is_head_of_family': head,
+            'relationship_to_head': relationship,
+            'gender': gender,
+            'dob': self.today - timedelta(days=age * 365 + rnd.randint(0, 364)),
+            'marital_status': Member.MaritalStatus.MARRIED if relationship in (
+                Member.Relationship.SELF, Member.Relationship.SPOUSE) else Member.MaritalStatus.SINGLE,
+            'profession': rnd.choice(PROFESSIONS) if employed else None,
+            'education': rnd.choice(EDUCATION),
+            'is_employed': employed,
+            'monthly_income': Decimal(rnd.randrange(3000, 60000, 500)) if employed else None,
+            'is_approved': rnd.random() > 0.01,
+            'custom_data': {},
+        }
+
+    def create_members(self, households) -> list:
+        """Create members; returns the head member ids (donors for receipts)."""
+        rnd = self.random
+        rows = []
+        for household in households:
+            surname = rnd.choice(SURNAMES)
+            size = rnd.randint(1, 2 * self.members_per_household - 1)
+            head_age = rnd.randint(25, 80)
+            rows.append(self._member(household, surname, Member.Relationship.SELF, Member.Gender.MALE, head_age, head=True))
+            if size > 1:
+                rows.append(self._member(household, surname, Member.Relationship.SPOUSE, Member.Gender.FEMALE,
+                                         max(head_age - rnd.randint(0, 8), 18)))
+            for _ in range(size - 2):
+                son = rnd.random() < 0.5
+                rows.append(self._member(
+                    household, surname,
+                    Member.Relationship.SON if son else Member.Relationship.DAUGHTER,
+                    Member.Gender.MALE if son else Member.Gender.FEMALE,
+                    rnd.randint(0, max(head_age - 20, 1)),
+                ))
+        self.summary['members'] = copy_rows(Member, rows, self.use_copy, self.batch_size)
+        self.log(f"  members: {self.summary['members']}")
+        return list(Member.objects.filter(
+            household_id__in=[h.pk for h in households], is_head_of_family=True
+        ).values_list('id', flat=True))
+
+    # ------------------------------------------------------------ membership
+
+    def create_subscriptions(self, households):
+        rnd = self.random
+        config = MembershipConfig.objects.filter(is_active=True).first()
+        fee = config.minimum_fee if config else Decimal('1200.00')
+        subscriptions = []
+        for household in households:
+            for year in range(max(self.years, 1)):
+                start = date(self.today.year - year, 1, 1)
+                paid = fee if rnd.random() < 0.8 else (fee / 2 if rnd.random() < 0.5 else Decimal('0.00'))
+                if paid >= fee:
+                    status = Subscription.Status.ACTIVE if year == 0 else Subscription.Status.EXPIRED
+                else:
+                    status = Subscription.Status.PENDING if year == 0 else Subscription.Status.EXPIRED
+                subscriptions.append(Subscription(
+                    household=household, start_date=start, end_date=date(start.year, 12, 31),
+                    amount_paid=paid, minimum_required=fee, status=status,
+                ))
+        created = []
+        for start in range(0, len(subscriptions), self.batch_size):
+            created.extend(Subscription.objects.bulk_create(subscriptions[start:start + self.batch_size]))
+        self.summary['subscriptions'] = len(created)
+
+        now = timezone.now()
+        token = uuid.UUID(int=self.random.getrandbits(128)).hex[:6].upper()
+        receipts = [
+            {
+                'subscription_id': s.pk, 'amount': s.amount_paid, 'membership_portion': s.amount_paid,
+                'donation_portion': Decimal('0.00'), 'receipt_number': f"SYN-{token}-{s.pk}",
+                'payment_date': min(now, timezone.make_aware(
+                    datetime.combine(s.start_date + timedelta(days=rnd.randint(0, 180)), datetime.min.time())
+                )),
+            }
+            for s in created if s.amount_paid
+        ]
+        self.summary['receipts'] = copy_rows(Receipt, receipts, self.use_copy, self.batch_size)
+        self.log(f"  subscriptions: {len(created)}, receipts: {self.summary['receipts']}")
+
+    # ---------------------------------------------------------------- ledger
+
+    def _ledgers(self) -> dict:
+        if not Ledger.objects.filter(code='1001').exists():
+            call_command('seed_ledger', stdout=io.StringIO())
+        ledgers = {l.code: l for l in Ledger.objects.filter(parent__isnull=False, is_active=True)}
+        return {
+            'cash': ledgers['1001'],
+            'bank': ledgers['1002'],
+            'income': [l for l in ledgers.values() if l.account_type == Ledger.AccountType.INCOME],
+            # Zakat distribution is funded from zakat income only; keep payments unrestricted
+            'expense': [l for l in ledgers.values()
+                        if l.account_type == Ledger.AccountType.EXPENSE
+                        and l.fund_type == Ledger.FundType.UNRESTRICTED_GENERAL],
+        }
+
+    def create_journal(self, heads):
+        rnd = self.random
+        ledgers = self._ledgers()
+        days = 365 * self.years
+        offset = JournalEntry.objects.count()
+        entries, lines = [], []
+        for n in range(days * self.vouchers_per_day):
+            day = self.today - timedelta(days=n // max(self.vouchers_per_day, 1))
+            receipt = rnd.random() < 0.75
+            amount = Decimal(rnd.randrange(100, 25000, 50))
+            entries.append(JournalEntry(
+                voucher_number=f"SYN-{offset + n + 1:08d}",
+                voucher_type=JournalEntry.VoucherType.RECEIPT if receipt else JournalEntry.VoucherType.PAYMENT,
+                date=day,
+                narration='Donation received' if receipt else 'Expense paid',
+                donor_id=rnd.choice(heads) if receipt and heads and rnd.random() < 0.8 else None,
+                payment_mode=rnd.choice(JournalEntry.PaymentMode.values),
+                total_amount=amount,
+                is_finalized=day < self.today - timedelta(days=30),
+            ))
+            account = ledgers['cash'] if rnd.random() < 0.6 else ledgers['bank']
+            if receipt:
+                lines.append(((account, amount, 0), (rnd.choice(ledgers['income']), 0, amount)))
+            else:
+                lines.append(((rnd.choice(ledgers['expense']), amount, 0), (account, 0, amount)))
+
+        created = []
+        for start in range(0, len(entries), self.batch_size):
+            created.extend(JournalEntry.objects.bulk_create(entries[start:start + self.batch_size]))
+        items = [
+            {'journal_entry_id': entry.pk, 'ledger_id': ledger.pk,
+             'debit_amount': Decimal(debit), 'credit_amount': Decimal(credit), 'particulars': ''}
+            for entry, pair in zip(created, lines)
+            for ledger, debit, credit in pair
+        ]
+        self.summary['journal_entries'] = len(created)
+        self.summary['journal_items'] = copy_rows(JournalItem, items, self.use_copy, self.batch_size)
+        self.log(f"  journal entries: {len(created)}, items: {self.summary['journal_items']}")
+
+    # --------------------------------------------------------- surveys/links
+
+    def create_survey_responses(self, households):
+        if not self.survey_ratio:
+            return
+        rnd = self.random
+        survey, _ = Survey.objects.get_or_create(title=SURVEY_TITLE, defaults={'schema': SURVEY_SCHEMA})
+        now = timezone.now()
+        rows = []
+        for household in households:
+            if rnd.random() >= self.survey_ratio:
+                continue
+            collected = now - timedelta(days=rnd.randint(0, 365 * max(self.years, 1)))
+            rows.append({
+                'survey_id': survey.pk,
+                'household_id': household.pk,
+                'answers': {
+                    'water_source': rnd.choice(SURVEY_SCHEMA[0]['options']),
+                    'family_income': rnd.randrange(0, 80000, 500),
+                    'has_ration_card': rnd.random() < 0.6,
+                    'notes': '',
+                },
+                'client_uuid': uuid.UUID(int=rnd.getrandbits(128)),
+                'collected_at': collected,
+                'submitted_at': collected,
+            })
+        self.summary['survey_responses'] = copy_rows(SurveyResponse, rows, self.use_copy, self.batch_size)
+        self.log(f"  survey responses: {self.summary['survey_responses']}")
+
+    def create_telegram_links(self, households):
+        rnd = self.random
+        links = [
+            TelegramLink(phone_number=h.phone_number, chat_id=str(rnd.randint(10 ** 8, 10 ** 10)),
+                         is_verified=rnd.random() < 0.9)
+            for h in households if h.phone_number and rnd.random() < self.telegram_ratio
+        ]
+        TelegramLink.objects.bulk_create(links, batch_size=self.batch_size, ignore_conflicts=True)
+        self.summary['telegram_links'] = len(links)
+        self.log(f"  telegram links: {len(links)}")
+
+    # --------------------------------------------------------------- derived
+
+    def rebuild_derived(self):
+        from .ledger_summary import rebuild
+        from .stats import invalidate_census_stats
+        from .zakat import recompute_all
+
+        rebuild()
+        recompute_all()
+        invalidate_census_stats()
+        # Fresh planner statistics so benchmarks and EXPLAIN see the new volumes
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
@@ -0,0 +1,226 @@
+"""
+Duplicate household detection and merge.
+
+Households are grouped by blocking keys: normalized phone, a head-name
+signature and an address signature. Only households that share a block
+are compared, so a scan costs roughly O(n) rather than O(n²). Each pair
+is scored on phone, name trigram and address trigram similarity. Pairs
+above the threshold are queued as DuplicateCandidate rows for an admin to
+merge or dismiss.
+"""
+import re
+from collections import defaultdict
+from itertools import combinations
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    DuplicateCandidate, Household, JournalEntry, Member, PaymentOrder,
+    ServiceRequest, Subscription, SurveyResponse,
+)
+
+DEFAULT_THRESHOLD = 60
+# Blocks larger than this are too generic ("mohammed", a big street) to be useful
+MAX_BLOCK_SIZE = 50
+
+WEIGHTS = {'phone': 45, 'name': 35, 'address': 20}
+
+_NON_ALNUM = re.compile(r'[^a-z0-9 ]+')
+_DIGITS = re.compile(r'\d+')
+
+
+# ============================================================================
+# NORMALIZATION
+# ============================================================================
+
+def normalize_phone(phone) -> str:
+    digits = re.sub(r'\D', '', phone or '')
+    # Compare national numbers: drop +91 / leading 0
+    return digits[-10:] if len(digits) >= 10 else digits
+
+
+def normalize_text(text) -> str:
+    return ' '.join(_NON_ALNUM.sub(' ', (text or '').lower()).split())
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)} if text else set()
+
+
+def similarity(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def name_signature(name: str) -> str:
+    # "Mohammed Ali Khan" and "Mohd. Ali Khan" both give "ali|moh"
+    tokens = [t[:3] for t in name.split() if len(t) >= 2][:2]
+    return '|'.join(sorted(tokens))
+
+
+def address_signature(address: str) -> str:
+    # House number plus the first word: "12-B, Noor Nagar" -> "12|noo"
+    numbers = _DIGITS.findall(address)
+    words = [w for w in address.split() if w.isalpha()]
+    if not numbers or not words:
+        return ''
+    return f"{numbers[0]}|{words[0][:3]}"
+
+
+# ============================================================================
+# DETECTION
+# ============================================================================
+
+def load_records() -> dict:
+    """Normalized fields per household (two queries)."""
+    heads = dict(Member.objects.filter(is_head_of_family=True).order_by('household_id', 'id').values_list(
+        'household_id', 'full_name'
+    ).distinct('household_id'))
+    records = {}
+    for pk, phone, address in Household.objects.values_list('id', 'phone_number', 'address').iterator(chunk_size=2000):
+        name = normalize_text(heads.get(pk))
+        address = normalize_text(address)
+        records[pk] = {
+            'phone': normalize_phone(phone),
+            'name': name,
+            'address': address,
+            'name_grams': trigrams(name),
+            'address_grams': trigrams(address),
+        }
+    return records
+
+
+def blocking_keys(record) -> list:
+    keys = []
+    if len(record['phone']) >= 7:
+        keys.append(f"p:{record['phone']}")
+    if record['name']:
+        keys.append(f"n:{name_signature(record['name'])}")
+    signature = address_signature(record['address'])
+    if signature:
+        keys.append(f"a:{signature}")
+    return keys
+
+
+def score_pair(a, b) -> tuple:
+    """Return (score 0-100, reasons)."""
+    reasons = []
+    total = 0.0
+    if a['phone'] and a['phone'] == b['phone']:
+        total += WEIGHTS['phone']
+        reasons.append('same phone')
+    name_sim = similarity(a['name_grams'], b['name_grams'])
+    if name_sim:
+        total += WEIGHTS['name'] * name_sim
+        if name_sim >= 0.5:
+            reasons.append(f'similar head name ({name_sim:.0%})')
+    address_sim = similarity(a['address_grams'], b['address_grams'])
+    if address_sim:
+        total += WEIGHTS['address'] * address_sim
+        if address_sim >= 0.5:
+            reasons.append(f'similar address ({address_sim:.0%})')
+    return round(total), reasons
+
+
+def find_duplicates(records: dict, threshold: int = DEFAULT_THRESHOLD, max_block: int = MAX_BLOCK_SIZE) -> list:
+    """Candidate pairs [(id_a, id_b, score, reasons)] with id_a < id_b, best first."""
+    blocks = defaultdict(list)
+    for pk, record in records.items():
+        for key in blocking_keys(record):
+            blocks[key].append(pk)
+
+    seen, pairs = set(), []
+    for members in blocks.values():
+        if len(members) < 2 or len(members) > max_block:
+            continue
+        for a, b in combinations(sorted(members), 2):
+            if (a, b) in seen:
+                continue
+            seen.add((a, b))
+            score, reasons = score_pair(records[a], records[b])
+            if score >= threshold:
+                pairs.append((a, b, score, reasons))
+    pairs.sort(key=lambda pair: -pair[2])
+    return pairs
+
+
+def refresh_candidates(threshold: int = DEFAULT_THRESHOLD) -> dict:
+    """Scan the tenant and queue new pairs; dismissed pairs stay dismissed."""
+    pairs = find_duplicates(load_records(), threshold)
+    existing = set(DuplicateCandidate.objects.values_list('household_a_id', 'household_b_id'))
+    new = [
+        DuplicateCandidate(household_a_id=a, household_b_id=b, score=score, reasons=reasons)
+        for a, b, score, reasons in pairs if (a, b) not in existing
+    ]
+    DuplicateCandidate.objects.bulk_create(new, batch_size=1000, ignore_conflicts=True)
+    return {'pairs': len(pairs), 'new': len(new)}
+
+
+# ============================================================================
+# MERGE
+# ============================================================================
+
+class MergeError(ValueError):
+    pass
+
+
+@transaction.atomic
+def merge_households(keep_id: int, drop_id: int) -> Household:
+    """
+    Move everything from household `drop_id` onto `keep_id` and delete it.
+    Members with the same name in both households are merged too, with
+    their donations repointed to the surviving member.
+    """
+    if keep_id == drop_id:
+        raise MergeError("Cannot merge a household into itself")
+    households = {h.pk: h for h in Household.objects.select_for_update().filter(pk__in=[keep_id, drop_id])}
+    if len(households) != 2:
+        raise MergeError("Household not found")
+    keep, drop = households[keep_id], households[drop_id]
+
+    # Same person recorded in both households
+    keep_members = {normalize_text(m.full_name): m for m in keep.members.all()}
+    for member in drop.members.all():
+        twin = keep_members.get(normalize_text(member.full_name))
+        if twin is None:
+            continue
+        JournalEntry.objects.filter(donor=member).update(donor=twin)
+        for field in ('dob', 'profession', 'education', 'skills', 'monthly_income', 'requirements'):
+            if not getattr(twin, field) and getattr(member, field):
+                setattr(twin, field, getattr(member, field))
+        twin.custom_data = {**(member.custom_data or {}), **(twin.custom_data or {})}
+        twin.save()
+        member.delete()
+
+    has_head = any(m.is_head_of_family for m in keep_members.values())
+    moved = Member.objects.filter(household=drop)
+    if has_head:
+        moved.filter(is_head_of_family=True).update(is_head_of_family=False)
+    moved.update(household=keep)
+    for model in (Subscription, SurveyResponse, ServiceRequest, PaymentOrder):
+        model.objects.filter(household=drop).update(household=keep)
+
+    # Keep's values win; fill its blanks from the duplicate
+    keep.custom_data = {**(drop.custom_data or {}), **(keep.custom_data or {})}
+    keep.is_verified = keep.is_verified or drop.is_verified
+    phone = drop.phone_number
+    drop.delete()  # Frees the unique phone number (and drops its candidate rows)
+    if not keep.phone_number and phone:
+        keep.phone_number = phone
+    if not keep.address and drop.address:
+        keep.address = drop.address
+    keep.save()
+
+    from .zakat import recompute_all
+    recompute_all(household_ids=[keep.pk])
+    return keep
+
+
+def dismiss(candidate: DuplicateCandidate, user=None) -> None:
+    candidate.status = DuplicateCandidate.Status.DISMISSED
+    candidate.reviewed_by = user
+    candidate.reviewed_at = timezone.now()
+    candidate.save(update_fields=['status', 'reviewed_by', 'reviewed_at'])
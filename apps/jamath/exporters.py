@@ -0,0 +1,248 @@
+"""
+Streaming census export (CSV / XLSX).
+
+Rows come from a server-side cursor (QuerySet.iterator) as flat tuples,
+never as model instances or nested serializers. CSV is written straight
+into a StreamingHttpResponse (through an async iterator under ASGI, which
+would otherwise read a sync iterator to the end before sending). XLSX uses openpyxl's write-only workbook
+spooled to a temporary file. Either way memory stays flat however many
+households a tenant has. custom_data keys become `custom.<key>` columns.
+"""
+import csv
+import itertools
+import json
+import re
+import tempfile
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count, F, Func, OuterRef, Q, Subquery, TextField
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Household, Member
+
+CHUNK_SIZE = 2000
+CUSTOM_PREFIX = 'custom.'
+
+
+class ExportError(ValueError):
+    pass
+
+
+def _head_name():
+    return Subquery(
+        Member.objects.filter(household=OuterRef('pk'), is_head_of_family=True).values('full_name')[:1]
+    )
+
+
+# Column name -> ORM expression (a field path or an annotation)
+HOUSEHOLD_COLUMNS = {
+    'id': 'id',
+    'membership_id': 'membership_id',
+    'head_name': _head_name,
+    'address': 'address',
+    'phone_number': 'phone_number',
+    'economic_status': 'economic_status',
+    'housing_status': 'housing_status',
+    'zakat_score': 'zakat_score',
+    'is_verified': 'is_verified',
+    'member_count': lambda: Count('members'),
+    'created_at': 'created_at',
+}
+
+MEMBER_COLUMNS = {
+    'id': 'id',
+    'household_id': 'household_id',
+    'membership_id': 'household__membership_id',
+    'full_name': 'full_name',
+    'is_head_of_family': 'is_head_of_family',
+    'relationship_to_head': 'relationship_to_head',
+    'gender': 'gender',
+    'dob': 'dob',
+    'marital_status': 'marital_status',
+    'profession': 'profession',
+    'education': 'education',
+    'skills': 'skills',
+    'is_employed': 'is_employed',
+    'monthly_income': 'monthly_income',
+    'is_alive': 'is_alive',
+}
+
+
+# ============================================================================
+# QUERYSETS
+# ============================================================================
+
+def filter_households(queryset, params, prefix=''):
+    """Apply economic_status / is_verified / zakat score range filters."""
+    conditions = Q()
+    if params.get('economic_status'):
+        conditions &= Q(**{f'{prefix}economic_status': params['economic_status']})
+    if params.get('is_verified') not in (None, ''):
+        conditions &= Q(**{f'{prefix}is_verified': str(params['is_verified']).lower() in ('1', 'true', 'yes')})
+    for param, lookup in (('zakat_min', 'gte'), ('zakat_max', 'lte')):
+        if params.get(param) not in (None, ''):
+            try:
+                value = int(params[param])
+            except (TypeError, ValueError):
+                raise ExportError(f"{param} must be a whole number")
+            conditions &= Q(**{f'{prefix}zakat_score__{lookup}': value})
+    return queryset.filter(conditions)
+
+
+def custom_keys(queryset) -> list:
+    """Distinct custom_data keys across the rows being exported (one query)."""
+    keys = queryset.order_by().annotate(
+        kind=Func(F('custom_data'), function='jsonb_typeof', output_field=TextField()),
+    ).filter(kind='object').annotate(
+        key=Func(F('custom_data'), function='jsonb_object_keys', output_field=TextField()),
+    ).values_list('key', flat=True).distinct()
+    return sorted(keys)
+
+
+def _flatten(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def build_export(level: str, params) -> tuple:
+    """Return (header, row iterator) for 'households' or 'members'."""
+    if level == 'members':
+        columns = MEMBER_COLUMNS
+        queryset = filter_households(Member.objects.all(), params, prefix='household__')
+    elif level == 'households':
+        columns = HOUSEHOLD_COLUMNS
+        queryset = filter_households(Household.objects.all(), params)
+    else:
+        raise ExportError("level must be 'households' or 'members'")
+
+    requested = [c.strip() for c in (params.get('columns') or '').split(',') if c.strip()]
+    if requested:
+        unknown = [c for c in requested if c not in columns and not c.startswith(CUSTOM_PREFIX)]
+        if unknown:
+            raise ExportError(f"Unknown column(s): {', '.join(unknown)}")
+        selected = requested
+    else:
+        selected = list(columns) + [CUSTOM_PREFIX + key for key in custom_keys(queryset)]
+
+    base = [c for c in selected if not c.startswith(CUSTOM_PREFIX)]
+    custom = [c[len(CUSTOM_PREFIX):] for c in selected if c.startswith(CUSTOM_PREFIX)]
+
+    annotations, fields = {}, []
+    for name in base:
+        expression = columns[name]
+        if callable(expression):
+            annotations[f'_{name}'] = expression()
+            fields.append(f'_{name}')
+        else:
+            fields.append(expression)
+    if custom:
+        fields.append('custom_data')
+
+    queryset = queryset.annotate(**annotations).order_by('id').values_list(*fields)
+
+    def rows():
+        for values in queryset.iterator(chunk_size=CHUNK_SIZE):
+            row = [_flatten(v) for v in values[:len(base)]]
+            if custom:
+                data = values[-1] if isinstance(values[-1], dict) else {}
+                row.extend(_flatten(data.get(key, '')) for key in custom)
+            yield row
+
+    return selected, rows()
+
+
+# ============================================================================
+# WRITERS
+# ============================================================================
+
+# Spreadsheet apps run CSV cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+# Phone numbers (+91...) and signed numbers are safe and stay as they are
+NUMERIC_RE = re.compile(r'^[+-]?[0-9][0-9 .]*$')
+
+
+def _csv_value(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES) and not NUMERIC_RE.match(value):
+        # Volunteer-entered text: make it a literal, not a formula
+        return "'" + value
+    return value
+
+
+class _Echo:
+    """File-like object whose write() returns the value, for streaming csv."""
+
+    def write(self, value):
+        return value
+
+
+def _next_lines(lines, count) -> str:
+    return ''.join(itertools.islice(lines, count))
+
+
+def _async_lines(lines):
+    async def stream():
+        # A chunk of rows per hop to the thread that holds the DB cursor
+        while chunk := await sync_to_async(_next_lines)(lines, CHUNK_SIZE):
+            yield chunk
+    return stream()
+
+
+def csv_response(header, rows, filename: str, use_async: bool = False) -> StreamingHttpResponse:
+    writer = csv.writer(_Echo())
+
+    def stream():
+        yield '\ufeff'  # So Excel opens UTF-8 (Urdu/Arabic names) correctly
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow([_csv_value(v) for v in row])
+
+    content = _async_lines(stream()) if use_async else stream()
+    response = StreamingHttpResponse(content, content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def xlsx_response(header, rows, filename: str) -> FileResponse:
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ExportError("XLSX export needs openpyxl (pip install openpyxl)")
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Census')
+    sheet.append(header)
+    for row in rows:
+        sheet.append([_xlsx_value(sheet, v) for v in row])
+    # Spooled in memory up to 10 MB, then on disk
+    output = tempfile.SpooledTemporaryFile(max_size=10 * 1024 * 1024)
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(
+        output, as_attachment=True, filename=f"{filename}.xlsx",
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+
+
+def _xlsx_value(sheet, value):
+    # Excel can't store timezone-aware datetimes
+    if hasattr(value, 'tzinfo') and value.tzinfo is not None:
+        return timezone.localtime(value).replace(tzinfo=None)
+    if isinstance(value, str) and value.startswith('='):
+        # openpyxl stores '=...' strings as formulas; keep it plain text
+        from openpyxl.cell import WriteOnlyCell
+        cell = WriteOnlyCell(sheet, value=value)
+        cell.data_type = 's'
+        return cell
+    return value
+
+
+def export_census(level: str, params, output: str = 'csv', use_async: bool = False):
+    if output not in ('csv', 'xlsx'):
+        raise ExportError("output must be 'csv' or 'xlsx'")
+    header, rows = build_export(level, params)
+    filename = f"census-{level}-{timezone.localdate().isoformat()}"
+    if output == 'xlsx':
+        return xlsx_response(header, rows, filename)
+    return csv_response(header, rows, filename, use_async=use_async)
@@ -0,0 +1,332 @@
+"""
+Bulk census import from CSV or XLSX.
+
+The sheet has one row per member, with household columns repeated (or
+filled only on the family's first row) and `household_ref` tying rows of
+one family together. Rows are streamed and processed in chunks of
+households. Each chunk needs a fixed number of queries: a phone and
+membership ID duplicate check, one membership ID block allocation, and
+one bulk_create each for households and members.
+
+Columns:
+    household_ref (required), address, phone_number, membership_id,
+    housing_status, custom.<key> (household custom_data),
+    full_name, relationship, is_head, gender, dob, marital_status,
+    profession, education, is_employed, monthly_income, requirements
+"""
+import codecs
+import csv
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection, transaction
+
+from .custom_fields import CustomFieldError, normalize_custom_data
+from .models import CustomFieldDefinition, Household, Member, MembershipConfig
+
+CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+TRUE_VALUES = ('true', 'yes', '1', 'y')
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y')
+
+
+class CensusImportError(ValueError):
+    """The file as a whole can't be imported."""
+
+
+# ============================================================================
+# READERS
+# ============================================================================
+
+def _clean_header(value) -> str:
+    return str(value or '').strip().lower().replace(' ', '_')
+
+
+def iter_csv(fileobj):
+    # fileobj yields lines of bytes (an upload or a file opened in 'rb')
+    reader = csv.reader(codecs.iterdecode(fileobj, 'utf-8-sig'))
+    try:
+        header = [_clean_header(h) for h in next(reader, [])]
+        for values in reader:
+            yield dict(zip(header, values))
+    except UnicodeDecodeError:
+        raise CensusImportError(
+            f"The CSV file is not UTF-8 (near line {reader.line_num + 1}). "
+            "Save it as \"CSV UTF-8\" and upload again."
+        )
+    except csv.Error as e:
+        raise CensusImportError(f"The CSV file could not be read (line {reader.line_num}): {e}")
+
+
+def iter_xlsx(fileobj):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise CensusImportError("XLSX import needs openpyxl (pip install openpyxl)")
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    # read_only streams rows instead of loading the whole sheet
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError, OSError):
+        raise CensusImportError("The file is not a valid .xlsx workbook")
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [_clean_header(h) for h in next(rows, ())]
+        for values in rows:
+            yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def iter_rows(fileobj, filename: str):
+    name = (filename or '').lower()
+    if name.endswith('.xlsx'):
+        return iter_xlsx(fileobj)
+    if name.endswith('.csv') or not name:
+        return iter_csv(fileobj)
+    raise CensusImportError("Upload a .csv or .xlsx file")
+
+
+# ============================================================================
+# FIELD PARSING
+# ============================================================================
+
+def _text(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # Excel stores phone numbers as floats
+    return str(value).strip()
+
+
+def _choice(value, choices, field):
+    text = _text(value)
+    if not text:
+        return None
+    for key, label in choices:
+        if text.lower() in (key.lower(), label.lower()):
+            return key
+    raise ValueError(f"{field}: '{text}' is not a valid choice")
+
+
+def _bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return _text(value).lower() in TRUE_VALUES
+
+
+def _date(value, field):
+    if value in (None, ''):
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = _text(value)
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"{field}: '{text}' is not a date (use YYYY-MM-DD or DD/MM/YYYY)")
+
+
+def _decimal(value, field):
+    text = _text(value).replace(',', '')
+    if not text:
+        return None
+    try:
+        return Decimal(text).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError(f"{field}: '{text}' is not a number")
+
+
+def parse_household(row) -> dict:
+    phone = _text(row.get('phone_number')).replace(' ', '') or None
+    if phone and len(phone) > 15:
+        raise ValueError("phone_number: too long")
+    return {
+        'address': _text(row.get('address')),
+        'phone_number': phone,
+        'membership_id': _text(row.get('membership_id')) or None,
+        'housing_status': _choice(row.get('housing_status'), Household.HousingStatus.choices, 'housing_status')
+        or Household.HousingStatus.OWN,
+        'custom_data': {
+            key[len('custom.'):]: _text(value)
+            for key, value in row.items()
+            if key.startswith('custom.') and _text(value)
+        },
+    }
+
+
+def parse_member(row) -> dict:
+    relationship = _choice(row.get('relationship'), Member.Relationship.choices, 'relationship') or Member.Relationship.SELF
+    return {
+        'full_name': _text(row.get('full_name')),
+        'relationship_to_head': relationship,
+        'is_head_of_family': _bool(row.get('is_head')) or relationship == Member.Relationship.SELF,
+        'gender': _choice(row.get('gender'), Member.Gender.choices, 'gender') or Member.Gender.MALE,
+        'dob': _date(row.get('dob'), 'dob'),
+        'marital_status': _choice(row.get('marital_status'), Member.MaritalStatus.choices, 'marital_status')
+        or Member.MaritalStatus.SINGLE,
+        'profession': _text(row.get('profession')) or None,
+        'education': _text(row.get('education')) or None,
+        'is_employed': _bool(row.get('is_employed')),
+        'monthly_income': _decimal(row.get('monthly_income'), 'monthly_income'),
+        'requirements': _text(row.get('requirements')) or None,
+    }
+
+
+# ============================================================================
+# IMPORTER
+# ============================================================================
+
+class CensusImporter:
+    """Import households and members; see the module docstring for columns."""
+
+    def __init__(self, dry_run: bool = False, chunk_size: int = CHUNK_SIZE):
+        self.dry_run = dry_run
+        self.chunk_size = chunk_size
+        self.refs = {}          # household_ref -> Household (created or pending)
+        self.skipped = set()    # household_refs whose household row was rejected
+        self.phones = set()
+        self.membership_ids = set()
+        self.created_ids = []
+        self.prefix = Household.membership_id_prefix()
+        self.summary = {
+            'rows': 0, 'households_created': 0, 'members_created': 0,
+            'error_count': 0, 'errors': [], 'dry_run': dry_run,
+        }
+
+    def error(self, row_number, message):
+        self.summary['error_count'] += 1
+        errors = self.summary['errors']
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({'row': row_number, 'error': message})
+
+    def run(self, rows) -> dict:
+        chunk = []
+        for row_number, row in enumerate(rows, start=2):  # row 1 is the header
+            if not any(_text(v) for v in row.values()):
+                continue
+            self.summary['rows'] += 1
+            chunk.append((row_number, row))
+            if len(chunk) >= self.chunk_size:
+                self.process_chunk(chunk)
+                chunk = []
+        if chunk:
+            self.process_chunk(chunk)
+
+        if self.created_ids and not self.dry_run:
+            self._after_import()
+        return self.summary
+
+    def process_chunk(self, chunk):
+        households, members = [], []
+        for row_number, row in chunk:
+            ref = _text(row.get('household_ref'))
+            if not ref:
+                self.error(row_number, "household_ref is required")
+                continue
+            if ref in self.skipped:
+                self.error(row_number, f"household '{ref}' was rejected on an earlier row")
+                continue
+            if ref not in self.refs:
+                try:
+                    fields = parse_household(row)
+                    if not fields['address']:
+                        raise ValueError("address is required for a new household")
+                    fields['custom_data'] = normalize_custom_data(
+                        CustomFieldDefinition.Entity.HOUSEHOLD, fields['custom_data']
+                    )
+                except CustomFieldError as e:
+                    self.skipped.add(ref)
+                    self.error(row_number, '; '.join(f"custom.{k}: {v}" for k, v in e.args[0].items()))
+                    continue
+                except ValueError as e:
+                    self.skipped.add(ref)
+                    self.error(row_number, str(e))
+                    continue
+                household = Household(**fields)
+                household._row_number = row_number
+                household._ref = ref
+                self.refs[ref] = household
+                households.append(household)
+
+            if _text(row.get('full_name')):
+                try:
+                    fields = parse_member(row)
+                except ValueError as e:
+                    self.error(row_number, str(e))
+                    continue
+                members.append((ref, Member(**fields)))
+
+        households = self._drop_duplicates(households)
+        self._save(households, members)
+
+    def _drop_duplicates(self, households):
+        """Reject phone numbers / membership IDs already used (in the file or the database)."""
+        phones = [h.phone_number for h in households if h.phone_number]
+        ids = [h.membership_id for h in households if h.membership_id]
+        taken_phones = set(Household.objects.filter(phone_number__in=phones).values_list('phone_number', flat=True))
+        taken_ids = set(Household.objects.filter(membership_id__in=ids).values_list('membership_id', flat=True))
+
+        kept = []
+        for household in households:
+            problem = None
+            if household.phone_number and (household.phone_number in taken_phones or household.phone_number in self.phones):
+                problem = f"phone_number {household.phone_number} is already registered"
+            elif household.membership_id and (household.membership_id in taken_ids or household.membership_id in self.membership_ids):
+                problem = f"membership_id {household.membership_id} is already in use"
+            if problem:
+                del self.refs[household._ref]
+                self.skipped.add(household._ref)
+                self.error(household._row_number, problem)
+                continue
+            if household.phone_number:
+                self.phones.add(household.phone_number)
+            if household.membership_id:
+                self.membership_ids.add(household.membership_id)
+            kept.append(household)
+        return kept
+
+    def _save(self, households, members):
+        members = [(ref, m) for ref, m in members if ref in self.refs]
+        if self.dry_run:
+            self.summary['households_created'] += len(households)
+            self.summary['members_created'] += len(members)
+            return
+
+        with transaction.atomic():
+            # Serializes ID allocation with other imports / registrations
+            MembershipConfig.objects.select_for_update().filter(is_active=True).first()
+            missing = [h for h in households if not h.membership_id]
+            if missing:
+                explicit = [h.membership_id for h in households if h.membership_id]
+                block = Household.allocate_membership_ids(len(missing), self.prefix, taken=explicit)
+                for household, membership_id in zip(missing, block):
+                    household.membership_id = membership_id
+            Household.objects.bulk_create(households)
+            for ref, member in members:
+                member.household = self.refs[ref]
+            Member.objects.bulk_create([m for _, m in members], batch_size=1000)
+        self.created_ids.extend(h.pk for h in households)
+        self.summary['households_created'] += len(households)
+        self.summary['members_created'] += len(members)
+
+    def _after_import(self):
+        # bulk_create skips the census signals and per-save zakat scoring
+        from .stats import invalidate_census_stats
+        from .tasks import recompute_zakat_scores
+
+        invalidate_census_stats()
+        schema_name = connection.schema_name
+        created = list(self.created_ids)
+        transaction.on_commit(lambda: recompute_zakat_scores.delay(schema_name, household_ids=created))
+
+
+def import_census(fileobj, filename: str = '', dry_run: bool = False, chunk_size: int = CHUNK_SIZE) -> dict:
+    return CensusImporter(dry_run=dry_run, chunk_size=chunk_size).run(iter_rows(fileobj, filename))
@@ -0,0 +1,188 @@
+"""
+Daily ledger summary maintenance and queries.
+
+Journal item writes mark their voucher date as dirty. When the transaction
+commits, each dirty day is recomputed with one grouped query. Reports and
+Basira then read LedgerDailySummary by date range instead of aggregating
+over JournalItem.
+"""
+import threading
+from datetime import date as date_type
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import JournalEntry, JournalItem, LedgerDailySummary
+
+ZERO = Decimal('0.00')
+
+_local = threading.local()
+
+
+# ============================================================================
+# MAINTENANCE
+# ============================================================================
+
+def _pending():
+    # Per thread and schema, so tenants never flush each other's days
+    if not hasattr(_local, 'pending'):
+        _local.pending = {}
+    return _local.pending.setdefault(connection.schema_name, set())
+
+
+def mark_dirty(*dates) -> None:
+    """Queue days for recomputation once the current transaction commits."""
+    dates = {d for d in dates if d}
+    if not dates:
+        return
+    _pending().update(dates)
+    transaction.on_commit(flush_pending)
+
+
+def flush_pending() -> None:
+    pending = _pending()
+    if pending:
+        dates = set(pending)
+        pending.clear()
+        refresh_dates(dates)
+
+
+def _lock_dates(dates) -> None:
+    """
+    Serialize refreshes of the same tenant day until the transaction ends.
+    Without it, two commits posting vouchers on one day could both delete and
+    re-insert its rows and collide on (date, ledger, voucher_type). Locks are
+    taken in date order, and the grouped query below runs after them, so it
+    sees the other transaction's committed items.
+    """
+    with connection.cursor() as cursor:
+        for d in dates:
+            cursor.execute(
+                "SELECT pg_advisory_xact_lock(hashtext(%s))",
+                [f"ledger_summary:{connection.schema_name}:{d.isoformat()}"],
+            )
+
+
+@transaction.atomic
+def refresh_dates(dates) -> None:
+    """Recompute the summary rows for the given days from journal items."""
+    dates = sorted({date_type.fromisoformat(d) if isinstance(d, str) else d for d in dates})
+    if not dates:
+        return
+    _lock_dates(dates)
+    rows = JournalItem.objects.filter(journal_entry__date__in=dates).values(
+        'journal_entry__date', 'ledger_id', 'ledger__fund_type', 'journal_entry__voucher_type'
+    ).annotate(
+        debit=Sum('debit_amount'),
+        credit=Sum('credit_amount'),
+        count=Count('id'),
+    ).order_by()
+
+    LedgerDailySummary.objects.filter(date__in=dates).delete()
+    LedgerDailySummary.objects.bulk_create([
+        LedgerDailySummary(
+            date=row['journal_entry__date'],
+            ledger_id=row['ledger_id'],
+            fund_type=row['ledger__fund_type'] or '',
+            voucher_type=row['journal_entry__voucher_type'],
+            debit_total=row['debit'] or ZERO,
+            credit_total=row['credit'] or ZERO,
+            item_count=row['count'],
+        )
+        for row in rows
+    ])
+
+
+def rebuild(start=None, end=None, batch_days: int = 31) -> int:
+    """Recompute every day that has journal entries (optionally within a range)."""
+    entries = JournalEntry.objects.all()
+    if start:
+        entries = entries.filter(date__gte=start)
+    if end:
+        entries = entries.filter(date__lte=end)
+    days = sorted(set(entries.values_list('date', flat=True)))
+
+    stale = LedgerDailySummary.objects.exclude(date__in=days)
+    if start:
+        stale = stale.filter(date__gte=start)
+    if end:
+        stale = stale.filter(date__lte=end)
+    stale.delete()
+
+    for i in range(0, len(days), batch_days):
+        refresh_dates(days[i:i + batch_days])
+    return len(days)
+
+
+# ============================================================================
+# QUERIES
+# ============================================================================
+
+def summary_queryset(start=None, end=None, fund_type=None, ledger=None):
+    queryset = LedgerDailySummary.objects.all()
+    if start:
+        queryset = queryset.filter(date__gte=start)
+    if end:
+        queryset = queryset.filter(date__lte=end)
+    if fund_type:
+        queryset = queryset.filter(fund_type=fund_type)
+    if ledger:
+        queryset = queryset.filter(ledger_id=ledger)
+    return queryset
+
+
+RECEIPTS = Q(voucher_type=JournalEntry.VoucherType.RECEIPT)
+PAYMENTS = Q(voucher_type=JournalEntry.VoucherType.PAYMENT)
+
+
+def monthly_totals(months_back: int = 6, fund_type=None, ledger=None) -> list:
+    """Income vs expense per calendar month, oldest first, including empty months."""
+    today = timezone.localdate()
+    first_month = today.replace(day=1) - relativedelta(months=months_back - 1)
+    rows = summary_queryset(first_month, today, fund_type, ledger).annotate(
+        month=TruncMonth('date')
+    ).values('month').annotate(
+        # Receipt/payment voucher totals are the sums of their debit lines
+        income=Sum('debit_total', filter=RECEIPTS),
+        expense=Sum('debit_total', filter=PAYMENTS),
+    ).order_by('month')
+    by_month = {row['month']: row for row in rows}
+
+    result = []
+    for offset in range(months_back):
+        month = first_month + relativedelta(months=offset)
+        row = by_month.get(month, {})
+        income = row.get('income') or ZERO
+        expense = row.get('expense') or ZERO
+        result.append({
+            'month': month.strftime('%Y-%m'),
+            'income': income,
+            'expense': expense,
+            'net': income - expense,
+        })
+    return result
+
+
+def top_income_sources(start=None, end=None, fund_type=None, limit: int = 5) -> list:
+    """Ledgers credited by receipt vouchers, largest first."""
+    return list(
+        summary_queryset(start, end, fund_type).filter(
+            voucher_type=JournalEntry.VoucherType.RECEIPT, credit_total__gt=0
+        ).values('ledger__name').annotate(total=Sum('credit_total')).order_by('-total')[:limit]
+    )
+
+
+def period_totals(start, month_start) -> dict:
+    """Income/expense since `start` and since `month_start`, in one query."""
+    this_month = Q(date__gte=month_start)
+    totals = summary_queryset(start).aggregate(
+        income=Sum('debit_total', filter=RECEIPTS),
+        expense=Sum('debit_total', filter=PAYMENTS),
+        month_income=Sum('debit_total', filter=RECEIPTS & this_month),
+        month_expense=Sum('debit_total', filter=PAYMENTS & this_month),
+    )
+    return {k: v or ZERO for k, v in totals.items()}
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.jamath import dedupe
+
+
+class Command(BaseCommand):
+    help = 'Queue likely duplicate households for review (run per tenant via tenant_command)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=int, default=dedupe.DEFAULT_THRESHOLD, help='Minimum score (0-100)')
+
+    def handle(self, *args, **options):
+        summary = dedupe.refresh_candidates(options['threshold'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Found {summary['pairs']} likely duplicate pair(s), {summary['new']} new"
+        ))
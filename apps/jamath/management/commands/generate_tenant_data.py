@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django_tenants.utils import get_public_schema_name, get_tenant_model, schema_context
+
+from apps.jamath.datagen import BATCH_SIZE, TenantDataGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate deterministic synthetic data for load testing. Runs in the current schema '
+        '(via tenant_command) or in every schema given with --schemas / --all-tenants'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--households', type=int, default=1000, help='Households per tenant')
+        parser.add_argument('--members-per-household', type=int, default=4, help='Average household size')
+        parser.add_argument('--years', type=int, default=2, help='Years of subscriptions and vouchers')
+        parser.add_argument('--vouchers-per-day', type=int, default=5, help='Journal entries per day')
+        parser.add_argument('--survey-ratio', type=float, default=0.5, help='Share of households with a survey response')
+        parser.add_argument('--telegram-ratio', type=float, default=0.3, help='Share of households with a Telegram link')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (same seed and schema, same data)')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows per INSERT/COPY batch')
+        parser.add_argument('--no-copy', action='store_true', help='Use bulk_create instead of COPY everywhere')
+        parser.add_argument('--schemas', help='Comma-separated tenant schemas')
+        parser.add_argument('--all-tenants', action='store_true', help='Every tenant schema')
+
+    def handle(self, *args, **options):
+        public = get_public_schema_name()
+        if options['all_tenants']:
+            schemas = list(get_tenant_model().objects.exclude(schema_name=public).values_list('schema_name', flat=True))
+        elif options['schemas']:
+            schemas = [s.strip() for s in options['schemas'].split(',') if s.strip()]
+        else:
+            schemas = [connection.schema_name]
+        if public in schemas:
+            raise CommandError('Tenant data cannot be generated in the public schema; use --schemas or tenant_command')
+
+        for schema in schemas:
+            self.stdout.write(f"Generating data in '{schema}'...")
+            with schema_context(schema):
+                summary = TenantDataGenerator(
+                    households=options['households'],
+                    members_per_household=options['members_per_household'],
+                    years=options['years'],
+                    vouchers_per_day=options['vouchers_per_day'],
+                    survey_ratio=options['survey_ratio'],
+                    telegram_ratio=options['telegram_ratio'],
+                    seed=options['seed'],
+                    use_copy=not options['no_copy'],
+                    batch_size=options['batch_size'],
+                    log=self.stdout.write,
+                ).run()
+            self.stdout.write(self.style.SUCCESS(
+                f"{schema}: {summary['households']} households, {summary['members']} members, "
+                f"{summary['subscriptions']} subscriptions, {summary['receipts']} receipts, "
+                f"{summary['journal_entries']} vouchers ({summary['journal_items']} items), "
+                f"{summary['survey_responses']} survey responses, {summary['telegram_links']} Telegram links"
+            ))
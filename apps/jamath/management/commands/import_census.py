@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.jamath.importers import CensusImportError, import_census
+
+
+class Command(BaseCommand):
+    help = 'Import households and members from a CSV/XLSX census sheet (run per tenant via tenant_command)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to a .csv or .xlsx file')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only, do not save')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows per batch')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            with open(path, 'rb') as f:
+                summary = import_census(f, path, dry_run=options['dry_run'], chunk_size=options['chunk_size'])
+        except (OSError, CensusImportError) as e:
+            raise CommandError(str(e))
+
+        for error in summary['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['error']}")
+        prefix = 'Would import' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {summary['households_created']} household(s) and {summary['members_created']} member(s) "
+            f"from {summary['rows']} row(s); {summary['error_count']} error(s)"
+        ))
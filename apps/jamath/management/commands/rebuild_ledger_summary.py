@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.jamath import ledger_summary
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily ledger summary from journal items (run per tenant via tenant_command)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', help='First day to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='end', help='Last day to rebuild (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        days = ledger_summary.rebuild(options['start'], options['end'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt ledger summary for {days} day(s)'))
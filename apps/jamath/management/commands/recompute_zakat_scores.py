@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.jamath import zakat
+
+
+class Command(BaseCommand):
+    help = 'Rescore zakat eligibility for all households (run per tenant via tenant_command)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report changes without saving them')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Households per batch')
+
+    def handle(self, *args, **options):
+        summary = zakat.recompute_all(dry_run=options['dry_run'], batch_size=options['batch_size'])
+        prefix = 'Would update' if options['dry_run'] else 'Updated'
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {summary['score_changed']} of {summary['households']} household score(s): "
+            f"{summary['newly_eligible']} newly eligible, {summary['no_longer_eligible']} no longer eligible"
+        ))
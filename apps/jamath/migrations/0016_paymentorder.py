@@ -0,0 +1,93 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jamath", "0015_telegram_settings"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="membershipconfig",
+            name="razorpay_webhook_secret",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="Secret set on the Razorpay webhook",
+                max_length=100,
+            ),
+        ),
+        migrations.CreateModel(
+            name="PaymentOrder",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("provider", models.CharField(max_length=20)),
+                (
+                    "order_id",
+                    models.CharField(
+                        help_text="Gateway order ID", max_length=100, unique=True
+                    ),
+                ),
+                (
+                    "payment_id",
+                    models.CharField(
+                        blank=True,
+                        help_text="Gateway payment ID",
+                        max_length=100,
+                        null=True,
+                        unique=True,
+                    ),
+                ),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("currency", models.CharField(default="INR", max_length=5)),
+                ("donor_pan", models.CharField(blank=True, default="", max_length=15)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("CREATED", "Created"),
+                            ("PAID", "Paid"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="CREATED",
+                        max_length=20,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("paid_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "household",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="payment_orders",
+                        to="jamath.household",
+                    ),
+                ),
+                (
+                    "receipt",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="payment_order",
+                        to="jamath.receipt",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,121 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:36
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_summary(apps, schema_editor):
+    JournalItem = apps.get_model("jamath", "JournalItem")
+    LedgerDailySummary = apps.get_model("jamath", "LedgerDailySummary")
+    rows = (
+        JournalItem.objects.values(
+            "journal_entry__date",
+            "ledger_id",
+            "ledger__fund_type",
+            "journal_entry__voucher_type",
+        )
+        .annotate(
+            debit=Sum("debit_amount"), credit=Sum("credit_amount"), count=Count("id")
+        )
+        .order_by()
+    )
+    LedgerDailySummary.objects.bulk_create(
+        [
+            LedgerDailySummary(
+                date=row["journal_entry__date"],
+                ledger_id=row["ledger_id"],
+                fund_type=row["ledger__fund_type"] or "",
+                voucher_type=row["journal_entry__voucher_type"],
+                debit_total=row["debit"] or 0,
+                credit_total=row["credit"] or 0,
+                item_count=row["count"],
+            )
+            for row in rows.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jamath", "0016_paymentorder"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LedgerDailySummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "fund_type",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        help_text="Copied from the ledger",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "voucher_type",
+                    models.CharField(
+                        choices=[
+                            ("RECEIPT", "Receipt Voucher"),
+                            ("PAYMENT", "Payment Voucher"),
+                            ("JOURNAL", "Journal Entry"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "debit_total",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=14
+                    ),
+                ),
+                (
+                    "credit_total",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=14
+                    ),
+                ),
+                ("item_count", models.PositiveIntegerField(default=0)),
+                (
+                    "ledger",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_summaries",
+                        to="jamath.ledger",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["date"],
+                "indexes": [
+                    models.Index(
+                        fields=["date", "voucher_type"],
+                        name="ledgersummary_date_type_idx",
+                    ),
+                    models.Index(
+                        fields=["fund_type", "date"], name="ledgersummary_fund_date_idx"
+                    ),
+                    models.Index(
+                        fields=["ledger", "date"], name="ledgersummary_ledger_date_idx"
+                    ),
+                ],
+                "unique_together": {("date", "ledger", "voucher_type")},
+            },
+        ),
+        migrations.RunPython(backfill_summary, migrations.RunPython.noop),
+    ]
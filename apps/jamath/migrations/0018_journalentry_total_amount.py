@@ -0,0 +1,39 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:36
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_totals(apps, schema_editor):
+    JournalEntry = apps.get_model("jamath", "JournalEntry")
+    JournalItem = apps.get_model("jamath", "JournalItem")
+    debits = (
+        JournalItem.objects.filter(journal_entry=OuterRef("pk"))
+        .values("journal_entry")
+        .annotate(total=Sum("debit_amount"))
+        .values("total")
+    )
+    JournalEntry.objects.update(
+        total_amount=Coalesce(Subquery(debits), Decimal("0.00"))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jamath", "0017_ledgerdailysummary"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="journalentry",
+            name="total_amount",
+            field=models.DecimalField(
+                decimal_places=2, default=Decimal("0.00"), max_digits=14
+            ),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
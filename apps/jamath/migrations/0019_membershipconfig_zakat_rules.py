@@ -0,0 +1,22 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jamath", "0018_journalentry_total_amount"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="membershipconfig",
+            name="zakat_rules",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Overrides for the zakat eligibility scoring rules",
+            ),
+        ),
+    ]
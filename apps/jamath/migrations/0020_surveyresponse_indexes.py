@@ -0,0 +1,30 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:41
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jamath", "0019_membershipconfig_zakat_rules"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="surveyresponse",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["answers"],
+                name="surveyresp_answers_gin",
+                opclasses=["jsonb_path_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="surveyresponse",
+            index=models.Index(
+                fields=["survey", "id"], name="surveyresp_survey_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jamath", "0020_surveyresponse_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="household",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="survey",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="surveyresponse",
+            name="client_uuid",
+            field=models.UUIDField(
+                blank=True,
+                help_text="Set by offline clients for idempotent sync",
+                null=True,
+                unique=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="surveyresponse",
+            name="collected_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="When the auditor recorded it on the device",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:48
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jamath", "0022_duplicatecandidate"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CustomFieldDefinition",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "entity",
+                    models.CharField(
+                        choices=[("HOUSEHOLD", "Household"), ("MEMBER", "Member")],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "key",
+                    models.SlugField(
+                        help_text="Key in custom_data (lowercase letters, digits, underscores)",
+                        max_length=40,
+                    ),
+                ),
+                ("label", models.CharField(max_length=100)),
+                (
+                    "field_type",
+                    models.CharField(
+                        choices=[
+                            ("TEXT", "Text"),
+                            ("NUMBER", "Number"),
+                            ("BOOLEAN", "Yes/No"),
+                            ("DATE", "Date"),
+                            ("CHOICE", "Choice"),
+                        ],
+                        default="TEXT",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "choices",
+                    models.JSONField(
+                        blank=True,
+                        default=list,
+                        help_text="Allowed values for Choice fields",
+                    ),
+                ),
+                ("is_filterable", models.BooleanField(default=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ["entity", "key"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="household",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["custom_data"],
+                name="household_custom_data_gin",
+                opclasses=["jsonb_path_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="member",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["custom_data"],
+                name="member_custom_data_gin",
+                opclasses=["jsonb_path_ops"],
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="customfielddefinition",
+            unique_together={("entity", "key")},
+        ),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jamath", "0023_custom_fields"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="announcement",
+            index=models.Index(
+                fields=["is_active", "-published_at", "expires_at"],
+                name="announcement_live_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="journalentry",
+            index=models.Index(
+                fields=["voucher_type", "date"], name="journalentry_type_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="journalentry",
+            index=models.Index(
+                fields=["-date", "-created_at"], name="journalentry_listing_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="member",
+            index=models.Index(
+                fields=["household", "is_head_of_family"],
+                name="member_household_head_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="member",
+            index=models.Index(
+                condition=models.Q(("is_approved", False)),
+                fields=["household"],
+                name="member_pending_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="servicerequest",
+            index=models.Index(
+                fields=["status", "-created_at"], name="servicerequest_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="servicerequest",
+            index=models.Index(
+                fields=["household", "-created_at"], name="servicerequest_household_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="subscription",
+            index=models.Index(
+                fields=["household", "start_date", "end_date"],
+                name="subscription_hh_dates_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="subscription",
+            index=models.Index(
+                fields=["status", "end_date"], name="subscription_status_end_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="telegramlink",
+            index=models.Index(
+                condition=models.Q(("is_verified", True)),
+                fields=["phone_number"],
+                include=("chat_id",),
+                name="telegramlink_verified_idx",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="member",
+            name="household",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="members",
+                to="jamath.household",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="servicerequest",
+            name="household",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="service_requests",
+                to="jamath.household",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="subscription",
+            name="household",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="subscriptions",
+                to="jamath.household",
+            ),
+        ),
+    ]
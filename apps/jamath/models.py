@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
 from django.utils import timezone
 from decimal import Decimal
 
@@ -7,6 +8,18 @@ from decimal import Decimal
 # HOUSEHOLD & MEMBER MODELS
 # ============================================================================
 
+class HouseholdQuerySet(models.QuerySet):
+    def for_listing(self):
+        """Members, member count and membership status for a list, in a constant number of queries."""
+        today = timezone.now().date()
+        return self.prefetch_related('members').annotate(
+            member_total=models.Count('members', distinct=True),
+            membership_active=models.Exists(Subscription.objects.filter(
+                household=models.OuterRef('pk'), status='ACTIVE', end_date__gte=today,
+            )),
+        )
+
+
 class Household(models.Model):
     class EconomicStatus(models.TextChoices):
         ZAKAT_ELIGIBLE = 'ZAKAT_ELIGIBLE', 'Zakat Eligible'
@@ -29,6 +42,15 @@ class Household(models.Model):
     
     custom_data = models.JSONField(default=dict, blank=True, help_text="Ad-hoc fields like Village, Blood Group")
     created_at = models.DateTimeField(auto_now_add=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True, null=True, db_index=True)
+
+    objects = HouseholdQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Equality / IN filters on custom fields (custom_data @> {...})
+            GinIndex(fields=['custom_data'], name='household_custom_data_gin', opclasses=['jsonb_path_ops']),
+        ]
 
     def __str__(self):
         return f"Household {self.membership_id or self.id} - {self.economic_status}"
@@ -41,44 +63,63 @@ class Household(models.Model):
 
     def _generate_membership_id(self):
         """Generate a unique membership ID with configurable prefix."""
+        return Household.allocate_membership_ids(1)[0]
+
+    @staticmethod
+    def membership_id_prefix():
         try:
             config = MembershipConfig.objects.filter(is_active=True).first()
-            prefix = config.membership_id_prefix if config else 'JM-'
-        except:
-            prefix = 'JM-'
-        
-        # Find the highest existing number with this prefix
-        from django.db.models import Max
-        from django.db.models.functions import Cast, Replace, Substr
-        
-        # Get all IDs with this prefix and find max number
-        existing = Household.objects.filter(
-            membership_id__startswith=prefix
-        ).values_list('membership_id', flat=True)
-        
-        max_num = 0
-        for mid in existing:
-            try:
-                num_part = mid.replace(prefix, '')
-                num = int(num_part)
-                if num > max_num:
-                    max_num = num
-            except (ValueError, AttributeError):
-                continue
-        
-        # Generate new ID with zero-padding
-        new_num = max_num + 1
-        return f"{prefix}{new_num:03d}"
+            return config.membership_id_prefix if config else 'JM-'
+        except Exception:
+            return 'JM-'
+
+    @staticmethod
+    def allocate_membership_ids(count, prefix=None, taken=()):
+        """
+        Next `count` membership IDs after the highest existing number with
+        this prefix. The highest number is found in the database, so bulk
+        imports take a whole block with one query. `taken` are IDs about to
+        be saved alongside the block (e.g. explicit IDs in an import chunk).
+        """
+        import re
+        from django.db.models import IntegerField, Max
+        from django.db.models.functions import Cast, Substr
+
+        prefix = prefix if prefix is not None else Household.membership_id_prefix()
+        max_num = Household.objects.filter(
+            membership_id__regex=rf'^{re.escape(prefix)}[0-9]{{1,9}}$'
+        ).aggregate(
+            max_num=Max(Cast(Substr('membership_id', len(prefix) + 1), IntegerField()))
+        )['max_num'] or 0
+        pattern = re.compile(rf'{re.escape(prefix)}([0-9]{{1,9}})')
+        for membership_id in taken:
+            match = pattern.fullmatch(membership_id or '')
+            if match:
+                max_num = max(max_num, int(match.group(1)))
+
+        # Zero-padded to at least three digits
+        return [f"{prefix}{num:03d}" for num in range(max_num + 1, max_num + count + 1)]
 
     @property
     def member_count(self):
+        # Annotated by for_listing(); otherwise one query
+        if hasattr(self, 'member_total'):
+            return self.member_total
         return self.members.count()
 
     @property
     def is_membership_active(self):
         """Check if household has an active subscription."""
+        if hasattr(self, 'membership_active'):
+            return self.membership_active
         return self.subscriptions.filter(status='ACTIVE', end_date__gte=timezone.now().date()).exists()
 
+    def head_of_family(self):
+        """The head member, read from prefetched members when available."""
+        if 'members' in getattr(self, '_prefetched_objects_cache', {}):
+            return next((m for m in self.members.all() if m.is_head_of_family), None)
+        return self.members.filter(is_head_of_family=True).first()
+
 
 
 
@@ -102,7 +143,8 @@ class Member(models.Model):
         SIBLING = 'SIBLING', 'Sibling'
         OTHER = 'OTHER', 'Other'
     
-    household = models.ForeignKey(Household, related_name='members', on_delete=models.CASCADE)
+    household = models.ForeignKey(Household, related_name='members', on_delete=models.CASCADE,
+                                  db_index=False)  # Leads a composite index (Meta)
     full_name = models.CharField(max_length=200)
     is_head_of_family = models.BooleanField(default=False)
     relationship_to_head = models.CharField(max_length=20, choices=Relationship.choices, default=Relationship.SELF)
@@ -126,11 +168,80 @@ class Member(models.Model):
     is_alive = models.BooleanField(default=True)
     is_approved = models.BooleanField(default=True, help_text="False = Pending admin approval")
     custom_data = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['custom_data'], name='member_custom_data_gin', opclasses=['jsonb_path_ops']),
+            # Head lookups per household (lists, portal, receipts)
+            models.Index(fields=['household', 'is_head_of_family'], name='member_household_head_idx'),
+            # Pending approvals are few; index only those rows
+            models.Index(fields=['household'], condition=models.Q(is_approved=False), name='member_pending_idx'),
+        ]
     
     def __str__(self):
         return f"{self.full_name} ({'Head' if self.is_head_of_family else 'Member'})"
 
 
+class DuplicateCandidate(models.Model):
+    """
+    A pair of households that look like the same family, queued for review
+    (see dedupe.py). Merging deletes one household, and with it the pair.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pending Review'
+        DISMISSED = 'DISMISSED', 'Not a Duplicate'
+
+    # household_a always has the lower id
+    household_a = models.ForeignKey(Household, on_delete=models.CASCADE, related_name='+')
+    household_b = models.ForeignKey(Household, on_delete=models.CASCADE, related_name='+')
+    score = models.PositiveSmallIntegerField(help_text="Similarity 0-100")
+    reasons = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    reviewed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('household_a', 'household_b')
+        indexes = [models.Index(fields=['status', '-score'], name='dupcandidate_status_score_idx')]
+        ordering = ['-score']
+
+    def __str__(self):
+        return f"{self.household_a_id} ~ {self.household_b_id} ({self.score})"
+
+
+class CustomFieldDefinition(models.Model):
+    """
+    A tenant-defined key in Household/Member custom_data. Filterable fields
+    get an expression index and can be queried with ?cf.<key>= (see custom_fields.py).
+    """
+    class Entity(models.TextChoices):
+        HOUSEHOLD = 'HOUSEHOLD', 'Household'
+        MEMBER = 'MEMBER', 'Member'
+
+    class FieldType(models.TextChoices):
+        TEXT = 'TEXT', 'Text'
+        NUMBER = 'NUMBER', 'Number'
+        BOOLEAN = 'BOOLEAN', 'Yes/No'
+        DATE = 'DATE', 'Date'
+        CHOICE = 'CHOICE', 'Choice'
+
+    entity = models.CharField(max_length=20, choices=Entity.choices)
+    key = models.SlugField(max_length=40, help_text="Key in custom_data (lowercase letters, digits, underscores)")
+    label = models.CharField(max_length=100)
+    field_type = models.CharField(max_length=20, choices=FieldType.choices, default=FieldType.TEXT)
+    choices = models.JSONField(default=list, blank=True, help_text="Allowed values for Choice fields")
+    is_filterable = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('entity', 'key')
+        ordering = ['entity', 'key']
+
+    def __str__(self):
+        return f"{self.entity}.{self.key} ({self.field_type})"
+
+
 # ============================================================================
 # MEMBERSHIP & SUBSCRIPTION MODELS
 # ============================================================================
@@ -157,6 +268,7 @@ class MembershipConfig(models.Model):
     # Razorpay Keys
     razorpay_key_id = models.CharField(max_length=50, blank=True, default='')
     razorpay_key_secret = models.CharField(max_length=50, blank=True, default='')
+    razorpay_webhook_secret = models.CharField(max_length=100, blank=True, default='', help_text="Secret set on the Razorpay webhook")
     
     cashfree_app_id = models.CharField(max_length=100, blank=True, default='')
     cashfree_secret_key = models.CharField(max_length=100, blank=True, default='')
@@ -175,6 +287,9 @@ class MembershipConfig(models.Model):
     member_label = models.CharField(max_length=50, default='Afrad', help_text="Display label for members (e.g., Afrad, Members)")
     masjid_name = models.CharField(max_length=100, default='', blank=True, help_text="Display name for the masjid")
     
+    # Zakat scoring overrides (see apps.jamath.zakat.DEFAULT_ZAKAT_RULES)
+    zakat_rules = models.JSONField(default=dict, blank=True, help_text="Overrides for the zakat eligibility scoring rules")
+    
     # Telegram Notification Settings
     telegram_enabled = models.BooleanField(default=True, help_text="Enable Telegram notifications")
     telegram_auto_reminders = models.BooleanField(default=False, help_text="Automatically send payment reminders (via cron)")
@@ -201,7 +316,8 @@ class Subscription(models.Model):
         PENDING = 'PENDING', 'Pending (Partial Payment)'
         EXPIRED = 'EXPIRED', 'Expired'
 
-    household = models.ForeignKey(Household, related_name='subscriptions', on_delete=models.CASCADE)
+    household = models.ForeignKey(Household, related_name='subscriptions', on_delete=models.CASCADE,
+                                  db_index=False)  # Leads a composite index (Meta)
     start_date = models.DateField()
     end_date = models.DateField()
     amount_paid = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
@@ -209,6 +325,14 @@ class Subscription(models.Model):
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Current subscription of a household
+            models.Index(fields=['household', 'start_date', 'end_date'], name='subscription_hh_dates_idx'),
+            # Active / expired counts and reminder sweeps
+            models.Index(fields=['status', 'end_date'], name='subscription_status_end_idx'),
+        ]
+
     def __str__(self):
         return f"{self.household.membership_id} - {self.status} ({self.start_date} to {self.end_date})"
 
@@ -239,6 +363,36 @@ class Receipt(models.Model):
         return f"Receipt {self.receipt_number} - ₹{self.amount}"
 
 
+class PaymentOrder(models.Model):
+    """
+    An online payment started from the Member Portal.
+    The unique order_id/payment_id pair makes recording a gateway payment
+    idempotent across browser verification, webhooks and reconciliation.
+    """
+    class Status(models.TextChoices):
+        CREATED = 'CREATED', 'Created'
+        PAID = 'PAID', 'Paid'
+        FAILED = 'FAILED', 'Failed'
+
+    provider = models.CharField(max_length=20)
+    order_id = models.CharField(max_length=100, unique=True, help_text="Gateway order ID")
+    payment_id = models.CharField(max_length=100, unique=True, null=True, blank=True, help_text="Gateway payment ID")
+    household = models.ForeignKey(Household, related_name='payment_orders', on_delete=models.CASCADE)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = models.CharField(max_length=5, default='INR')
+    donor_pan = models.CharField(max_length=15, blank=True, default='')
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.CREATED)
+    receipt = models.OneToOneField(Receipt, on_delete=models.SET_NULL, null=True, blank=True, related_name='payment_order')
+    created_at = models.DateTimeField(auto_now_add=True)
+    paid_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.provider} {self.order_id} - {self.status}"
+
+
 # ============================================================================
 # COMMUNICATION & SERVICE MODELS
 # ============================================================================
@@ -259,6 +413,9 @@ class Announcement(models.Model):
 
     class Meta:
         ordering = ['-published_at']
+        indexes = [
+            models.Index(fields=['is_active', '-published_at', 'expires_at'], name='announcement_live_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -279,7 +436,8 @@ class ServiceRequest(models.Model):
         APPROVED = 'APPROVED', 'Approved'
         REJECTED = 'REJECTED', 'Rejected'
 
-    household = models.ForeignKey(Household, related_name='service_requests', on_delete=models.CASCADE)
+    household = models.ForeignKey(Household, related_name='service_requests', on_delete=models.CASCADE,
+                                  db_index=False)  # Leads a composite index (Meta)
     request_type = models.CharField(max_length=30, choices=RequestType.choices)
     description = models.TextField(null=True, blank=True, help_text="Detailed description of the request")
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
@@ -288,6 +446,12 @@ class ServiceRequest(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     handled_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', '-created_at'], name='servicerequest_status_idx'),
+            models.Index(fields=['household', '-created_at'], name='servicerequest_household_idx'),
+        ]
+
     def __str__(self):
         return f"{self.get_request_type_display()} - {self.household.membership_id}"
 
@@ -301,6 +465,7 @@ class Survey(models.Model):
     description = models.TextField(blank=True)
     schema = models.JSONField(default=list, help_text="Form Builder Schema")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, null=True)
     is_active = models.BooleanField(default=True)
 
     def __str__(self):
@@ -313,6 +478,16 @@ class SurveyResponse(models.Model):
     auditor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='audited_surveys')
     answers = models.JSONField(default=dict)
     submitted_at = models.DateTimeField(auto_now_add=True)
+    client_uuid = models.UUIDField(null=True, blank=True, unique=True, help_text="Set by offline clients for idempotent sync")
+    collected_at = models.DateTimeField(null=True, blank=True, help_text="When the auditor recorded it on the device")
+
+    class Meta:
+        indexes = [
+            # Containment filters (answers @> {...}) in survey analytics
+            GinIndex(fields=['answers'], name='surveyresp_answers_gin', opclasses=['jsonb_path_ops']),
+            # Incremental analytics refresh reads new rows per survey by id
+            models.Index(fields=['survey', 'id'], name='surveyresp_survey_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.survey.title} - {self.household.id}"
@@ -322,6 +497,15 @@ class SurveyResponse(models.Model):
 # MIZAN LEDGER - DOUBLE-ENTRY ACCOUNTING SYSTEM
 # ============================================================================
 
+class LedgerQuerySet(models.QuerySet):
+    def with_totals(self):
+        """Annotate debit/credit totals so `balance` needs no query per ledger."""
+        return self.annotate(
+            total_debit=models.Sum('journal_items__debit_amount'),
+            total_credit=models.Sum('journal_items__credit_amount'),
+        )
+
+
 class Ledger(models.Model):
     """Chart of Accounts - the foundation of the double-entry system."""
     class AccountType(models.TextChoices):
@@ -347,6 +531,8 @@ class Ledger(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = LedgerQuerySet.as_manager()
+
     class Meta:
         ordering = ['code']
         verbose_name = "Ledger Account"
@@ -359,10 +545,13 @@ class Ledger(models.Model):
     def balance(self):
         """Calculate current balance based on all journal items."""
         from django.db.models import Sum
-        items = self.journal_items.aggregate(
-            total_debit=Sum('debit_amount'),
-            total_credit=Sum('credit_amount')
-        )
+        if hasattr(self, 'total_debit'):
+            items = {'total_debit': self.total_debit, 'total_credit': self.total_credit}
+        else:
+            items = self.journal_items.aggregate(
+                total_debit=Sum('debit_amount'),
+                total_credit=Sum('credit_amount')
+            )
         debit = items['total_debit'] or Decimal('0.00')
         credit = items['total_credit'] or Decimal('0.00')
         
@@ -389,6 +578,14 @@ class Supplier(models.Model):
         return self.name
 
 
+class JournalEntryQuerySet(models.QuerySet):
+    def for_listing(self):
+        """Everything a voucher list renders, in a constant number of queries."""
+        return self.select_related('donor', 'supplier', 'created_by').prefetch_related(
+            models.Prefetch('items', queryset=JournalItem.objects.select_related('ledger'))
+        )
+
+
 class JournalEntry(models.Model):
     """Parent transaction record - Receipt, Payment, or Journal Voucher."""
     class VoucherType(models.TextChoices):
@@ -425,6 +622,9 @@ class JournalEntry(models.Model):
     # Payment Mode
     payment_mode = models.CharField(max_length=20, choices=PaymentMode.choices, default=PaymentMode.CASH)
 
+    # Sum of debit lines, stored so lists don't aggregate per row (see update_total)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+
     # Audit & Lock
     is_finalized = models.BooleanField(default=False, help_text="Locked entries cannot be modified")
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True,
@@ -432,19 +632,28 @@ class JournalEntry(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = JournalEntryQuerySet.as_manager()
+
     class Meta:
         ordering = ['-date', '-created_at']
+        indexes = [
+            # Day book, reports, Tally export and Basira summaries
+            models.Index(fields=['voucher_type', 'date'], name='journalentry_type_date_idx'),
+            # Default listing order
+            models.Index(fields=['-date', '-created_at'], name='journalentry_listing_idx'),
+        ]
         verbose_name = "Journal Entry"
         verbose_name_plural = "Journal Entries"
 
     def __str__(self):
         return f"{self.voucher_number} - {self.get_voucher_type_display()}"
 
-    @property
-    def total_amount(self):
-        """Total transaction amount (sum of debits or credits)."""
+    def update_total(self):
+        """Recompute the stored total (sum of debits) after posting line items."""
         from django.db.models import Sum
-        return self.items.aggregate(total=Sum('debit_amount'))['total'] or Decimal('0.00')
+        self.total_amount = self.items.aggregate(total=Sum('debit_amount'))['total'] or Decimal('0.00')
+        JournalEntry.objects.filter(pk=self.pk).update(total_amount=self.total_amount)
+        return self.total_amount
 
     def clean(self):
         """Validate double-entry balance and fund restrictions."""
@@ -541,6 +750,33 @@ class JournalItem(models.Model):
             raise ValidationError("Either debit or credit amount must be specified.")
 
 
+class LedgerDailySummary(models.Model):
+    """
+    Debit/credit totals per day, ledger and voucher type.
+    Maintained from JournalItem writes (see ledger_summary.py) so reports can
+    range-scan days instead of joining every journal item.
+    """
+    date = models.DateField()
+    ledger = models.ForeignKey(Ledger, on_delete=models.CASCADE, related_name='daily_summaries')
+    fund_type = models.CharField(max_length=20, blank=True, default='', help_text="Copied from the ledger")
+    voucher_type = models.CharField(max_length=20, choices=JournalEntry.VoucherType.choices)
+    debit_total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    credit_total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    item_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('date', 'ledger', 'voucher_type')
+        indexes = [
+            models.Index(fields=['date', 'voucher_type'], name='ledgersummary_date_type_idx'),
+            models.Index(fields=['fund_type', 'date'], name='ledgersummary_fund_date_idx'),
+            models.Index(fields=['ledger', 'date'], name='ledgersummary_ledger_date_idx'),
+        ]
+        ordering = ['date']
+
+    def __str__(self):
+        return f"{self.date} {self.ledger_id} {self.voucher_type}: Dr {self.debit_total} / Cr {self.credit_total}"
+
+
 # ============================================================================
 # RBAC & STAFF MANAGEMENT
 # ============================================================================
@@ -585,6 +821,11 @@ class TelegramLink(models.Model):
     class Meta:
         verbose_name = "Telegram Link"
         verbose_name_plural = "Telegram Links"
+        indexes = [
+            # Broadcast/reminder recipient lists read only verified links
+            models.Index(fields=['phone_number'], include=['chat_id'], condition=models.Q(is_verified=True),
+                         name='telegramlink_verified_idx'),
+        ]
 
     def __str__(self):
         return f"{self.phone_number} → {self.chat_id}"
@@ -0,0 +1,501 @@
+"""
+Payment gateway layer for the Member Portal.
+
+Each provider implements the same small interface (create_order,
+verify_payment, fetch_order, fetch_orders, parse_webhook). Clients are cached per tenant and reuse a
+keep-alive connection pool with explicit timeouts and bounded retries, so
+portal payments no longer open a fresh connection per request.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import threading
+import time
+import uuid
+from decimal import Decimal, InvalidOperation
+
+import requests
+from django.conf import settings
+from django.db import connection
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .models import MembershipConfig
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) seconds
+GATEWAY_TIMEOUT = (5, 15)
+
+CASHFREE_BASE_URLS = {
+    'sandbox': "https://sandbox.cashfree.com/pg",
+    'production': "https://api.cashfree.com/pg",
+}
+CASHFREE_API_VERSION = "2023-08-01"
+
+
+class PaymentGatewayError(Exception):
+    """Raised for configuration, signature or upstream gateway failures."""
+    pass
+
+
+def parse_amount(value) -> Decimal:
+    """Decimal amount from callback/webhook data; bad or missing values are gateway errors."""
+    try:
+        amount = Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        raise PaymentGatewayError(f'Invalid payment amount: {value!r}')
+    if not amount.is_finite():
+        raise PaymentGatewayError(f'Invalid payment amount: {value!r}')
+    return amount
+
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def record_gateway_call(provider: str, operation: str, seconds: float, ok: bool) -> None:
+    """Accumulate per-provider call latency and error counts."""
+    with _stats_lock:
+        entry = _stats.setdefault((provider, operation), {
+            'calls': 0, 'errors': 0, 'total_seconds': 0.0, 'max_seconds': 0.0
+        })
+        entry['calls'] += 1
+        entry['total_seconds'] += seconds
+        entry['max_seconds'] = max(entry['max_seconds'], seconds)
+        if not ok:
+            entry['errors'] += 1
+
+
+def get_gateway_stats() -> list:
+    """Snapshot of gateway call metrics for this process."""
+    with _stats_lock:
+        return [
+            {
+                'provider': provider,
+                'operation': operation,
+                'calls': entry['calls'],
+                'errors': entry['errors'],
+                'avg_ms': round(entry['total_seconds'] / entry['calls'] * 1000, 1) if entry['calls'] else 0,
+                'max_ms': round(entry['max_seconds'] * 1000, 1),
+            }
+            for (provider, operation), entry in sorted(_stats.items())
+        ]
+
+
+def build_session(retry_methods=frozenset({'GET'})) -> requests.Session:
+    """
+    A requests session with a keep-alive pool and bounded retries.
+    Connection errors are always retried; read errors and 429/5xx responses
+    only for `retry_methods` (i.e. requests that are safe to repeat).
+    """
+    retry = Retry(
+        total=3,
+        connect=2,
+        read=1,
+        status=2,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=retry_methods,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+# ============================================================================
+# PROVIDERS
+# ============================================================================
+
+class PaymentGateway:
+    """Provider interface. Amounts are Decimals in major currency units."""
+    provider = None
+    label = None
+
+    def create_order(self, amount: Decimal, currency: str, order_id: str, customer: dict, return_url: str = '') -> dict:
+        """Create an order and return the fields the portal frontend needs."""
+        raise NotImplementedError
+
+    def verify_payment(self, data: dict) -> dict:
+        """
+        Verify a completed payment from the portal's callback data.
+        Returns {'paid', 'status', 'order_id', 'payment_id', 'amount'}.
+        """
+        raise NotImplementedError
+
+    def fetch_order(self, order_id: str) -> dict:
+        """Fetch order status from the gateway (same shape as verify_payment)."""
+        raise NotImplementedError
+
+    def fetch_orders(self, order_ids: list, since=None) -> dict:
+        """
+        Fetch the status of several orders, keyed by order_id.
+        Providers with a list API override this to avoid one call per order;
+        orders that fail to fetch are left out.
+        """
+        results = {}
+        for order_id in order_ids:
+            try:
+                results[order_id] = self.fetch_order(order_id)
+            except PaymentGatewayError as e:
+                logger.warning(f"{self.label}: could not fetch order {order_id}: {e}")
+        return results
+
+    def parse_webhook(self, body: bytes, headers) -> dict:
+        """
+        Verify a webhook's signature against the raw body and return the
+        payment it reports (same shape as verify_payment), or None for
+        events that don't settle an order.
+        """
+        raise NotImplementedError
+
+    def _timed(self, operation, func, *args, **kwargs):
+        started = time.monotonic()
+        ok = False
+        try:
+            result = func(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            record_gateway_call(self.provider, operation, time.monotonic() - started, ok)
+
+
+class RazorpayGateway(PaymentGateway):
+    provider = MembershipConfig.GatewayProvider.RAZORPAY
+    label = 'Razorpay'
+
+    def __init__(self, key_id: str, key_secret: str, webhook_secret: str = ''):
+        import razorpay
+        self.key_id = key_id
+        self.webhook_secret = webhook_secret
+        # Razorpay has no idempotency keys: only retry when the request never reached them
+        self.client = razorpay.Client(session=build_session(), auth=(key_id, key_secret))
+
+    def create_order(self, amount, currency, order_id, customer, return_url=''):
+        try:
+            order = self._timed('create_order', self.client.order.create, {
+                'amount': int(amount * 100),
+                'currency': currency,
+                'receipt': order_id,
+                'payment_capture': '1',
+                'notes': {'customer_id': customer.get('id', '')},
+            }, timeout=GATEWAY_TIMEOUT)
+        except Exception as e:
+            raise PaymentGatewayError(str(e))
+
+        return {
+            'provider': 'RAZORPAY',
+            'order_id': order['id'],
+            'amount': order['amount'],
+            'currency': order['currency'],
+            'key_id': self.key_id
+        }
+
+    def verify_payment(self, data):
+        import razorpay
+        params = {
+            'razorpay_order_id': data.get('razorpay_order_id'),
+            'razorpay_payment_id': data.get('razorpay_payment_id'),
+            'razorpay_signature': data.get('razorpay_signature')
+        }
+        try:
+            self.client.utility.verify_payment_signature(params)
+        except razorpay.errors.SignatureVerificationError:
+            raise PaymentGatewayError('Invalid payment signature')
+
+        return {
+            'paid': True,
+            'status': 'PAID',
+            'order_id': params['razorpay_order_id'],
+            'payment_id': params['razorpay_payment_id'],
+            'amount': parse_amount(data.get('amount')),
+        }
+
+    def fetch_order(self, order_id):
+        try:
+            order = self._timed('fetch_order', self.client.order.fetch, order_id, timeout=GATEWAY_TIMEOUT)
+            payment_id = None
+            if order.get('status') == 'paid':
+                payments = self._timed('fetch_payments', self.client.order.payments, order_id, timeout=GATEWAY_TIMEOUT)
+                captured = [p for p in payments.get('items', []) if p.get('status') == 'captured']
+                payment_id = captured[0]['id'] if captured else None
+        except Exception as e:
+            raise PaymentGatewayError(str(e))
+
+        return {
+            'paid': order.get('status') == 'paid',
+            'status': (order.get('status') or '').upper(),
+            'order_id': order_id,
+            'payment_id': payment_id,
+            'amount': Decimal(order.get('amount_paid', 0)) / 100,
+        }
+
+    def fetch_orders(self, order_ids, since=None):
+        """Page through the order list once instead of fetching each order."""
+        if since is None:
+            return super().fetch_orders(order_ids)
+
+        wanted = set(order_ids)
+        results = {}
+        skip = 0
+        try:
+            while wanted:
+                page = self._timed('list_orders', self.client.order.all, {
+                    'from': int(since.timestamp()), 'count': 100, 'skip': skip
+                }, timeout=GATEWAY_TIMEOUT)
+                items = page.get('items', [])
+                for order in items:
+                    if order['id'] in wanted and order.get('status') != 'paid':
+                        wanted.discard(order['id'])
+                        results[order['id']] = {
+                            'paid': False,
+                            'status': (order.get('status') or '').upper(),
+                            'order_id': order['id'],
+                            'payment_id': None,
+                            'amount': Decimal(0),
+                        }
+                    elif order['id'] in wanted:
+                        # Paid orders still need their payment ID
+                        wanted.discard(order['id'])
+                        results[order['id']] = self.fetch_order(order['id'])
+                if len(items) < 100:
+                    break
+                skip += len(items)
+        except Exception as e:
+            logger.warning(f"Razorpay: order list failed, falling back to single fetches: {e}")
+            results.update(super().fetch_orders([o for o in order_ids if o not in results]))
+        return results
+
+    def parse_webhook(self, body, headers):
+        if not self.webhook_secret:
+            raise PaymentGatewayError('Razorpay webhook secret not configured')
+        expected = hmac.new(self.webhook_secret.encode(), body, hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(expected, headers.get('X-Razorpay-Signature', '')):
+            raise PaymentGatewayError('Invalid webhook signature')
+
+        event = json.loads(body)
+        if event.get('event') not in ('payment.captured', 'order.paid', 'payment.failed'):
+            return None
+        payment = event.get('payload', {}).get('payment', {}).get('entity', {})
+        if not payment.get('order_id'):
+            return None
+        return {
+            'paid': payment.get('status') == 'captured',
+            'status': (payment.get('status') or '').upper(),
+            'order_id': payment['order_id'],
+            'payment_id': payment.get('id'),
+            'amount': Decimal(payment.get('amount', 0)) / 100,
+        }
+
+
+class CashfreeGateway(PaymentGateway):
+    provider = MembershipConfig.GatewayProvider.CASHFREE
+    label = 'Cashfree'
+
+    def __init__(self, app_id: str, secret_key: str, environment: str = 'sandbox'):
+        self.environment = environment if environment in CASHFREE_BASE_URLS else 'sandbox'
+        self.secret_key = secret_key
+        self.base_url = CASHFREE_BASE_URLS[self.environment]
+        # Cashfree honours x-idempotency-key, so order creation is safe to retry
+        self.session = build_session(retry_methods=frozenset({'GET', 'POST'}))
+        self.session.headers.update({
+            "x-client-id": app_id,
+            "x-client-secret": secret_key,
+            "x-api-version": CASHFREE_API_VERSION,
+        })
+
+    def create_order(self, amount, currency, order_id, customer, return_url=''):
+        payload = {
+            "order_id": order_id,
+            "order_amount": float(amount),
+            "order_currency": currency,
+            "customer_details": {
+                "customer_id": customer.get('id'),
+                "customer_phone": customer.get('phone'),
+                "customer_name": customer.get('name')
+            },
+            "order_meta": {
+                "return_url": return_url
+            }
+        }
+        try:
+            resp = self._timed(
+                'create_order', self.session.post, f"{self.base_url}/orders",
+                json=payload, headers={"x-idempotency-key": order_id}, timeout=GATEWAY_TIMEOUT
+            )
+        except requests.RequestException as e:
+            raise PaymentGatewayError(str(e))
+        if resp.status_code != 200:
+            raise PaymentGatewayError(f"Cashfree Error: {resp.text}")
+
+        data = resp.json()
+        return {
+            'provider': 'CASHFREE',
+            'payment_session_id': data['payment_session_id'],
+            'order_id': data['order_id'],
+            'env': self.environment.upper()
+        }
+
+    def verify_payment(self, data):
+        order_id = data.get('order_id')
+        if not order_id:
+            raise PaymentGatewayError('Order ID missing')
+        return self.fetch_order(order_id)
+
+    def fetch_order(self, order_id):
+        try:
+            resp = self._timed('fetch_order', self.session.get, f"{self.base_url}/orders/{order_id}", timeout=GATEWAY_TIMEOUT)
+        except requests.RequestException as e:
+            raise PaymentGatewayError(str(e))
+        if resp.status_code != 200:
+            raise PaymentGatewayError("Failed to verify with Cashfree")
+
+        order = resp.json()
+        return {
+            'paid': order.get('order_status') == 'PAID',
+            'status': order.get('order_status'),
+            'order_id': order_id,
+            'payment_id': order.get('cf_order_id') and str(order.get('cf_order_id')),
+            'amount': parse_amount(order.get('order_amount')),
+        }
+
+    def parse_webhook(self, body, headers):
+        # Cashfree signs timestamp + raw body with the client secret
+        timestamp = headers.get('x-webhook-timestamp', '')
+        digest = hmac.new(self.secret_key.encode(), timestamp.encode() + body, hashlib.sha256).digest()
+        expected = base64.b64encode(digest).decode()
+        if not timestamp or not hmac.compare_digest(expected, headers.get('x-webhook-signature', '')):
+            raise PaymentGatewayError('Invalid webhook signature')
+
+        event = json.loads(body)
+        data = event.get('data', {})
+        order = data.get('order', {})
+        payment = data.get('payment', {})
+        if not order.get('order_id') or not payment:
+            return None
+        return {
+            'paid': payment.get('payment_status') == 'SUCCESS',
+            'status': payment.get('payment_status'),
+            'order_id': order['order_id'],
+            'payment_id': payment.get('cf_payment_id') and str(payment.get('cf_payment_id')),
+            'amount': parse_amount(payment.get('payment_amount', order.get('order_amount', 0))),
+        }
+
+
+class FakeGateway(PaymentGateway):
+    """
+    In-process gateway for tests and benchmarks (PAYMENT_GATEWAY_OVERRIDE=fake).
+    Every order is paid unless the callback data says otherwise.
+    """
+    provider = 'FAKE'
+    label = 'Fake'
+
+    def __init__(self):
+        self.orders = {}
+
+    def create_order(self, amount, currency, order_id, customer, return_url=''):
+        self.orders[order_id] = {'amount': Decimal(amount), 'status': 'PAID'}
+        return {
+            'provider': 'FAKE',
+            'order_id': order_id,
+            'amount': int(amount * 100),
+            'currency': currency,
+        }
+
+    def verify_payment(self, data):
+        order_id = data.get('order_id')
+        if not order_id:
+            raise PaymentGatewayError('Order ID missing')
+        status = data.get('status', 'PAID')
+        order = self.orders.get(order_id, {})
+        return {
+            'paid': status == 'PAID',
+            'status': status,
+            'order_id': order_id,
+            'payment_id': data.get('payment_id') or f"fake_pay_{order_id}",
+            'amount': parse_amount(data.get('amount', order.get('amount', 0))),
+        }
+
+    def fetch_order(self, order_id):
+        order = self.orders.get(order_id)
+        if not order:
+            raise PaymentGatewayError('Order not found')
+        return {
+            'paid': order['status'] == 'PAID',
+            'status': order['status'],
+            'order_id': order_id,
+            'payment_id': f"fake_pay_{order_id}",
+            'amount': order['amount'],
+        }
+
+    def parse_webhook(self, body, headers):
+        event = json.loads(body)
+        if not event.get('order_id'):
+            return None
+        return self.verify_payment(event)
+
+
+# ============================================================================
+# PER-TENANT CLIENT CACHE
+# ============================================================================
+
+_gateways_lock = threading.Lock()
+_gateways = {}
+
+
+def _credentials_fingerprint(*values) -> str:
+    return hashlib.sha256('|'.join(values).encode()).hexdigest()[:16]
+
+
+def get_gateway(config: MembershipConfig) -> PaymentGateway:
+    """
+    Return the cached gateway client for the current tenant's config.
+    A new client (and connection pool) is only built when the tenant's
+    provider or credentials change.
+    """
+    override = getattr(settings, 'PAYMENT_GATEWAY_OVERRIDE', '')
+    provider = 'FAKE' if override == 'fake' else config.payment_gateway_provider
+
+    if provider == MembershipConfig.GatewayProvider.RAZORPAY:
+        if not config.razorpay_key_id:
+            raise PaymentGatewayError('Razorpay not configured')
+        fingerprint = _credentials_fingerprint(
+            config.razorpay_key_id, config.razorpay_key_secret, config.razorpay_webhook_secret
+        )
+        factory = lambda: RazorpayGateway(
+            config.razorpay_key_id, config.razorpay_key_secret, config.razorpay_webhook_secret
+        )
+    elif provider == MembershipConfig.GatewayProvider.CASHFREE:
+        if not config.cashfree_app_id:
+            raise PaymentGatewayError('Cashfree not configured')
+        environment = getattr(settings, 'CASHFREE_ENVIRONMENT', 'sandbox')
+        fingerprint = _credentials_fingerprint(config.cashfree_app_id, config.cashfree_secret_key, environment)
+        factory = lambda: CashfreeGateway(config.cashfree_app_id, config.cashfree_secret_key, environment)
+    elif provider == 'FAKE':
+        fingerprint = 'fake'
+        factory = FakeGateway
+    else:
+        raise PaymentGatewayError('Online payments are currently disabled.')
+
+    key = (connection.schema_name, provider)
+    with _gateways_lock:
+        cached = _gateways.get(key)
+        if cached is None or cached[0] != fingerprint:
+            cached = (fingerprint, factory())
+            _gateways[key] = cached
+        return cached[1]
+
+
+def new_order_id() -> str:
+    """Client-generated order reference, also used as the idempotency key."""
+    return f"order_{uuid.uuid4().hex[:10]}"
@@ -2,17 +2,34 @@
 from rest_framework import serializers
 
 from .models import Survey, SurveyResponse, StaffRole, StaffMember
+from .survey_schema import SchemaError, compile_schema, get_validator
 
 class SurveySerializer(serializers.ModelSerializer):
     class Meta:
         model = Survey
         fields = '__all__'
 
+    def validate_schema(self, value):
+        try:
+            compile_schema(value)
+        except SchemaError as e:
+            raise serializers.ValidationError(str(e))
+        return value
+
 class SurveyResponseSerializer(serializers.ModelSerializer):
     class Meta:
         model = SurveyResponse
         fields = '__all__'
 
+    def validate(self, attrs):
+        survey = attrs.get('survey') or getattr(self.instance, 'survey', None)
+        if survey is not None and ('answers' in attrs or self.instance is None):
+            answers, errors = get_validator(survey).validate(attrs.get('answers', {}))
+            if errors:
+                raise serializers.ValidationError({'answers': errors})
+            attrs['answers'] = answers
+        return attrs
+
 # ============================================================================
 # RBAC SERIALIZERS
 # ============================================================================
@@ -5,13 +5,16 @@ from django.db import transaction
 from decimal import Decimal
 from datetime import timedelta
 from typing import Dict, Any, Optional
+import logging
 import uuid
 
 from .models import (
     Household, Member, SurveyResponse, 
-    MembershipConfig, Subscription, Receipt, ServiceRequest
+    MembershipConfig, Subscription, Receipt, ServiceRequest, PaymentOrder
 )
 
+logger = logging.getLogger(__name__)
+
 
 class JamathService:
     """Legacy service for Zakat eligibility calculation."""
@@ -19,25 +22,12 @@ class JamathService:
     @staticmethod
     def calculate_zakat_eligibility(household: Household) -> None:
         """
-        Calculates zakat score based on custom data and updates economic status.
+        Calculates zakat score based on custom data and member details and
+        updates economic status, using the tenant's zakat rules.
         """
-        score = 0
-        data = household.custom_data or {}
-        
-        if data.get('income', 0) < 5000:
-            score += 50
-        if data.get('has_critical_illness', False):
-            score += 30
-        if data.get('widow', False):
-            score += 20
-            
-        household.zakat_score = score
-        
-        if score >= 80:
-            household.economic_status = Household.EconomicStatus.ZAKAT_ELIGIBLE
-        else:
-            household.economic_status = Household.EconomicStatus.AAM
-            
+        from .zakat import score_household
+
+        score_household(household)
         household.save()
 
     @staticmethod
@@ -232,6 +222,7 @@ class MembershipService:
                 )
              
             # 4. Validate and Save (Triggers constraints)
+            je.update_total()
             je.clean() 
             je.save()
             
@@ -242,7 +233,7 @@ class MembershipService:
             # But we must ensure Ledger creation acts don't fail on unique constraints if race condition?
             # get_or_create is better but code must be unique.
             # For now, simplistic approach is fine for single-threaded user testing.
-            print(f"Baitul Maal Integration Error: {e}")
+            logger.exception(f"Baitul Maal Integration Error: {e}")
             raise e # Fail the transaction so we notice bugs immediately
     
     @staticmethod
@@ -270,6 +261,51 @@ class MembershipService:
         }
 
 
+class PaymentService:
+    """Records online gateway payments exactly once."""
+
+    @staticmethod
+    def record_gateway_payment(order_id: str, payment_id: Optional[str] = None, label: str = '') -> Optional[Receipt]:
+        """
+        Mark a PaymentOrder as paid and generate its receipt.
+
+        Safe to call from the portal callback, the webhook consumer and the
+        reconciliation sweep at the same time: the order row is locked, an
+        already-paid order returns its existing receipt, and the amount is
+        always the one stored when the order was created.
+        Returns None if the order is unknown.
+        """
+        with transaction.atomic():
+            order = PaymentOrder.objects.select_for_update().select_related('household').filter(
+                order_id=order_id
+            ).first()
+            if order is None:
+                return None
+            if order.status == PaymentOrder.Status.PAID:
+                return order.receipt
+
+            reference = payment_id or order_id
+            receipt = MembershipService.process_payment(
+                order.household,
+                order.amount,
+                notes=f"{label or order.provider.title()}: {reference}",
+                donor_pan=order.donor_pan or None
+            )
+            order.status = PaymentOrder.Status.PAID
+            order.payment_id = payment_id
+            order.receipt = receipt
+            order.paid_at = timezone.now()
+            order.save(update_fields=['status', 'payment_id', 'receipt', 'paid_at'])
+            return receipt
+
+    @staticmethod
+    def mark_failed(order_id: str) -> None:
+        """Mark an unpaid order as failed (never downgrades a paid order)."""
+        PaymentOrder.objects.filter(
+            order_id=order_id, status=PaymentOrder.Status.CREATED
+        ).update(status=PaymentOrder.Status.FAILED)
+
+
 class ProfileService:
     """Handles member profile updates with approval workflow."""
     
@@ -319,10 +355,10 @@ class NotificationService:
         Send receipt notification to the household.
         Currently just logs to console (mock implementation).
         """
-        print(f"[MOCK SMS] To: {phone_number}")
-        print(f"  Receipt: {receipt.receipt_number}")
-        print(f"  Amount: ₹{receipt.amount}")
-        print(f"  Membership: ₹{receipt.membership_portion}, Donation: ₹{receipt.donation_portion}")
+        logger.info(
+            f"[MOCK SMS] To: {phone_number} Receipt: {receipt.receipt_number} Amount: ₹{receipt.amount} "
+            f"(Membership: ₹{receipt.membership_portion}, Donation: ₹{receipt.donation_portion})"
+        )
         return True
     
     @staticmethod
@@ -331,6 +367,7 @@ class NotificationService:
         Send OTP for login verification.
         Currently just logs to console (mock implementation).
         """
-        print(f"[MOCK SMS] To: {phone_number}")
-        print(f"  Your OTP for DigitalJamath is: {otp}")
+        # Live codes stay out of production logs; DEBUG is for local development
+        logger.info(f"[MOCK SMS] OTP sent to ******{phone_number[-4:]}")
+        logger.debug(f"[MOCK SMS] To: {phone_number} Your OTP for DigitalJamath is: {otp}")
         return True
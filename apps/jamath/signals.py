@@ -0,0 +1,78 @@
+"""Cache invalidation and derived-table maintenance for tenant data."""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import ledger_summary
+from . import custom_fields
+from .models import (
+    Household, Member, JournalEntry, JournalItem, Ledger, LedgerDailySummary, SurveyResponse,
+    CustomFieldDefinition,
+)
+from .stats import invalidate_census_stats
+from .survey_analytics import invalidate_survey_analytics
+
+
+@receiver([post_save, post_delete], sender=Household)
+@receiver([post_save, post_delete], sender=Member)
+def census_changed(sender, **kwargs):
+    # After commit, so a concurrent reader can't re-cache the old numbers
+    transaction.on_commit(invalidate_census_stats)
+
+
+@receiver(pre_save, sender=JournalEntry)
+def remember_entry_date(sender, instance, **kwargs):
+    # Moving a voucher to another day changes both days' totals
+    instance._previous_date = None
+    if instance.pk:
+        instance._previous_date = (
+            JournalEntry.objects.filter(pk=instance.pk).values_list('date', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=JournalEntry)
+@receiver(post_delete, sender=JournalEntry)
+def journal_entry_changed(sender, instance, **kwargs):
+    ledger_summary.mark_dirty(instance.date, getattr(instance, '_previous_date', None))
+
+
+@receiver([post_save, post_delete], sender=JournalItem)
+def journal_item_changed(sender, instance, **kwargs):
+    try:
+        entry_date = instance.journal_entry.date
+    except JournalEntry.DoesNotExist:
+        return  # Cascading from a deleted entry, handled above
+    ledger_summary.mark_dirty(entry_date)
+
+
+@receiver(post_save, sender=Ledger)
+def ledger_changed(sender, instance, created, **kwargs):
+    if not created:
+        LedgerDailySummary.objects.filter(ledger=instance).exclude(
+            fund_type=instance.fund_type or ''
+        ).update(fund_type=instance.fund_type or '')
+
+
+@receiver(post_save, sender=SurveyResponse)
+@receiver(post_delete, sender=SurveyResponse)
+def survey_response_changed(sender, instance, created=False, **kwargs):
+    # New responses are folded into the cached analytics incrementally
+    if not created:
+        survey_id = instance.survey_id
+        transaction.on_commit(lambda: invalidate_survey_analytics(survey_id))
+
+
+@receiver(post_save, sender=CustomFieldDefinition)
+def custom_field_saved(sender, instance, **kwargs):
+    custom_fields.invalidate_definitions(instance.entity)
+
+    def sync():
+        custom_fields.coerce_existing(instance)
+        custom_fields.ensure_index(instance)
+    transaction.on_commit(sync)
+
+
+@receiver(post_delete, sender=CustomFieldDefinition)
+def custom_field_deleted(sender, instance, **kwargs):
+    custom_fields.invalidate_definitions(instance.entity)
+    transaction.on_commit(lambda: custom_fields.drop_index(instance.entity, instance.key))
@@ -0,0 +1,100 @@
+"""
+Census statistics engine.
+
+All household and member aggregates are computed with one conditional
+aggregation query per table and cached per tenant. The cache is dropped
+whenever a Household or Member is written (see signals.py).
+"""
+from dateutil.relativedelta import relativedelta
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from apps.shared.tenant_cache import tenant_cache_key
+
+from .models import Household, Member
+
+# Safety net for writes that bypass signals (queryset.update, raw SQL)
+CENSUS_STATS_TIMEOUT = 600
+
+ADULT_AGE = 18
+SENIOR_AGE = 60
+
+
+def born_before(today, years: int):
+    """Latest date of birth for someone who is at least `years` old today."""
+    return today - relativedelta(years=years)
+
+
+def compute_household_stats() -> dict:
+    row = Household.objects.aggregate(
+        total=Count('id'),
+        zakat_eligible=Count('id', filter=Q(economic_status=Household.EconomicStatus.ZAKAT_ELIGIBLE)),
+        verified=Count('id', filter=Q(is_verified=True)),
+    )
+    return {
+        "total_households": row['total'],
+        "zakat_eligible": row['zakat_eligible'],
+        "sahib_e_nisab": row['total'] - row['zakat_eligible'],
+        "verified": row['verified'],
+        "unverified": row['total'] - row['verified'],
+    }
+
+
+def compute_member_stats(today=None) -> dict:
+    """
+    Member aggregates for living members. Age bands use calendar years from
+    `dob` (leap days included); members without a dob are counted separately.
+    """
+    today = today or timezone.localdate()
+    adult_dob = born_before(today, ADULT_AGE)
+    senior_dob = born_before(today, SENIOR_AGE)
+
+    row = Member.objects.filter(is_alive=True).aggregate(
+        total=Count('id'),
+        male=Count('id', filter=Q(gender=Member.Gender.MALE)),
+        female=Count('id', filter=Q(gender=Member.Gender.FEMALE)),
+        employed=Count('id', filter=Q(is_employed=True)),
+        children=Count('id', filter=Q(dob__gt=adult_dob)),
+        adults=Count('id', filter=Q(dob__lte=adult_dob, dob__gt=senior_dob)),
+        seniors=Count('id', filter=Q(dob__lte=senior_dob)),
+        age_unknown=Count('id', filter=Q(dob__isnull=True)),
+        married=Count('id', filter=Q(marital_status=Member.MaritalStatus.MARRIED)),
+        widowed=Count('id', filter=Q(marital_status=Member.MaritalStatus.WIDOWED)),
+    )
+    return {
+        "total_members": row['total'],
+        "male": row['male'],
+        "female": row['female'],
+        "employed": row['employed'],
+        "unemployed": row['total'] - row['employed'],
+        "children_under_18": row['children'],
+        "adults_18_60": row['adults'],
+        "seniors_above_60": row['seniors'],
+        "age_unknown": row['age_unknown'],
+        "married": row['married'],
+        "widowed": row['widowed'],
+    }
+
+
+def _census_cache_key(today):
+    # Age bands move with the calendar, so the key rolls over daily
+    return tenant_cache_key('census_stats', today.isoformat())
+
+
+def get_census_stats() -> dict:
+    """Cached household and member statistics for the current tenant."""
+    today = timezone.localdate()
+    key = _census_cache_key(today)
+    stats = cache.get(key)
+    if stats is None:
+        stats = {
+            'households': compute_household_stats(),
+            'members': compute_member_stats(today),
+        }
+        cache.set(key, stats, CENSUS_STATS_TIMEOUT)
+    return stats
+
+
+def invalidate_census_stats() -> None:
+    cache.delete(_census_cache_key(timezone.localdate()))
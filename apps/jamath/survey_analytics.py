@@ -0,0 +1,278 @@
+"""
+Survey analytics computed in the database.
+
+Answers are read with JSONB key extraction (answers->>'q1') and grouped or
+aggregated in Postgres, so summarizing a census survey never loads the
+responses into Python. The unfiltered summary is cached per survey as
+mergeable partial aggregates (counts, sums, min/max). New responses are
+folded in incrementally by id. Edits and deletes drop the cache. A full
+rebuild happens at least every FULL_REFRESH_SECONDS in case a response
+commits after a higher id was already folded in.
+"""
+import hashlib
+import json
+import math
+import time
+
+from django.core.cache import cache
+from django.db.models import Case, Count, F, FloatField, Max, Min, Q, Sum, When
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast
+
+from apps.shared.tenant_cache import tenant_cache_key
+
+from .models import SurveyResponse
+
+CACHE_TTL = 60 * 60 * 24
+FULL_REFRESH_SECONDS = 60 * 60
+
+CATEGORICAL = ('select', 'boolean')
+NUMERIC_RE = r'^\s*-?[0-9]+(\.[0-9]+)?\s*$'
+TRUE_VALUES = ('true', 'yes', '1', 'y')
+
+
+class AnalyticsError(ValueError):
+    pass
+
+
+def question_specs(survey) -> list:
+    """Normalize Survey.schema ([{id, label, type, options}]) for analytics."""
+    specs = []
+    for item in survey.schema or []:
+        if not isinstance(item, dict) or not item.get('id'):
+            continue
+        options = item.get('options') or []
+        if isinstance(options, str):
+            options = [o.strip() for o in options.split(',') if o.strip()]
+        specs.append({
+            'id': str(item['id']),
+            'label': item.get('label') or str(item['id']),
+            'type': item.get('type') or 'text',
+            'options': [str(o) for o in options],
+        })
+    return specs
+
+
+def _schema_hash(specs) -> str:
+    return hashlib.md5(json.dumps(specs, sort_keys=True).encode()).hexdigest()
+
+
+def _cache_key(survey_id):
+    return tenant_cache_key('survey_analytics', survey_id)
+
+
+def invalidate_survey_analytics(survey_id) -> None:
+    cache.delete(_cache_key(survey_id))
+
+
+def _answer_filter(specs, filters: dict) -> Q:
+    """answers @> {...} conditions (served by the GIN index)."""
+    by_id = {spec['id']: spec for spec in specs}
+    condition = Q()
+    for qid, value in filters.items():
+        spec = by_id.get(qid)
+        if spec is None:
+            raise AnalyticsError(f"Unknown question '{qid}'")
+        if spec['type'] == 'boolean':
+            flag = str(value).lower() in TRUE_VALUES
+            # Clients store booleans either as JSON booleans or strings
+            condition &= Q(answers__contains={qid: flag}) | Q(answers__contains={qid: str(flag).lower()})
+        else:
+            condition &= Q(answers__contains={qid: value})
+    return condition
+
+
+def _normalize_value(spec, value: str) -> str:
+    if spec['type'] == 'boolean':
+        return 'true' if value.strip().lower() in TRUE_VALUES else 'false'
+    return value
+
+
+# ============================================================================
+# PARTIAL AGGREGATES
+# ============================================================================
+
+def _empty_state(specs) -> dict:
+    questions = {}
+    for spec in specs:
+        entry = {'answered': 0}
+        if spec['type'] == 'number':
+            entry.update({'n': 0, 'sum': 0.0, 'sumsq': 0.0, 'min': None, 'max': None})
+        elif spec['type'] in CATEGORICAL:
+            entry['counts'] = {}
+        questions[spec['id']] = entry
+    return {'responses': 0, 'last_id': 0, 'questions': questions}
+
+
+def _aggregate(queryset, specs) -> dict:
+    """Partial aggregates for a queryset of responses: 1 + (categorical questions) queries."""
+    state = _empty_state(specs)
+    annotations, aggregates = {}, {'_count': Count('id'), '_max_id': Max('id')}
+
+    for i, spec in enumerate(specs):
+        text = f'_a{i}'
+        annotations[text] = KeyTextTransform(spec['id'], 'answers')
+        aggregates[f'answered_{i}'] = Count('id', filter=Q(**{f'{text}__isnull': False}) & ~Q(**{text: ''}))
+        if spec['type'] == 'number':
+            number = f'_n{i}'
+            annotations[number] = Case(
+                When(**{f'{text}__regex': NUMERIC_RE}, then=Cast(F(text), FloatField())),
+                output_field=FloatField(),
+            )
+            aggregates.update({
+                f'n_{i}': Count(number),
+                f'sum_{i}': Sum(number),
+                f'sumsq_{i}': Sum(F(number) * F(number)),
+                f'min_{i}': Min(number),
+                f'max_{i}': Max(number),
+            })
+
+    totals = queryset.annotate(**annotations).aggregate(**aggregates)
+    state['responses'] = totals['_count']
+    state['last_id'] = totals['_max_id'] or 0
+    if not state['responses']:
+        return state
+
+    for i, spec in enumerate(specs):
+        entry = state['questions'][spec['id']]
+        entry['answered'] = totals[f'answered_{i}']
+        if spec['type'] == 'number':
+            entry.update({
+                'n': totals[f'n_{i}'],
+                'sum': totals[f'sum_{i}'] or 0.0,
+                'sumsq': totals[f'sumsq_{i}'] or 0.0,
+                'min': totals[f'min_{i}'],
+                'max': totals[f'max_{i}'],
+            })
+        elif spec['type'] in CATEGORICAL:
+            rows = queryset.annotate(value=KeyTextTransform(spec['id'], 'answers')).exclude(
+                value__isnull=True
+            ).exclude(value='').values('value').annotate(n=Count('id')).order_by()
+            counts = entry['counts']
+            for row in rows:
+                key = _normalize_value(spec, row['value'])
+                counts[key] = counts.get(key, 0) + row['n']
+    return state
+
+
+def merge_states(base: dict, delta: dict) -> dict:
+    """Fold the aggregates of newer responses into a cached state."""
+    base['responses'] += delta['responses']
+    base['last_id'] = max(base['last_id'], delta['last_id'])
+    for qid, new in delta['questions'].items():
+        entry = base['questions'].setdefault(qid, new)
+        if entry is new:
+            continue
+        entry['answered'] += new['answered']
+        if 'n' in new:
+            entry['n'] += new['n']
+            entry['sum'] += new['sum']
+            entry['sumsq'] += new['sumsq']
+            mins = [v for v in (entry['min'], new['min']) if v is not None]
+            maxs = [v for v in (entry['max'], new['max']) if v is not None]
+            entry['min'] = min(mins) if mins else None
+            entry['max'] = max(maxs) if maxs else None
+        if 'counts' in new:
+            for value, n in new['counts'].items():
+                entry['counts'][value] = entry['counts'].get(value, 0) + n
+    return base
+
+
+def render(state: dict, specs) -> dict:
+    """Turn partial aggregates into the API payload."""
+    questions = []
+    for spec in specs:
+        entry = state['questions'].get(spec['id'], {'answered': 0})
+        result = {
+            'id': spec['id'],
+            'label': spec['label'],
+            'type': spec['type'],
+            'answered': entry['answered'],
+        }
+        if 'n' in entry:
+            n = entry['n']
+            mean = entry['sum'] / n if n else None
+            variance = max(entry['sumsq'] / n - mean * mean, 0.0) if n else None
+            result.update({
+                'count': n,
+                'mean': round(mean, 2) if mean is not None else None,
+                'stddev': round(math.sqrt(variance), 2) if variance is not None else None,
+                'min': entry['min'],
+                'max': entry['max'],
+            })
+        elif 'counts' in entry:
+            counts = dict(entry['counts'])
+            answered = sum(counts.values())
+            # Defined options first (in schema order), then anything else by count
+            order = spec['options'] or (['true', 'false'] if spec['type'] == 'boolean' else [])
+            values = order + sorted((v for v in counts if v not in order), key=lambda v: -counts[v])
+            result['distribution'] = [
+                {
+                    'value': value,
+                    'count': counts.get(value, 0),
+                    'percent': round(counts.get(value, 0) * 100 / answered, 1) if answered else 0,
+                }
+                for value in values
+            ]
+        questions.append(result)
+    return {'responses': state['responses'], 'questions': questions}
+
+
+# ============================================================================
+# ENTRY POINTS
+# ============================================================================
+
+def get_survey_analytics(survey, filters: dict = None) -> dict:
+    """
+    Per-question distributions (select/boolean), numeric stats (number)
+    and answer counts (text). Filtered requests are computed directly.
+    """
+    specs = question_specs(survey)
+    responses = SurveyResponse.objects.filter(survey=survey)
+
+    if filters:
+        state = _aggregate(responses.filter(_answer_filter(specs, filters)), specs)
+        return {**render(state, specs), 'filters': filters}
+
+    key = _cache_key(survey.pk)
+    schema_hash = _schema_hash(specs)
+    state = cache.get(key)
+    if not state or state.get('schema') != schema_hash or time.time() - state['built_at'] > FULL_REFRESH_SECONDS:
+        state = {**_aggregate(responses, specs), 'schema': schema_hash, 'built_at': time.time()}
+        cache.set(key, state, CACHE_TTL)
+    elif responses.filter(id__gt=state['last_id']).exists():
+        merge_states(state, _aggregate(responses.filter(id__gt=state['last_id']), specs))
+        cache.set(key, state, CACHE_TTL)
+    return render(state, specs)
+
+
+def crosstab(survey, row_qid: str, col_qid: str, filters: dict = None) -> dict:
+    """Response counts for every (row answer, column answer) pair."""
+    specs = question_specs(survey)
+    by_id = {spec['id']: spec for spec in specs}
+    for qid in (row_qid, col_qid):
+        if qid not in by_id:
+            raise AnalyticsError(f"Unknown question '{qid}'")
+        if by_id[qid]['type'] not in CATEGORICAL:
+            raise AnalyticsError(f"Question '{qid}' is not a select or yes/no question")
+
+    responses = SurveyResponse.objects.filter(survey=survey)
+    if filters:
+        responses = responses.filter(_answer_filter(specs, filters))
+    rows = responses.annotate(
+        row=KeyTextTransform(row_qid, 'answers'),
+        col=KeyTextTransform(col_qid, 'answers'),
+    ).exclude(row__isnull=True).exclude(col__isnull=True).values('row', 'col').annotate(n=Count('id')).order_by()
+
+    cells = {}
+    for item in rows:
+        pair = (_normalize_value(by_id[row_qid], item['row']), _normalize_value(by_id[col_qid], item['col']))
+        cells[pair] = cells.get(pair, 0) + item['n']
+    return {
+        'row': row_qid,
+        'column': col_qid,
+        'cells': [
+            {'row': row, 'column': col, 'count': n}
+            for (row, col), n in sorted(cells.items(), key=lambda cell: -cell[1])
+        ],
+    }
@@ -0,0 +1,187 @@
+"""
+Survey schema compiler.
+
+Survey.schema is a list of questions ({id, label, type, options} from the
+form builder, plus optional required / min / max / max_length). It is
+compiled once into a validator: one small check function per question.
+Validators are cached per process by survey id and schema version, so
+validating a response is a loop over prebuilt closures.
+"""
+import hashlib
+import json
+import math
+import threading
+from collections import OrderedDict
+
+TRUE_VALUES = ('true', 'yes', '1', 'y')
+FALSE_VALUES = ('false', 'no', '0', 'n')
+
+CACHE_SIZE = 256
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class SchemaError(ValueError):
+    """The survey schema itself is malformed."""
+
+
+class AnswerError(ValueError):
+    pass
+
+
+def schema_version(schema) -> str:
+    return hashlib.md5(json.dumps(schema, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+
+# ============================================================================
+# FIELD CHECKS
+# ============================================================================
+
+def _text_check(question):
+    max_length = question.get('max_length')
+
+    def check(value):
+        if isinstance(value, (dict, list, bool)):
+            raise AnswerError("Enter text.")
+        value = str(value).strip()
+        if max_length and len(value) > max_length:
+            raise AnswerError(f"Ensure this is at most {max_length} characters.")
+        return value
+    return check
+
+
+def _number_check(question):
+    low, high = question.get('min'), question.get('max')
+
+    def check(value):
+        if isinstance(value, bool):
+            raise AnswerError("Enter a number.")
+        if isinstance(value, str):
+            try:
+                value = float(value.strip())
+            except ValueError:
+                raise AnswerError("Enter a number.")
+        if not isinstance(value, (int, float)):
+            raise AnswerError("Enter a number.")
+        # float() accepts "nan"/"inf", which neither JSON nor Postgres can store
+        try:
+            finite = math.isfinite(value)
+        except OverflowError:
+            finite = False
+        if not finite:
+            raise AnswerError("Enter a finite number.")
+        if low is not None and value < low:
+            raise AnswerError(f"Ensure this is at least {low}.")
+        if high is not None and value > high:
+            raise AnswerError(f"Ensure this is at most {high}.")
+        return int(value) if float(value).is_integer() else value
+    return check
+
+
+def _boolean_check(question):
+    def check(value):
+        if isinstance(value, bool):
+            return value
+        text = str(value).strip().lower()
+        if text in TRUE_VALUES:
+            return True
+        if text in FALSE_VALUES:
+            return False
+        raise AnswerError("Answer yes or no.")
+    return check
+
+
+def _select_check(question):
+    options = question.get('options') or []
+    if isinstance(options, str):
+        options = [o.strip() for o in options.split(',') if o.strip()]
+    allowed = {str(o) for o in options}
+
+    def check(value):
+        value = str(value).strip()
+        if allowed and value not in allowed:
+            raise AnswerError(f"'{value}' is not one of the choices.")
+        return value
+    return check
+
+
+CHECKS = {
+    'text': _text_check,
+    'number': _number_check,
+    'boolean': _boolean_check,
+    'select': _select_check,
+}
+
+
+# ============================================================================
+# VALIDATOR
+# ============================================================================
+
+class SurveyValidator:
+    def __init__(self, schema):
+        self.version = schema_version(schema)
+        self.fields = []
+        self.required = set()
+        seen = set()
+        for question in schema or []:
+            if not isinstance(question, dict) or not question.get('id'):
+                raise SchemaError("Every question needs an id.")
+            qid = str(question['id'])
+            if qid in seen:
+                raise SchemaError(f"Duplicate question id '{qid}'.")
+            seen.add(qid)
+            kind = question.get('type') or 'text'
+            if kind not in CHECKS:
+                raise SchemaError(f"Question '{qid}' has unknown type '{kind}'.")
+            self.fields.append((qid, CHECKS[kind](question)))
+            if question.get('required'):
+                self.required.add(qid)
+        self.known = seen
+
+    def validate(self, answers):
+        """Return (cleaned answers, {question id: [errors]})."""
+        if not isinstance(answers, dict):
+            return {}, {'non_field_errors': ["Answers must be an object keyed by question id."]}
+        if not self.fields:
+            # No questions defined; nothing to validate against
+            return answers, {}
+
+        cleaned, errors = {}, {}
+        for qid, check in self.fields:
+            value = answers.get(qid)
+            if value is None or value == '':
+                if qid in self.required:
+                    errors[qid] = ["This question is required."]
+                continue
+            try:
+                cleaned[qid] = check(value)
+            except AnswerError as e:
+                errors[qid] = [str(e)]
+        for qid in answers.keys() - self.known:
+            errors[qid] = ["Unknown question."]
+        return cleaned, errors
+
+    def validate_batch(self, items) -> list:
+        """Validate many answer dicts; returns [(cleaned, errors), ...] in order."""
+        return [self.validate(answers) for answers in items]
+
+
+def compile_schema(schema) -> SurveyValidator:
+    return SurveyValidator(schema)
+
+
+def get_validator(survey) -> SurveyValidator:
+    """Cached validator for a survey's current schema."""
+    key = (survey.pk, schema_version(survey.schema))
+    with _cache_lock:
+        validator = _cache.get(key)
+        if validator is not None:
+            _cache.move_to_end(key)
+            return validator
+    validator = compile_schema(survey.schema)
+    with _cache_lock:
+        _cache[key] = validator
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return validator
@@ -0,0 +1,218 @@
+"""
+Batch sync for offline field surveys.
+
+Auditors collect responses on a device and upload them in one request.
+Each response carries a client-generated UUID, so a retried upload never
+creates duplicates. Valid responses are inserted with one bulk_create, and
+zakat rescoring for the touched households runs in the background. The
+reply includes a change token. The next sync sends it back and only
+receives surveys and households changed since.
+
+Households are sent in pages of HOUSEHOLD_PAGE (by id). While
+`changes.has_more` is true the device syncs again with the new token (an
+empty `responses` list is fine) to fetch the next page. The token after
+the last page resumes from when the first page was taken, so nothing
+changed during paging is missed.
+"""
+import uuid
+
+from django.core import signing
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Household, Survey, SurveyResponse
+from .survey_schema import SchemaError, get_validator
+
+MAX_BATCH = 500
+HOUSEHOLD_PAGE = 1000
+TOKEN_SALT = 'jamath.survey_sync'
+
+
+class SyncError(ValueError):
+    pass
+
+
+# ============================================================================
+# CHANGE TOKENS
+# ============================================================================
+
+def make_token(moment, after=None, started=None) -> str:
+    """
+    Change token for the next sync: changes after `moment` (None = full
+    sync). Mid-way through paging, `after` is the last household id sent and
+    `started` the moment the first page was taken.
+    """
+    # Signed per tenant so a token can't be replayed against another schema
+    data = {'t': moment.isoformat() if moment else None, 's': connection.schema_name}
+    if after is not None:
+        data.update(a=after, n=started.isoformat())
+    return signing.dumps(data, salt=TOKEN_SALT)
+
+
+def read_token(token) -> dict:
+    """{'since', 'after', 'started'} from a change token; all None on a first sync."""
+    state = {'since': None, 'after': None, 'started': None}
+    if not token:
+        return state
+    try:
+        data = signing.loads(token, salt=TOKEN_SALT)
+    except signing.BadSignature:
+        raise SyncError("Invalid sync token")
+    if data.get('s') != connection.schema_name:
+        raise SyncError("Invalid sync token")
+    state['since'] = parse_datetime(data['t']) if data.get('t') else None
+    if data.get('a') is not None:
+        state['after'] = data['a']
+        state['started'] = parse_datetime(data['n'])
+    return state
+
+
+def changes_since(state, now):
+    """
+    (changes, next token): surveys and one page of households the device
+    should refresh (everything, page by page, on first sync).
+    """
+    since, after = state['since'], state['after']
+    started = state['started'] or now
+
+    households = Household.objects.all()
+    if since:
+        households = households.filter(updated_at__gt=since)
+    if after is not None:
+        households = households.filter(id__gt=after)
+    page = list(households.order_by('id').values(
+        'id', 'membership_id', 'address', 'phone_number'
+    )[:HOUSEHOLD_PAGE + 1])
+    has_more = len(page) > HOUSEHOLD_PAGE
+    page = page[:HOUSEHOLD_PAGE]
+
+    if after is None:
+        surveys = Survey.objects.filter(updated_at__gt=since) if since else Survey.objects.filter(is_active=True)
+        surveys = list(surveys.values('id', 'title', 'schema', 'is_active'))
+    else:
+        # Already sent with the first page
+        surveys = []
+
+    token = make_token(since, after=page[-1]['id'], started=started) if has_more else make_token(started)
+    return {'surveys': surveys, 'households': page, 'has_more': has_more}, token
+
+
+# ============================================================================
+# UPLOAD
+# ============================================================================
+
+def _parse_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_uuid(value):
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_collected_at(value):
+    if not isinstance(value, str):
+        return None
+    try:
+        return parse_datetime(value)
+    except ValueError:
+        return None
+
+
+def sync_responses(items, auditor=None, since_token=None) -> dict:
+    """
+    Ingest a batch of offline responses. Every item gets a result:
+    created / duplicate (already uploaded) / invalid with field errors.
+    """
+    if not isinstance(items, list):
+        raise SyncError("responses must be a list")
+    if len(items) > MAX_BATCH:
+        raise SyncError(f"At most {MAX_BATCH} responses per sync")
+    state = read_token(since_token)
+    # Taken before reading changes, so nothing written meanwhile is skipped
+    now = timezone.now()
+
+    parsed = [(item, _parse_uuid(item.get('client_uuid')) if isinstance(item, dict) else None) for item in items]
+    uuids = [client_uuid for _, client_uuid in parsed if client_uuid]
+    existing = dict(SurveyResponse.objects.filter(client_uuid__in=uuids).values_list('client_uuid', 'id'))
+    surveys = Survey.objects.filter(is_active=True).in_bulk(
+        {_parse_id(item.get('survey')) for item, u in parsed if u} - {None}
+    )
+    household_ids = set(Household.objects.filter(
+        id__in={_parse_id(item.get('household')) for item, u in parsed if u} - {None}
+    ).values_list('id', flat=True))
+
+    results, pending, seen = [], [], set()
+    for item, client_uuid in parsed:
+        if client_uuid is None:
+            results.append({'client_uuid': item.get('client_uuid') if isinstance(item, dict) else None,
+                            'status': 'invalid', 'errors': {'client_uuid': ["A valid UUID is required."]}})
+            continue
+        result = {'client_uuid': str(client_uuid)}
+        results.append(result)
+        if client_uuid in existing or client_uuid in seen:
+            result.update(status='duplicate', id=existing.get(client_uuid))
+            continue
+
+        errors = {}
+        survey = surveys.get(_parse_id(item.get('survey')))
+        household_id = _parse_id(item.get('household'))
+        if survey is None:
+            errors['survey'] = ["Unknown or inactive survey."]
+        if household_id not in household_ids:
+            errors['household'] = ["Unknown household."]
+        answers = item.get('answers', {})
+        if survey is not None:
+            try:
+                answers, answer_errors = get_validator(survey).validate(answers)
+            except SchemaError as e:
+                errors['survey'] = [f"Survey schema is invalid: {e}"]
+            else:
+                if answer_errors:
+                    errors['answers'] = answer_errors
+        collected_at = _parse_collected_at(item.get('collected_at')) if item.get('collected_at') else None
+        if item.get('collected_at') and collected_at is None:
+            errors['collected_at'] = ["Enter a valid date/time."]
+        if errors:
+            result.update(status='invalid', errors=errors)
+            continue
+
+        seen.add(client_uuid)
+        result['status'] = 'created'
+        pending.append(SurveyResponse(
+            survey=survey,
+            household_id=household_id,
+            auditor=auditor,
+            answers=answers,
+            client_uuid=client_uuid,
+            collected_at=collected_at,
+        ))
+
+    if pending:
+        # A concurrent retry of the same batch may have inserted some rows
+        SurveyResponse.objects.bulk_create(pending, ignore_conflicts=True)
+        ids = dict(SurveyResponse.objects.filter(
+            client_uuid__in=[obj.client_uuid for obj in pending]
+        ).values_list('client_uuid', 'id'))
+        for result in results:
+            if result['status'] == 'created':
+                result['id'] = ids.get(uuid.UUID(result['client_uuid']))
+
+        from .tasks import recompute_zakat_scores
+        touched = sorted({obj.household_id for obj in pending})
+        schema_name = connection.schema_name
+        transaction.on_commit(lambda: recompute_zakat_scores.delay(schema_name, household_ids=touched))
+
+    changes, token = changes_since(state, now)
+    return {
+        'results': results,
+        'created': sum(r['status'] == 'created' for r in results),
+        'token': token,
+        'changes': changes,
+    }
@@ -0,0 +1,120 @@
+"""
+Background tasks for the Jamath app.
+
+Payment events from gateway webhooks are recorded here, and a periodic sweep
+reconciles orders whose webhook never arrived. Zakat scores are recomputed
+here when a tenant changes its scoring rules, and duplicate household
+scans run here.
+"""
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.utils import timezone
+from django_tenants.utils import get_public_schema_name, schema_context
+
+logger = logging.getLogger(__name__)
+
+# Orders younger than this are left to the portal callback / webhook
+RECONCILE_GRACE = timedelta(minutes=10)
+# Orders older than this are no longer polled
+RECONCILE_WINDOW = timedelta(days=2)
+
+
+@shared_task(bind=True, max_retries=5, default_retry_delay=30)
+def process_payment_event(self, schema_name: str, event: dict):
+    """Record a verified webhook event in the tenant's schema (idempotent)."""
+    from .services import PaymentService
+
+    try:
+        with schema_context(schema_name):
+            if event['paid']:
+                receipt = PaymentService.record_gateway_payment(
+                    event['order_id'], event.get('payment_id'), label=event.get('label', '')
+                )
+                if receipt is None:
+                    logger.warning(f"[{schema_name}] Webhook for unknown order {event['order_id']}")
+            else:
+                PaymentService.mark_failed(event['order_id'])
+    except Exception as exc:
+        logger.error(f"[{schema_name}] Payment event for {event.get('order_id')} failed: {exc}")
+        raise self.retry(exc=exc)
+
+
+def reconcile_tenant_payments() -> dict:
+    """
+    Settle the current tenant's open orders against the gateway.
+    Orders are fetched in one batch so the sweep costs a handful of gateway
+    calls per tenant rather than one per order.
+    """
+    from .models import MembershipConfig, PaymentOrder
+    from .payment_gateways import get_gateway, PaymentGatewayError
+    from .services import PaymentService
+
+    now = timezone.now()
+    since = now - RECONCILE_WINDOW
+    order_ids = list(PaymentOrder.objects.filter(
+        status=PaymentOrder.Status.CREATED,
+        created_at__gte=since,
+        created_at__lte=now - RECONCILE_GRACE,
+    ).values_list('order_id', flat=True))
+    if not order_ids:
+        return {'checked': 0, 'paid': 0}
+
+    config = MembershipConfig.objects.filter(is_active=True).first()
+    if not config:
+        return {'checked': 0, 'paid': 0}
+    try:
+        gateway = get_gateway(config)
+    except PaymentGatewayError:
+        return {'checked': 0, 'paid': 0}
+
+    paid = 0
+    for order_id, result in gateway.fetch_orders(order_ids, since=since).items():
+        if result['paid']:
+            if PaymentService.record_gateway_payment(order_id, result['payment_id'], label=gateway.label):
+                paid += 1
+        elif result['status'] in ('FAILED', 'EXPIRED', 'TERMINATED'):
+            PaymentService.mark_failed(order_id)
+    return {'checked': len(order_ids), 'paid': paid}
+
+
+@shared_task
+def reconcile_payment_orders():
+    """Periodic task: run the payment reconciliation sweep for every tenant."""
+    from apps.shared.models import Client
+
+    summary = {}
+    schemas = Client.objects.exclude(schema_name=get_public_schema_name()).values_list('schema_name', flat=True)
+    for schema_name in schemas:
+        try:
+            with schema_context(schema_name):
+                result = reconcile_tenant_payments()
+        except Exception as e:
+            logger.error(f"[{schema_name}] Payment reconciliation failed: {e}")
+            continue
+        if result['checked']:
+            summary[schema_name] = result
+    return summary
+
+
+@shared_task
+def recompute_zakat_scores(schema_name: str, batch_size: int = 1000, household_ids: list = None):
+    """Rescore a tenant's households (all, or household_ids) with its current zakat rules."""
+    from .zakat import recompute_all
+
+    with schema_context(schema_name):
+        summary = recompute_all(batch_size=batch_size, household_ids=household_ids)
+    logger.info(f"[{schema_name}] Zakat recompute: {summary}")
+    return summary
+
+
+@shared_task
+def scan_duplicate_households(schema_name: str):
+    """Queue likely duplicate households of one tenant for review."""
+    from .dedupe import refresh_candidates
+
+    with schema_context(schema_name):
+        summary = refresh_candidates()
+    logger.info(f"[{schema_name}] Duplicate scan: {summary}")
+    return summary
@@ -0,0 +1,38 @@
+from django.test import SimpleTestCase
+
+from apps.jamath.custom_fields import CustomFieldError, _apply, coerce, index_name
+from apps.jamath.models import CustomFieldDefinition, Household
+
+Type = CustomFieldDefinition.FieldType
+
+
+class CustomFieldTests(SimpleTestCase):
+    def test_values_are_coerced_by_type(self):
+        self.assertEqual(coerce(Type.NUMBER, '5'), 5)
+        self.assertEqual(coerce(Type.NUMBER, '2.5'), 2.5)
+        self.assertIs(coerce(Type.BOOLEAN, 'Yes'), True)
+        self.assertEqual(coerce(Type.DATE, '2024-01-05'), '2024-01-05')
+        with self.assertRaises(CustomFieldError):
+            coerce(Type.CHOICE, 'AB', ['O-', 'O+'])
+
+    def test_numbers_must_be_finite_and_bounded(self):
+        self.assertEqual(coerce(Type.NUMBER, '-12.5'), -12.5)
+        for value in ('1e20000000', 'Infinity', '-inf', 'NaN', 'sNaN', float('nan'), 10 ** 20):
+            with self.assertRaises(CustomFieldError):
+                coerce(Type.NUMBER, value)
+
+    def test_filters_compile_to_index_backed_lookups(self):
+        spec = {'type': Type.CHOICE, 'choices': ['O-', 'O+'], 'filterable': True}
+        sql = str(_apply(Household.objects.all(), 'blood_group', spec, 'in', 'O-,O+').query)
+        self.assertEqual(sql.count('@>'), 2)
+
+        spec = {'type': Type.NUMBER, 'choices': [], 'filterable': True}
+        sql = str(_apply(Household.objects.all(), 'family_size', spec, 'gte', '5').query)
+        self.assertIn('"custom_data" -> family_size) >=', sql)
+        self.assertIn('jsonb_typeof', sql)
+
+    def test_unsupported_operator(self):
+        spec = {'type': Type.BOOLEAN, 'choices': [], 'filterable': True}
+        with self.assertRaises(CustomFieldError):
+            _apply(Household.objects.all(), 'has_ration_card', spec, 'gte', '1')
+        self.assertEqual(index_name(CustomFieldDefinition.Entity.MEMBER, 'blood_group'), 'cf_mb_blood_group_idx')
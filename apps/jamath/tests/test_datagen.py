@@ -0,0 +1,23 @@
+from datetime import date
+from decimal import Decimal
+from uuid import UUID
+
+from django.test import SimpleTestCase
+
+from apps.jamath.datagen import _copy_value
+
+
+class CopyValueTests(SimpleTestCase):
+    def test_scalars(self):
+        self.assertEqual(_copy_value(None), r'\N')
+        self.assertEqual(_copy_value(True), 't')
+        self.assertEqual(_copy_value(False), 'f')
+        self.assertEqual(_copy_value(Decimal('12.50')), '12.50')
+        self.assertEqual(_copy_value(date(2025, 4, 1)), '2025-04-01')
+        self.assertEqual(_copy_value(UUID(int=1)), '00000000-0000-0000-0000-000000000001')
+
+    def test_text_is_escaped_for_copy(self):
+        self.assertEqual(_copy_value('a\tb\nc\\d'), 'a\\tb\\nc\\\\d')
+
+    def test_json(self):
+        self.assertEqual(_copy_value({'village': 'Noor Nagar'}), '{"village": "Noor Nagar"}')
@@ -0,0 +1,32 @@
+from django.test import SimpleTestCase
+
+from apps.jamath.dedupe import find_duplicates, normalize_phone, normalize_text, trigrams
+
+
+def record(phone, name, address):
+    name, address = normalize_text(name), normalize_text(address)
+    return {
+        'phone': normalize_phone(phone), 'name': name, 'address': address,
+        'name_grams': trigrams(name), 'address_grams': trigrams(address),
+    }
+
+
+class DedupeTests(SimpleTestCase):
+    def test_phone_formats_normalize(self):
+        self.assertEqual(normalize_phone('+91 98765-43210'), '9876543210')
+        self.assertEqual(normalize_phone('098765 43210'), '9876543210')
+
+    def test_finds_variants_and_ignores_strangers(self):
+        records = {
+            1: record('+91 98765 43210', 'Mohammed Ali Khan', '12-B, Noor Nagar'),
+            2: record('9876543210', 'Mohd. Ali Khan', '12 B Noor Nagar'),
+            3: record('9000000001', 'Abdul Rahman', '4, Station Road'),
+            4: record('', 'Mohammed Alim', '88 Lake View'),
+        }
+        pairs = find_duplicates(records)
+        self.assertEqual([(a, b) for a, b, _, _ in pairs], [(1, 2)])
+        self.assertIn('same phone', pairs[0][3])
+
+    def test_oversized_blocks_are_skipped(self):
+        records = {i: record('', 'Mohammed Ali', f'{i} Main Road') for i in range(1, 6)}
+        self.assertEqual(find_duplicates(records, threshold=0, max_block=3), [])
@@ -0,0 +1,51 @@
+import asyncio
+import io
+
+from django.test import SimpleTestCase
+
+from apps.jamath.exporters import ExportError, _csv_value, _flatten, build_export, csv_response, xlsx_response
+
+
+class CensusExportTests(SimpleTestCase):
+    def test_selected_columns_and_custom_fields(self):
+        header, _ = build_export('members', {'columns': 'full_name,membership_id,custom.blood_group'})
+        self.assertEqual(header, ['full_name', 'membership_id', 'custom.blood_group'])
+
+    def test_invalid_requests(self):
+        with self.assertRaises(ExportError):
+            build_export('households', {'columns': 'full_name'})
+        with self.assertRaises(ExportError):
+            build_export('households', {'columns': 'id', 'zakat_min': 'high'})
+        with self.assertRaises(ExportError):
+            build_export('ledgers', {})
+
+    def test_csv_is_streamed(self):
+        response = csv_response(['id', 'custom.village'], iter([[1, 'Rampur'], [2, 'Noor, Nagar']]), 'census')
+        body = b''.join(response.streaming_content).decode('utf-8')
+        self.assertEqual(body, '\ufeffid,custom.village\r\n1,Rampur\r\n2,"Noor, Nagar"\r\n')
+        self.assertIn('census.csv', response['Content-Disposition'])
+
+    def test_csv_is_streamed_asynchronously_under_asgi(self):
+        response = csv_response(['id'], iter([[1], [2]]), 'census', use_async=True)
+        self.assertTrue(response.is_async)
+
+        async def read():
+            return b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(asyncio.run(read()).decode('utf-8'), '\ufeffid\r\n1\r\n2\r\n')
+
+    def test_formula_cells_are_escaped_in_csv(self):
+        for value in ('=HYPERLINK("http://x")', '+1+1', '-2+3', '@SUM(A1)', '\tx', '\rx'):
+            self.assertEqual(_csv_value(value), "'" + value)
+        for value in ('+919876543210', '-12.5', 'Rampur', -5, None):
+            self.assertEqual(_csv_value(value), value)
+        response = csv_response(['phone_number', 'address'], iter([['+919876543210', '=1+1']]), 'census')
+        body = b''.join(response.streaming_content).decode('utf-8')
+        self.assertEqual(body, "\ufeffphone_number,address\r\n+919876543210,'=1+1\r\n")
+        self.assertEqual(_flatten(['=1']), '["=1"]')
+
+    def test_xlsx_cells_are_plain_strings(self):
+        from openpyxl import load_workbook
+
+        response = xlsx_response(['phone_number', 'address'], iter([['+919876543210', '=1+1']]), 'census')
+        sheet = load_workbook(io.BytesIO(b''.join(response.streaming_content))).active
+        self.assertEqual([(c.value, c.data_type) for c in sheet[2]], [('+919876543210', 's'), ('=1+1', 's')])
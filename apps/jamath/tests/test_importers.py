@@ -0,0 +1,56 @@
+import io
+from datetime import date
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from django_tenants.test.cases import TenantTestCase
+
+from apps.jamath.importers import CensusImportError, import_census, iter_rows, parse_household, parse_member
+from apps.jamath.models import Household
+
+
+class CensusImportParsingTests(SimpleTestCase):
+    def test_csv_rows_are_streamed_with_normalized_headers(self):
+        data = '\ufeffHousehold Ref,Address,Full Name,custom.Village\r\nH1,"12 Main St,\nBlock B",Ali,Rampur\r\n'
+        rows = list(iter_rows(io.BytesIO(data.encode('utf-8')), 'census.csv'))
+        self.assertEqual(rows, [{
+            'household_ref': 'H1', 'address': '12 Main St,\nBlock B', 'full_name': 'Ali', 'custom.village': 'Rampur',
+        }])
+
+    def test_household_fields(self):
+        fields = parse_household({'address': 'X', 'phone_number': 9876543210.0, 'custom.village': 'Rampur'})
+        self.assertEqual(fields['phone_number'], '9876543210')
+        self.assertEqual(fields['custom_data'], {'village': 'Rampur'})
+
+    def test_member_fields_accept_labels_and_dates(self):
+        fields = parse_member({
+            'full_name': 'Fatima', 'relationship': 'Spouse', 'gender': 'female',
+            'dob': '05/03/1990', 'monthly_income': '12,000',
+        })
+        self.assertEqual(fields['relationship_to_head'], 'SPOUSE')
+        self.assertFalse(fields['is_head_of_family'])
+        self.assertEqual(fields['gender'], 'FEMALE')
+        self.assertEqual(fields['dob'], date(1990, 3, 5))
+        self.assertEqual(fields['monthly_income'], Decimal('12000.00'))
+
+    def test_bad_values_raise(self):
+        with self.assertRaises(ValueError):
+            parse_member({'full_name': 'A', 'gender': 'X'})
+        with self.assertRaises(CensusImportError):
+            iter_rows(io.BytesIO(b''), 'census.pdf')
+
+    def test_unreadable_files_raise_import_error(self):
+        with self.assertRaisesMessage(CensusImportError, 'not UTF-8'):
+            list(iter_rows(io.BytesIO('household_ref,address\r\nH1,Caf\xe9\r\n'.encode('cp1252')), 'census.csv'))
+        with self.assertRaises(CensusImportError):
+            list(iter_rows(io.BytesIO(b'PK\x03\x04 not really a workbook'), 'census.xlsx'))
+
+
+class CensusImportTests(TenantTestCase):
+    def test_allocated_ids_skip_explicit_ids_in_the_same_chunk(self):
+        data = 'household_ref,membership_id,address,full_name\r\nH1,JM-001,1 Main Rd,Ali\r\nH2,,2 Main Rd,Omar\r\n'
+        summary = import_census(io.BytesIO(data.encode('utf-8')), 'census.csv')
+        self.assertEqual(summary['households_created'], 2)
+        self.assertEqual(
+            sorted(Household.objects.values_list('membership_id', flat=True)), ['JM-001', 'JM-002']
+        )
@@ -0,0 +1,79 @@
+import base64
+import hashlib
+import hmac
+import json
+from decimal import Decimal
+
+from django.test import SimpleTestCase, override_settings
+
+from apps.jamath.models import MembershipConfig
+from apps.jamath.payment_gateways import (
+    CashfreeGateway, FakeGateway, PaymentGatewayError, get_gateway, get_gateway_stats
+)
+
+
+class PaymentGatewayTests(SimpleTestCase):
+    def test_disabled_provider_raises(self):
+        config = MembershipConfig(payment_gateway_provider=MembershipConfig.GatewayProvider.NONE)
+        with self.assertRaises(PaymentGatewayError):
+            get_gateway(config)
+
+    def test_gateway_is_cached_until_credentials_change(self):
+        config = MembershipConfig(
+            payment_gateway_provider=MembershipConfig.GatewayProvider.CASHFREE,
+            cashfree_app_id='app', cashfree_secret_key='secret'
+        )
+        first = get_gateway(config)
+        self.assertIsInstance(first, CashfreeGateway)
+        self.assertIs(get_gateway(config), first)
+
+        config.cashfree_secret_key = 'rotated'
+        self.assertIsNot(get_gateway(config), first)
+
+    @override_settings(PAYMENT_GATEWAY_OVERRIDE='fake')
+    def test_fake_gateway_round_trip(self):
+        config = MembershipConfig(payment_gateway_provider=MembershipConfig.GatewayProvider.RAZORPAY)
+        gateway = get_gateway(config)
+        self.assertIsInstance(gateway, FakeGateway)
+
+        order = gateway.create_order(Decimal('1200'), 'INR', 'order_test', customer={})
+        self.assertEqual(order['amount'], 120000)
+
+        payment = gateway.verify_payment({'order_id': 'order_test'})
+        self.assertTrue(payment['paid'])
+        self.assertEqual(payment['amount'], Decimal('1200'))
+        self.assertFalse(gateway.verify_payment({'order_id': 'order_test', 'status': 'FAILED'})['paid'])
+
+    def test_bad_callback_amount_is_a_gateway_error(self):
+        gateway = FakeGateway()
+        for amount in ('abc', None, 'NaN'):
+            with self.assertRaises(PaymentGatewayError):
+                gateway.verify_payment({'order_id': 'order_test', 'amount': amount})
+
+    def test_gateway_calls_are_recorded(self):
+        gateway = FakeGateway()
+        gateway._timed('create_order', lambda: None)
+        stats = {(s['provider'], s['operation']): s for s in get_gateway_stats()}
+        self.assertGreaterEqual(stats[('FAKE', 'create_order')]['calls'], 1)
+
+    def test_cashfree_webhook_signature(self):
+        gateway = CashfreeGateway('app', 'secret')
+        body = json.dumps({
+            'type': 'PAYMENT_SUCCESS_WEBHOOK',
+            'data': {
+                'order': {'order_id': 'order_abc', 'order_amount': 500},
+                'payment': {'cf_payment_id': 42, 'payment_status': 'SUCCESS', 'payment_amount': 500},
+            }
+        }).encode()
+        timestamp = '1700000000'
+        signature = base64.b64encode(
+            hmac.new(b'secret', timestamp.encode() + body, hashlib.sha256).digest()
+        ).decode()
+
+        event = gateway.parse_webhook(body, {'x-webhook-timestamp': timestamp, 'x-webhook-signature': signature})
+        self.assertTrue(event['paid'])
+        self.assertEqual(event['order_id'], 'order_abc')
+        self.assertEqual(event['payment_id'], '42')
+
+        with self.assertRaises(PaymentGatewayError):
+            gateway.parse_webhook(body, {'x-webhook-timestamp': timestamp, 'x-webhook-signature': 'forged'})
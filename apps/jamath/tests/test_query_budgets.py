@@ -0,0 +1,205 @@
+"""
+Query-count and response-time budgets for the hot endpoints.
+
+A tenant is seeded at a realistic size (thousands of households, three
+years of vouchers) and each endpoint must stay within a fixed number of
+queries, so an N+1 creeping into a serializer fails here rather than in
+production. Time budgets are loose (they catch accidental O(n²) work, not
+jitter) and can be scaled with PERF_TIME_FACTOR on slow machines.
+
+Run just these with: python manage.py test apps.jamath.tests.test_query_budgets --tag=perf
+"""
+import os
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import tag
+from django.test.utils import CaptureQueriesContext
+from django_tenants.test.cases import TenantTestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.jamath.api import (
+    HouseholdViewSet, JournalEntryViewSet, LedgerReportsView, LedgerViewSet,
+    MemberPortalReceiptsView, PortalReceiptListView, ServiceRequestViewSet,
+)
+from apps.jamath.ledger_summary import rebuild
+from apps.jamath.models import (
+    Household, JournalEntry, JournalItem, Ledger, Member, Receipt, ServiceRequest, Subscription,
+)
+from apps.shared.data_context import build_data_context
+
+HOUSEHOLDS = 2000
+MEMBERS_PER_HOUSEHOLD = 4
+YEARS = 3
+VOUCHERS_PER_DAY = 3
+
+TIME_FACTOR = float(os.environ.get('PERF_TIME_FACTOR', '1'))
+
+ADMIN_PERMS = {'level': 'administrator', 'census': 'admin', 'finance': 'admin', 'welfare': 'admin',
+               'surveys': 'admin', 'can_see_sensitive': True, 'description': ''}
+
+
+def seed_tenant():
+    """Bulk-create a tenant-sized data set; returns (households, ledgers)."""
+    today = date.today()
+    households = Household.objects.bulk_create([
+        Household(address=f'{i} Noor Nagar', membership_id=f'PB-{i:05d}', phone_number=f'98{i:08d}',
+                  zakat_score=i % 100)
+        for i in range(HOUSEHOLDS)
+    ], batch_size=1000)
+    members = Member.objects.bulk_create([
+        Member(household=h, full_name=f'Member {h.pk}-{n}', is_head_of_family=(n == 0),
+               relationship_to_head=Member.Relationship.SELF if n == 0 else Member.Relationship.SON,
+               monthly_income=Decimal(5000 + n * 1000))
+        for h in households for n in range(MEMBERS_PER_HOUSEHOLD)
+    ], batch_size=2000)
+    subscriptions = Subscription.objects.bulk_create([
+        Subscription(household=h, start_date=today.replace(month=1, day=1) - timedelta(days=365 * year),
+                     end_date=today.replace(month=12, day=31) - timedelta(days=365 * year),
+                     minimum_required=Decimal('1200'), amount_paid=Decimal('1200'),
+                     status=Subscription.Status.ACTIVE if year == 0 else Subscription.Status.EXPIRED)
+        for h in households for year in range(YEARS)
+    ], batch_size=2000)
+    Receipt.objects.bulk_create([
+        Receipt(subscription=s, amount=s.amount_paid, membership_portion=s.amount_paid,
+                donation_portion=Decimal('0'), receipt_number=f'PB-R-{s.pk}')
+        for s in subscriptions
+    ], batch_size=2000)
+    ServiceRequest.objects.bulk_create([
+        ServiceRequest(household=households[i % HOUSEHOLDS], request_type=ServiceRequest.RequestType.NOC,
+                       status=ServiceRequest.Status.PENDING if i % 5 == 0 else ServiceRequest.Status.APPROVED)
+        for i in range(500)
+    ])
+
+    cash = Ledger.objects.create(code='1001', name='Cash in Hand', account_type=Ledger.AccountType.ASSET)
+    income = Ledger.objects.create(code='4000', name='Donations', account_type=Ledger.AccountType.INCOME)
+    ledgers = [cash, income] + [
+        Ledger.objects.create(code=f'4{n:03d}', name=f'Donation {n}', parent=income,
+                              account_type=Ledger.AccountType.INCOME, fund_type=Ledger.FundType.UNRESTRICTED_GENERAL)
+        for n in range(1, 11)
+    ]
+    heads = [m for m in members if m.is_head_of_family]
+    entries = JournalEntry.objects.bulk_create([
+        JournalEntry(voucher_number=f'PB-{i:06d}', voucher_type=JournalEntry.VoucherType.RECEIPT,
+                     date=today - timedelta(days=i // VOUCHERS_PER_DAY), narration='Monthly chanda',
+                     donor=heads[i % len(heads)], total_amount=Decimal('500'))
+        for i in range(365 * YEARS * VOUCHERS_PER_DAY)
+    ], batch_size=2000)
+    items = []
+    for i, entry in enumerate(entries):
+        items.append(JournalItem(journal_entry=entry, ledger=cash, debit_amount=Decimal('500')))
+        items.append(JournalItem(journal_entry=entry, ledger=ledgers[2 + i % 10], credit_amount=Decimal('500')))
+    JournalItem.objects.bulk_create(items, batch_size=5000)
+    rebuild()
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return households, ledgers
+
+
+@tag('perf')
+class QueryBudgetTests(TenantTestCase):
+    @classmethod
+    def setUpClass(cls):
+        # TenantTestCase skips setUpTestData; the seed lives in the test
+        # tenant schema, which is dropped in tearDownClass
+        super().setUpClass()
+        cls.households, cls.ledgers = seed_tenant()
+        cls.admin = get_user_model().objects.create_superuser('perf-admin', 'perf@example.com', 'x')
+        cls.member_user = get_user_model().objects.create_user(f'member_{cls.households[0].pk}')
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+
+    @contextmanager
+    def assertBudget(self, max_queries, max_ms):
+        """Fail if the block runs more than max_queries queries or takes longer than max_ms."""
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            yield
+            elapsed = (time.perf_counter() - start) * 1000
+        # django-tenants sets search_path on every cursor (TENANT_LIMIT_SET_CALLS
+        # is off); those are not queries the endpoint asked for
+        statements = [q['sql'] for q in queries.captured_queries if not q['sql'].startswith('SET search_path')]
+        executed = len(statements)
+        self.assertLessEqual(
+            executed, max_queries, f"{executed} queries (budget {max_queries}):\n" + '\n'.join(statements),
+        )
+        self.assertLessEqual(elapsed, max_ms * TIME_FACTOR, f"{elapsed:.0f} ms (budget {max_ms} ms)")
+
+    def call(self, view, path, user=None, **kwargs):
+        request = self.factory.get(path)
+        force_authenticate(request, user=user or self.admin)
+        response = view(request, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        self.assertEqual(response.status_code, 200, getattr(response, 'data', None))
+        return response
+
+    def test_households_list(self):
+        view = HouseholdViewSet.as_view({'get': 'list'})
+        with self.assertBudget(3, 4000):
+            response = self.call(view, '/api/jamath/households/')
+        self.assertEqual(len(response.data), HOUSEHOLDS)
+        first = next(h for h in response.data if h['id'] == self.households[0].pk)
+        self.assertEqual(first['member_count'], MEMBERS_PER_HOUSEHOLD)
+        self.assertTrue(first['is_membership_active'])
+        self.assertEqual(first['head_name'], f'Member {self.households[0].pk}-0')
+
+    def test_households_search(self):
+        view = HouseholdViewSet.as_view({'get': 'list'})
+        with self.assertBudget(3, 500):
+            self.call(view, '/api/jamath/households/?search=PB-00042')
+
+    def test_service_requests_list(self):
+        view = ServiceRequestViewSet.as_view({'get': 'list'})
+        with self.assertBudget(3, 1000):
+            response = self.call(view, '/api/jamath/service-requests/')
+        self.assertEqual(len(response.data), 500)
+
+    def test_journal_entries_list(self):
+        view = JournalEntryViewSet.as_view({'get': 'list'})
+        since = (date.today() - timedelta(days=90)).isoformat()
+        with self.assertBudget(3, 2000):
+            response = self.call(view, f'/api/ledger/journal-entries/?from={since}')
+        self.assertEqual(len(response.data), 91 * VOUCHERS_PER_DAY)
+
+    def test_day_book(self):
+        view = LedgerReportsView.as_view()
+        with self.assertBudget(4, 500):
+            response = self.call(view, '/api/ledger/reports/day-book/', report_type='day-book')
+        self.assertEqual(len(response.data['entries']), VOUCHERS_PER_DAY)
+
+    def test_trial_balance(self):
+        view = LedgerReportsView.as_view()
+        with self.assertBudget(2, 1000):
+            response = self.call(view, '/api/ledger/reports/trial-balance/', report_type='trial-balance')
+        self.assertTrue(response.data['is_balanced'])
+
+    def test_chart_of_accounts_tree(self):
+        view = LedgerViewSet.as_view({'get': 'list'})
+        with self.assertBudget(2, 500):
+            response = self.call(view, '/api/ledger/accounts/')
+        income = next(row for row in response.data if row['code'] == '4000')
+        self.assertEqual(len(income['children']), 10)
+
+    def test_portal_receipts(self):
+        with self.assertBudget(2, 300):
+            response = self.call(MemberPortalReceiptsView.as_view(), '/api/portal/receipts/', user=self.member_user)
+        self.assertEqual(len(response.data), YEARS)
+        with self.assertBudget(3, 500):
+            self.call(PortalReceiptListView.as_view(), '/api/portal/receipts/list/', user=self.member_user)
+
+    def test_basira_context(self):
+        message = 'Give me an overview of households, members, income and recent transactions'
+        with self.assertBudget(15, 2000):
+            cold = build_data_context(message, ADMIN_PERMS)
+        # Sections are cached per tenant; a follow-up question hits the cache
+        with self.assertBudget(1, 100):
+            warm = build_data_context(message, ADMIN_PERMS)
+        self.assertEqual(cold, warm)
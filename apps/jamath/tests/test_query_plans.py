@@ -0,0 +1,120 @@
+"""
+Query-plan regression tests: the hot queries behind list endpoints, the
+day book, portal and reminders must be answerable from their indexes.
+Sequential scans are disabled so the small seeded tables don't hide a
+missing or unusable index.
+"""
+from datetime import date, timedelta
+
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from django_tenants.test.cases import TenantTestCase
+
+from apps.jamath.models import (
+    Announcement, Household, JournalEntry, Member, ServiceRequest, Subscription, TelegramLink,
+)
+
+
+class QueryPlanTests(TenantTestCase):
+    @classmethod
+    def setUpClass(cls):
+        # TenantTestCase skips setUpTestData; the seed lives in the test
+        # tenant schema, which is dropped in tearDownClass
+        super().setUpClass()
+        today = date.today()
+        households = Household.objects.bulk_create([
+            Household(address=f'{i} Main Road', membership_id=f'QP-{i:04d}', phone_number=f'90000{i:05d}')
+            for i in range(300)
+        ])
+        Member.objects.bulk_create([
+            Member(household=h, full_name=f'Member {h.pk}-{n}', is_head_of_family=(n == 0), is_approved=not (n == 2 and h.pk % 50 == 0))
+            for h in households for n in range(3)
+        ])
+        Subscription.objects.bulk_create([
+            Subscription(
+                household=h, start_date=today - timedelta(days=365 * year), end_date=today - timedelta(days=365 * year - 364),
+                minimum_required=1200, status=Subscription.Status.ACTIVE if year == 0 else Subscription.Status.EXPIRED,
+            )
+            for h in households for year in range(3)
+        ])
+        JournalEntry.objects.bulk_create([
+            JournalEntry(
+                voucher_number=f'QP-{i:05d}', date=today - timedelta(days=i % 700), narration='Seed',
+                voucher_type=JournalEntry.VoucherType.RECEIPT if i % 3 else JournalEntry.VoucherType.PAYMENT,
+            )
+            for i in range(3000)
+        ])
+        ServiceRequest.objects.bulk_create([
+            ServiceRequest(household=households[i % 300], request_type=ServiceRequest.RequestType.NOC,
+                           status=ServiceRequest.Status.PENDING if i % 10 == 0 else ServiceRequest.Status.APPROVED)
+            for i in range(600)
+        ])
+        Announcement.objects.bulk_create([
+            Announcement(title=f'A{i}', content='-', is_active=i % 5 == 0) for i in range(200)
+        ])
+        TelegramLink.objects.bulk_create([
+            TelegramLink(phone_number=f'90000{i:05d}', chat_id=str(i), is_verified=i % 4 == 0) for i in range(300)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertUsesIndex(self, queryset, index):
+        plan = queryset.explain()
+        self.assertIn(index, plan, f"{index} not used:\n{plan}")
+
+    def test_journal_entry_paths(self):
+        today = date.today()
+        self.assertUsesIndex(
+            JournalEntry.objects.filter(voucher_type=JournalEntry.VoucherType.RECEIPT,
+                                        date__range=(today - timedelta(days=30), today)),
+            'journalentry_type_date_idx',
+        )
+        self.assertUsesIndex(JournalEntry.objects.order_by('-date', '-created_at')[:50], 'journalentry_listing_idx')
+
+    def test_subscription_paths(self):
+        today = date.today()
+        household = Household.objects.first()
+        self.assertUsesIndex(
+            Subscription.objects.filter(household=household, start_date__lte=today, end_date__gte=today),
+            'subscription_hh_dates_idx',
+        )
+        self.assertUsesIndex(
+            Subscription.objects.filter(status=Subscription.Status.ACTIVE, end_date__gte=today),
+            'subscription_status_end_idx',
+        )
+
+    def test_member_paths(self):
+        ids = list(Household.objects.values_list('id', flat=True)[:20])
+        self.assertUsesIndex(
+            Member.objects.filter(household_id__in=ids, is_head_of_family=True), 'member_household_head_idx'
+        )
+        self.assertUsesIndex(Member.objects.filter(is_approved=False), 'member_pending_idx')
+
+    def test_service_request_paths(self):
+        self.assertUsesIndex(
+            ServiceRequest.objects.filter(status=ServiceRequest.Status.PENDING).order_by('-created_at'),
+            'servicerequest_status_idx',
+        )
+        household = Household.objects.first()
+        self.assertUsesIndex(
+            ServiceRequest.objects.filter(household=household).order_by('-created_at'),
+            'servicerequest_household_idx',
+        )
+
+    def test_announcement_and_telegram_paths(self):
+        now = timezone.now()
+        self.assertUsesIndex(
+            Announcement.objects.filter(is_active=True, published_at__lte=now).filter(
+                Q(expires_at__isnull=True) | Q(expires_at__gte=now)
+            ),
+            'announcement_live_idx',
+        )
+        self.assertUsesIndex(
+            TelegramLink.objects.filter(is_verified=True).values_list('phone_number', 'chat_id'),
+            'telegramlink_verified_idx',
+        )
@@ -1,8 +1,15 @@
-from django.test import TestCase
-from apps.jamath.models import Household
-from apps.jamath.services import JamathService
+from decimal import Decimal
 
-class JamathServiceTests(TestCase):
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django_tenants.test.cases import TenantTestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.jamath.api import PortalPaymentVerifyView
+from apps.jamath.models import Household, MembershipConfig, PaymentOrder, Receipt
+from apps.jamath.services import JamathService, NotificationService, PaymentService
+
+class JamathServiceTests(TenantTestCase):
     def test_zakat_eligibility_high_score(self):
         """Test that high score sets status to ZAKAT_ELIGIBLE."""
         household = Household(
@@ -27,4 +34,54 @@ class JamathServiceTests(TestCase):
         JamathService.calculate_zakat_eligibility(household)
         
         assert household.zakat_score == 0
-        assert household.economic_status == Household.EconomicStatus.WEALTHY
+        assert household.economic_status == Household.EconomicStatus.AAM
+
+    def test_send_otp_keeps_code_out_of_info_logs(self):
+        with self.assertLogs('apps.jamath.services', level='INFO') as logs:
+            NotificationService.send_otp('9876543210', '482913')
+        output = '\n'.join(logs.output)
+        self.assertNotIn('482913', output)
+        self.assertNotIn('9876543210', output)
+
+
+class PaymentServiceTests(TenantTestCase):
+    def setUp(self):
+        self.household = Household.objects.create(address='1 Noor Nagar', membership_id='PB-00001')
+        self.order = PaymentOrder.objects.create(
+            provider='FAKE', order_id='order_idem', household=self.household, amount=Decimal('1200')
+        )
+
+    def test_record_gateway_payment_is_idempotent(self):
+        first = PaymentService.record_gateway_payment('order_idem', 'pay_1', label='Fake')
+        second = PaymentService.record_gateway_payment('order_idem', 'pay_1', label='Fake')
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Receipt.objects.count(), 1)
+        self.assertEqual(first.amount, Decimal('1200'))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, PaymentOrder.Status.PAID)
+        self.assertEqual(self.order.payment_id, 'pay_1')
+
+    def test_unknown_order_records_nothing(self):
+        self.assertIsNone(PaymentService.record_gateway_payment('order_missing', 'pay_2'))
+        self.assertEqual(Receipt.objects.count(), 0)
+
+    @override_settings(PAYMENT_GATEWAY_OVERRIDE='fake')
+    def test_verify_view_rejects_unknown_orders_and_missing_receipts(self):
+        MembershipConfig.objects.create(is_active=True,
+                                        payment_gateway_provider=MembershipConfig.GatewayProvider.RAZORPAY)
+        user = get_user_model().objects.create_user(f'member_{self.household.pk}')
+        view = PortalPaymentVerifyView.as_view()
+
+        def verify(order_id):
+            request = APIRequestFactory().post('/api/portal/payment/verify/', {'order_id': order_id}, format='json')
+            force_authenticate(request, user=user)
+            return view(request)
+
+        response = verify('order_unknown')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(PaymentOrder.objects.filter(order_id='order_unknown').exists())
+
+        self.assertEqual(verify('order_idem').status_code, 200)
+        Receipt.objects.all().delete()
+        self.assertEqual(verify('order_idem').status_code, 409)
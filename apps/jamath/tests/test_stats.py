@@ -0,0 +1,16 @@
+from datetime import date
+
+from django.test import SimpleTestCase
+
+from apps.jamath.stats import born_before
+
+
+class AgeBandTests(SimpleTestCase):
+    def test_birthday_today_counts_as_full_year(self):
+        cutoff = born_before(date(2025, 6, 15), 18)
+        self.assertEqual(cutoff, date(2007, 6, 15))
+
+    def test_leap_day_cutoff(self):
+        # Someone born 2008-02-29 is still 17 on 2026-02-28
+        self.assertEqual(born_before(date(2026, 2, 28), 18), date(2008, 2, 28))
+        self.assertEqual(born_before(date(2028, 2, 29), 20), date(2008, 2, 29))
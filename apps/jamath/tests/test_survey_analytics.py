@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+
+from apps.jamath.survey_analytics import _empty_state, merge_states, question_specs, render
+
+
+class SurveyAnalyticsTests(SimpleTestCase):
+    def setUp(self):
+        survey = SimpleNamespace(schema=[
+            {'id': 'q1', 'label': 'Housing', 'type': 'select', 'options': 'Own, Rented'},
+            {'id': 'q2', 'label': 'Members', 'type': 'number'},
+            {'id': 'q3', 'label': 'Notes', 'type': 'text'},
+        ])
+        self.specs = question_specs(survey)
+
+    def _state(self, responses, last_id, counts, numbers):
+        state = _empty_state(self.specs)
+        state.update(responses=responses, last_id=last_id)
+        state['questions']['q1'].update(answered=sum(counts.values()), counts=counts)
+        state['questions']['q2'].update(
+            answered=len(numbers), n=len(numbers), sum=float(sum(numbers)),
+            sumsq=float(sum(n * n for n in numbers)), min=min(numbers), max=max(numbers),
+        )
+        return state
+
+    def test_incremental_merge_matches_full_aggregate(self):
+        merged = merge_states(
+            self._state(3, 10, {'Own': 2, 'Rented': 1}, [2, 4, 6]),
+            self._state(1, 12, {'Own': 1}, [8]),
+        )
+        full = self._state(4, 12, {'Own': 3, 'Rented': 1}, [2, 4, 6, 8])
+        self.assertEqual(render(merged, self.specs), render(full, self.specs))
+        self.assertEqual(merged['last_id'], 12)
+
+    def test_render_orders_options_and_computes_stats(self):
+        data = render(self._state(4, 4, {'Rented': 3, 'Own': 1}, [2, 4, 6, 8]), self.specs)
+        housing, members, notes = data['questions']
+        self.assertEqual([d['value'] for d in housing['distribution']], ['Own', 'Rented'])
+        self.assertEqual(housing['distribution'][1]['percent'], 75.0)
+        self.assertEqual(members['mean'], 5.0)
+        self.assertEqual(members['stddev'], 2.24)
+        self.assertNotIn('distribution', notes)
@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+
+from apps.jamath.survey_schema import SchemaError, compile_schema, get_validator
+
+SCHEMA = [
+    {'id': 'q1', 'label': 'Housing', 'type': 'select', 'options': 'Own, Rented', 'required': True},
+    {'id': 'q2', 'label': 'Members', 'type': 'number', 'min': 1, 'max': 30},
+    {'id': 'q3', 'label': 'Ration card', 'type': 'boolean'},
+]
+
+
+class SurveySchemaTests(SimpleTestCase):
+    def test_valid_answers_are_normalized(self):
+        cleaned, errors = compile_schema(SCHEMA).validate({'q1': 'Own', 'q2': '4', 'q3': 'yes'})
+        self.assertEqual(errors, {})
+        self.assertEqual(cleaned, {'q1': 'Own', 'q2': 4, 'q3': True})
+
+    def test_field_level_errors(self):
+        _, errors = compile_schema(SCHEMA).validate({'q2': 45, 'q3': 'maybe', 'q9': 'x'})
+        self.assertEqual(set(errors), {'q1', 'q2', 'q3', 'q9'})
+        self.assertIn('required', errors['q1'][0])
+
+    def test_non_finite_numbers_are_rejected(self):
+        for value in ('nan', 'inf', '-Infinity', float('nan'), 10 ** 400):
+            _, errors = compile_schema(SCHEMA).validate({'q1': 'Own', 'q2': value})
+            self.assertIn('q2', errors, value)
+
+    def test_bad_schema_is_rejected(self):
+        with self.assertRaises(SchemaError):
+            compile_schema([{'id': 'q1', 'type': 'date'}])
+
+    def test_validator_cache_follows_schema_changes(self):
+        survey = SimpleNamespace(pk=7, schema=list(SCHEMA))
+        first = get_validator(survey)
+        self.assertIs(get_validator(survey), first)
+        survey.schema = SCHEMA[:1]
+        self.assertIsNot(get_validator(survey), first)
+
+    def test_batch_validation_keeps_order(self):
+        results = compile_schema(SCHEMA).validate_batch([{'q1': 'Own'}, {'q1': 'Flat'}])
+        self.assertEqual([bool(errors) for _, errors in results], [False, True])
@@ -0,0 +1,24 @@
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from apps.jamath.survey_sync import SyncError, make_token, read_token, sync_responses
+
+
+class SyncTokenTests(SimpleTestCase):
+    def test_token_round_trip(self):
+        moment = timezone.now()
+        self.assertEqual(read_token(make_token(moment))['since'], moment)
+        self.assertEqual(read_token(None), {'since': None, 'after': None, 'started': None})
+
+    def test_paging_token_carries_cursor(self):
+        moment, started = timezone.now(), timezone.now()
+        state = read_token(make_token(moment, after=1000, started=started))
+        self.assertEqual(state, {'since': moment, 'after': 1000, 'started': started})
+
+    def test_tampered_token_is_rejected(self):
+        with self.assertRaises(SyncError):
+            read_token(make_token(timezone.now()) + 'x')
+
+    def test_oversized_batch_is_rejected(self):
+        with self.assertRaises(SyncError):
+            sync_responses([{}] * 501)
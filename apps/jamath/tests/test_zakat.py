@@ -0,0 +1,40 @@
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from apps.jamath.zakat import extract_features, normalize_rules, score, status_for
+
+
+class ZakatScoringTests(SimpleTestCase):
+    def test_default_rules_match_original_scoring(self):
+        rules = normalize_rules({})
+        features = extract_features({'income': 3000, 'has_critical_illness': True})
+        self.assertEqual(score(features, rules), 80)
+        self.assertEqual(status_for(80, rules), 'ZAKAT_ELIGIBLE')
+        self.assertEqual(score(extract_features({'income': 9000, 'widow': True}), rules), 20)
+        # Member rows don't count by default: missing income still scores as 0
+        members = {'income': Decimal('9000'), 'widowed': 1, 'dependents': 3}
+        self.assertEqual(score(extract_features({}, members), rules), 50)
+
+    def test_member_rows_fill_in_income_and_widowhood_when_enabled(self):
+        rules = normalize_rules({
+            'use_member_income': True, 'use_member_widowhood': True,
+            'dependent_points': 5, 'max_dependent_points': 10,
+        })
+        features = extract_features({}, {'income': Decimal('4000'), 'widowed': 1, 'dependents': 3})
+        # 50 income + 20 widow + 10 capped dependents
+        self.assertEqual(score(features, rules), 80)
+        self.assertEqual(score(extract_features({}, {'income': Decimal('9000')}), rules), 0)
+
+    def test_income_bands_pick_first_matching_band(self):
+        rules = normalize_rules({'income_bands': [[10000, 20], [3000, 60]]})
+        self.assertEqual(score(extract_features({'income': 2000}), rules), 60)
+        self.assertEqual(score(extract_features({'income': 8000}), rules), 20)
+
+    def test_invalid_rules_are_rejected(self):
+        with self.assertRaises(ValueError):
+            normalize_rules({'bonus_points': 5})
+        with self.assertRaises(ValueError):
+            normalize_rules({'widow_points': 'lots'})
+        with self.assertRaises(ValueError):
+            normalize_rules({'use_member_income': 'yes'})
@@ -0,0 +1,198 @@
+"""
+Zakat eligibility scoring engine.
+
+Each tenant can tune the rules (MembershipConfig.zakat_rules); missing keys
+fall back to DEFAULT_ZAKAT_RULES, which reproduce the original scoring from
+survey answers (custom_data) only. Member-derived inputs (summed member
+income, widowed members, dependents) change scores, so they are opt-in.
+Recomputation walks households in primary-key batches. Each batch
+extracts features with two queries (households, grouped member
+aggregates), scores them in memory and writes changes with bulk_update.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import Household, Member, MembershipConfig
+from .stats import born_before, invalidate_census_stats
+
+DEFAULT_ZAKAT_RULES = {
+    # [monthly income below, points]; the lowest matching limit wins
+    'income_bands': [[5000, 50]],
+    'critical_illness_points': 30,
+    'widow_points': 20,
+    # Use the members' summed monthly_income when custom_data has no income
+    'use_member_income': False,
+    # Give widow_points for a widowed member, not only for custom_data 'widow'
+    'use_member_widowhood': False,
+    # Points per dependent member (under 18 or 60+), capped
+    'dependent_points': 0,
+    'max_dependent_points': 20,
+    'eligibility_threshold': 80,
+}
+
+CHILD_AGE = 18
+SENIOR_AGE = 60
+
+
+def normalize_rules(rules) -> dict:
+    """Merge tenant overrides onto the defaults. Raises ValueError on bad input."""
+    if rules in (None, ''):
+        rules = {}
+    if not isinstance(rules, dict):
+        raise ValueError("Zakat rules must be an object")
+    unknown = set(rules) - set(DEFAULT_ZAKAT_RULES)
+    if unknown:
+        raise ValueError(f"Unknown zakat rule(s): {', '.join(sorted(unknown))}")
+
+    merged = {**DEFAULT_ZAKAT_RULES, **rules}
+    try:
+        bands = sorted([float(limit), int(points)] for limit, points in merged['income_bands'])
+        for key in ('critical_illness_points', 'widow_points', 'dependent_points',
+                    'max_dependent_points', 'eligibility_threshold'):
+            merged[key] = int(merged[key])
+    except (TypeError, ValueError):
+        raise ValueError("Zakat rules must use numbers; income_bands is a list of [limit, points]")
+    merged['income_bands'] = bands
+    for key in ('use_member_income', 'use_member_widowhood'):
+        if not isinstance(merged[key], bool):
+            raise ValueError(f"Zakat rule {key} must be true or false")
+    return merged
+
+
+def get_rules() -> dict:
+    config = MembershipConfig.objects.filter(is_active=True).only('zakat_rules').first()
+    return normalize_rules(config.zakat_rules if config else {})
+
+
+def _to_number(value):
+    if value in (None, ''):
+        return None
+    try:
+        return Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def _truthy(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ('true', 'yes', '1', 'y')
+    return bool(value)
+
+
+def score(features: dict, rules: dict) -> int:
+    """Score one household's features (see extract_features); 0-100."""
+    total = 0
+    income = features['income']
+    if income is None and rules['use_member_income']:
+        income = features['member_income']
+    # Unknown income scores as zero income, as the original rules did
+    income = income or 0
+    for limit, points in rules['income_bands']:
+        if income < limit:
+            total += points
+            break
+    if features['critical_illness']:
+        total += rules['critical_illness_points']
+    if features['widow'] or (rules['use_member_widowhood'] and features['member_widowed']):
+        total += rules['widow_points']
+    total += min(features['dependents'] * rules['dependent_points'], rules['max_dependent_points'])
+    return max(0, min(total, 100))
+
+
+def status_for(points: int, rules: dict) -> str:
+    if points >= rules['eligibility_threshold']:
+        return Household.EconomicStatus.ZAKAT_ELIGIBLE
+    return Household.EconomicStatus.AAM
+
+
+def _member_aggregates(household_ids, today):
+    child_dob = born_before(today, CHILD_AGE)
+    senior_dob = born_before(today, SENIOR_AGE)
+    rows = Member.objects.filter(household_id__in=household_ids, is_alive=True).values('household_id').annotate(
+        income=Sum('monthly_income'),
+        dependents=Count('id', filter=Q(dob__gt=child_dob) | Q(dob__lte=senior_dob)),
+        widowed=Count('id', filter=Q(marital_status=Member.MaritalStatus.WIDOWED)),
+    ).order_by()
+    return {row['household_id']: row for row in rows}
+
+
+def extract_features(custom_data: dict, members: dict = None) -> dict:
+    """
+    Scoring inputs for one household: survey answers from custom_data and
+    member aggregates. Whether member inputs count is up to the rules.
+    """
+    data = custom_data or {}
+    members = members or {}
+    return {
+        'income': _to_number(data.get('income')),
+        'member_income': members.get('income'),
+        'critical_illness': _truthy(data.get('has_critical_illness', False)),
+        'widow': _truthy(data.get('widow', False)),
+        'member_widowed': members.get('widowed', 0) > 0,
+        'dependents': members.get('dependents', 0),
+    }
+
+
+def score_household(household: Household, rules: dict = None) -> None:
+    """Score a single household in place (does not save)."""
+    rules = rules or get_rules()
+    members = {}
+    if household.pk:
+        members = _member_aggregates([household.pk], timezone.localdate()).get(household.pk, {})
+    household.zakat_score = score(extract_features(household.custom_data, members), rules)
+    household.economic_status = status_for(household.zakat_score, rules)
+
+
+def recompute_all(dry_run: bool = False, batch_size: int = 1000, rules: dict = None, household_ids=None) -> dict:
+    """
+    Rescore every household in the current tenant (or only household_ids).
+    With dry_run nothing is written; the summary reports what would change.
+    """
+    rules = rules or get_rules()
+    today = timezone.localdate()
+    summary = {
+        'households': 0, 'score_changed': 0,
+        'newly_eligible': 0, 'no_longer_eligible': 0, 'dry_run': dry_run,
+    }
+    eligible = Household.EconomicStatus.ZAKAT_ELIGIBLE
+    households = Household.objects.all()
+    if household_ids is not None:
+        households = households.filter(id__in=household_ids)
+    last_id = 0
+
+    while True:
+        batch = list(
+            households.filter(id__gt=last_id).order_by('id')
+            .only('id', 'custom_data', 'zakat_score', 'economic_status')[:batch_size]
+        )
+        if not batch:
+            break
+        last_id = batch[-1].id
+        aggregates = _member_aggregates([h.id for h in batch], today)
+
+        changed = []
+        for household in batch:
+            points = score(extract_features(household.custom_data, aggregates.get(household.id)), rules)
+            status = status_for(points, rules)
+            if points == household.zakat_score and status == household.economic_status:
+                continue
+            if status != household.economic_status:
+                summary['newly_eligible' if status == eligible else 'no_longer_eligible'] += 1
+            if points != household.zakat_score:
+                summary['score_changed'] += 1
+            household.zakat_score = points
+            household.economic_status = status
+            changed.append(household)
+
+        summary['households'] += len(batch)
+        if changed and not dry_run:
+            with transaction.atomic():
+                Household.objects.bulk_update(changed, ['zakat_score', 'economic_status'])
+
+    if not dry_run and (summary['newly_eligible'] or summary['no_longer_eligible']):
+        # bulk_update skips the census signals
+        invalidate_census_stats()
+    return summary
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Client, Domain, SystemConfig
+from .models import Client, Domain, SystemConfig, TenantUsageSnapshot
 
 @admin.register(Client)
 class ClientAdmin(admin.ModelAdmin):
@@ -23,3 +23,11 @@ class SystemConfigAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         # Prevent deleting the configuration
         return False
+
+@admin.register(TenantUsageSnapshot)
+class TenantUsageSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('tenant', 'snapshot_date', 'households', 'members', 'active_subscriptions',
+                    'receipts_volume_30d', 'duration_ms')
+    list_filter = ('snapshot_date',)
+    search_fields = ('tenant__name', 'tenant__schema_name')
+    date_hierarchy = 'snapshot_date'
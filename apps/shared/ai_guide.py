@@ -1,13 +1,12 @@
-import os
 import re
-import json
-from django.http import StreamingHttpResponse, JsonResponse
-from django.views import View
 from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-import requests
+
+from .http import is_async_request
+from .llm import LLMError, LLMGateway, get_api_key, is_configured
+from .streaming import stream_simple_response
 
 
 def sanitize_input(message):
@@ -29,26 +28,10 @@ def sanitize_input(message):
     return message, None
 
 
-def stream_simple_response(text):
-    """
-    Create a streaming response for a simple text message.
-    This ensures the frontend can parse it correctly.
-    """
-    def generate():
-        yield f"data: {json.dumps({'content': text})}\n\n"
-        yield "data: [DONE]\n\n"
-    
-    response = StreamingHttpResponse(generate(), content_type='text/event-stream')
-    response['Cache-Control'] = 'no-cache'
-    response['X-Accel-Buffering'] = 'no'
-    return response
-
-
 SYSTEM_PROMPT = """You are Basira (بصيرة - "Insight"), the AI guide for DigitalJamath.
 
 ## CURRENT CONTEXT
-Date & Time: {current_datetime}
-User: {user_name}
+Date: {current_date}
 
 ## SECURITY DIRECTIVES (NEVER BYPASS)
 
@@ -116,19 +99,14 @@ class BasiraGuideView(APIView):
         if rejection:
             return stream_simple_response(rejection)
 
-        from apps.shared.models import SystemConfig
-        config = SystemConfig.get_solo()
-        api_key = config.openrouter_api_key or os.environ.get('OPENROUTER_API_KEY')
-        
-        if not api_key:
+        api_key = get_api_key()
+        if not is_configured(api_key):
             return stream_simple_response("⚠️ AI is not configured. Please contact administrator.")
 
-        # Build system prompt with context
-        current_dt = timezone.now().strftime('%A, %d %B %Y, %I:%M %p IST')
-        system_prompt = SYSTEM_PROMPT.format(
-            current_datetime=current_dt,
-            user_name=request.user.get_full_name() or request.user.username
-        )
+        # Build system prompt with context. It carries no user name or time of
+        # day, so the same FAQ question is answered once per day for everyone.
+        today = timezone.now().date()
+        system_prompt = SYSTEM_PROMPT.format(current_date=today.strftime('%A, %d %B %Y'))
 
         # Build messages
         messages = [{"role": "system", "content": system_prompt}]
@@ -140,92 +118,20 @@ class BasiraGuideView(APIView):
         # Add current user message
         messages.append({"role": "user", "content": sanitized_message})
 
+        # The guide's answers only depend on the prompt template and the date,
+        # so they are shared by all tenants
+        gateway = LLMGateway(api_key, "DigitalJamath - Basira Guide", max_tokens=500, temperature=0.2)
+        cache_context = f"{SYSTEM_PROMPT}\n{today.isoformat()}"
         if stream:
-            return self._stream_response(api_key, messages)
-        else:
-            return self._sync_response(api_key, messages)
-
-    def _stream_response(self, api_key, messages):
-        """Stream response using Server-Sent Events."""
-        def generate():
-            try:
-                response = requests.post(
-                    "https://openrouter.ai/api/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {api_key}",
-                        "Content-Type": "application/json",
-                        "HTTP-Referer": "https://project-mizan.com",
-                        "X-Title": "DigitalJamath - Basira Guide"
-                    },
-                    json={
-                        "model": "meta-llama/llama-3.2-3b-instruct:free",
-                        "messages": messages,
-                        "max_tokens": 500,
-                        "temperature": 0.2, # Strict adherence
-                        "stream": True
-                    },
-                    stream=True,
-                    timeout=60
-                )
-
-                for line in response.iter_lines():
-                    if line:
-                        line_text = line.decode('utf-8')
-                        if line_text.startswith('data: '):
-                            data = line_text[6:]
-                            if data == '[DONE]':
-                                yield f"data: [DONE]\n\n"
-                                break
-                            try:
-                                chunk = json.loads(data)
-                                if 'choices' in chunk and len(chunk['choices']) > 0:
-                                    delta = chunk['choices'][0].get('delta', {})
-                                    content = delta.get('content', '')
-                                    if content:
-                                        yield f"data: {json.dumps({'content': content})}\n\n"
-                            except json.JSONDecodeError:
-                                pass
-
-            except Exception as e:
-                yield f"data: {json.dumps({'error': str(e)})}\n\n"
-
-        response = StreamingHttpResponse(generate(), content_type='text/event-stream')
-        response['Cache-Control'] = 'no-cache'
-        response['X-Accel-Buffering'] = 'no'
-        return response
-
-    def _sync_response(self, api_key, messages):
-        """Non-streaming response (fallback)."""
-        try:
-            response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json",
-                    "HTTP-Referer": "https://project-mizan.com",
-                    "X-Title": "DigitalJamath - Basira Guide"
-                },
-                json={
-                    "model": "meta-llama/llama-3.2-3b-instruct:free",
-                    "messages": messages,
-                    "max_tokens": 500,
-                    "temperature": 0.2
-                },
-                timeout=30
+            return gateway.streaming_response(
+                messages, cache_context=cache_context, use_async=is_async_request(request)
             )
 
-            if response.status_code == 200:
-                data = response.json()
-                assistant_message = data['choices'][0]['message']['content']
-                return Response({
-                    'response': assistant_message,
-                    'model': data.get('model', 'unknown')
-                })
-            else:
-                return Response({
-                    'response': "I'm having trouble connecting right now. Please try again in a moment.",
-                    'error': f"API error: {response.status_code}"
-                }, status=200)
-
-        except Exception as e:
-            return Response({'error': str(e)}, status=500)
+        try:
+            result = gateway.complete(messages, cache_context=cache_context)
+        except LLMError as e:
+            return Response({
+                'response': "I'm having trouble connecting right now. Please try again in a moment.",
+                'error': str(e)
+            }, status=200)
+        return Response({'response': result['response'], 'model': result['model']})
@@ -0,0 +1,128 @@
+"""
+Platform analytics for the public schema.
+Computes compact per-tenant usage aggregates and rolls them up into
+TenantUsageSnapshot so superadmin dashboards read a single table.
+"""
+import logging
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from django_tenants.utils import get_public_schema_name, schema_context
+
+from .models import Client, TenantUsageSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+def compute_tenant_usage():
+    """
+    Compute usage aggregates for the tenant schema currently in context.
+    Uses one conditional-aggregation query per table.
+    """
+    from apps.jamath.models import Household, Member, Subscription, JournalEntry, JournalItem
+
+    today = timezone.now().date()
+    month_ago = today - timedelta(days=30)
+
+    households = Household.objects.aggregate(
+        total=Count('id'),
+        verified=Count('id', filter=Q(is_verified=True)),
+        zakat_eligible=Count('id', filter=Q(economic_status=Household.EconomicStatus.ZAKAT_ELIGIBLE)),
+    )
+    members = Member.objects.filter(is_alive=True).count()
+    active_subscriptions = Subscription.objects.filter(
+        status=Subscription.Status.ACTIVE,
+        end_date__gte=today
+    ).count()
+    receipts_count = JournalEntry.objects.filter(voucher_type=JournalEntry.VoucherType.RECEIPT).count()
+    items = JournalItem.objects.aggregate(
+        total=Count('id'),
+        receipts_volume=Sum(
+            'debit_amount',
+            filter=Q(journal_entry__voucher_type=JournalEntry.VoucherType.RECEIPT)
+        ),
+        receipts_volume_30d=Sum(
+            'debit_amount',
+            filter=Q(journal_entry__voucher_type=JournalEntry.VoucherType.RECEIPT,
+                     journal_entry__date__gte=month_ago)
+        ),
+    )
+
+    return {
+        'households': households['total'],
+        'verified_households': households['verified'],
+        'zakat_eligible_households': households['zakat_eligible'],
+        'members': members,
+        'active_subscriptions': active_subscriptions,
+        'receipts_count': receipts_count,
+        'receipts_volume': items['receipts_volume'] or Decimal('0.00'),
+        'receipts_volume_30d': items['receipts_volume_30d'] or Decimal('0.00'),
+        'journal_items': items['total'],
+    }
+
+
+def rollup_tenant(tenant, snapshot_date=None):
+    """Visit one tenant schema and upsert its snapshot for the given day."""
+    snapshot_date = snapshot_date or timezone.now().date()
+    started = time.monotonic()
+
+    with schema_context(tenant.schema_name):
+        usage = compute_tenant_usage()
+
+    usage['duration_ms'] = int((time.monotonic() - started) * 1000)
+    snapshot, _ = TenantUsageSnapshot.objects.update_or_create(
+        tenant=tenant,
+        snapshot_date=snapshot_date,
+        defaults=usage
+    )
+    return snapshot
+
+
+def rollup_all_tenants(snapshot_date=None):
+    """
+    Roll up usage for every tenant (excluding the public schema).
+    A failing tenant is logged and skipped so one broken schema
+    cannot block the platform rollup.
+    """
+    tenants = Client.objects.exclude(schema_name=get_public_schema_name())
+    done = 0
+    failed = 0
+
+    for tenant in tenants.iterator():
+        try:
+            rollup_tenant(tenant, snapshot_date)
+            done += 1
+        except Exception as e:
+            failed += 1
+            logger.error(f"Usage rollup failed for {tenant.schema_name}: {e}")
+
+    logger.info(f"Platform usage rollup: {done} tenants, {failed} failed")
+    return {'tenants': done, 'failed': failed}
+
+
+def get_platform_overview(history_days=30):
+    """Latest snapshot per tenant plus daily platform totals for capacity planning."""
+    latest = list(
+        TenantUsageSnapshot.objects.select_related('tenant')
+        .order_by('tenant_id', '-snapshot_date')
+        .distinct('tenant_id')
+    )
+
+    since = timezone.now().date() - timedelta(days=history_days)
+    history = (
+        TenantUsageSnapshot.objects.filter(snapshot_date__gte=since)
+        .values('snapshot_date')
+        .annotate(
+            tenants=Count('tenant'),
+            households=Sum('households'),
+            members=Sum('members'),
+            active_subscriptions=Sum('active_subscriptions'),
+            receipts_volume=Sum('receipts_volume'),
+        )
+        .order_by('snapshot_date')
+    )
+
+    return latest, list(history)
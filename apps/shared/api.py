@@ -7,11 +7,14 @@ from .models import Client, Domain
 from .serializers import TenantRegistrationSerializer
 from django_tenants.utils import schema_context
 from django.contrib.auth.models import User
+import logging
 import random
 from django.utils import timezone
 from rest_framework.views import APIView
 from .email_service import EmailService
 
+logger = logging.getLogger(__name__)
+
 
 # Custom throttle for Find Workspace API - prevents email enumeration attacks
 class FindWorkspaceThrottle(AnonRateThrottle):
@@ -255,9 +258,7 @@ class FindWorkspaceView(generics.GenericAPIView):
                     
             except Exception as e:
                 # Catch ALL errors (AttributeError, SMTP, etc) to prevent 500
-                import traceback
-                print(f"Find Workspace Error: {str(e)}")
-                traceback.print_exc()
+                logger.exception(f"Find Workspace Error: {e}")
 
         
         # Always return same success message to prevent email enumeration
@@ -323,7 +324,7 @@ class PasswordResetRequestView(generics.GenericAPIView):
                 try:
                     send_password_reset_email(user, tenant.domains.first().domain)
                 except Exception as e:
-                    print(f"Failed to send password reset email: {e}")
+                    logger.warning(f"Failed to send password reset email: {e}")
                     # Return 200 even if email fails, to avoid enumeration and panic
                     pass
                 return Response({"message": "Password reset email sent."}, status=status.HTTP_200_OK)
@@ -438,10 +439,10 @@ class SetupTenantView(APIView):
                     from django.core.management import call_command
                     # Seed Mizan Ledger Chart of Accounts
                     call_command('seed_ledger')
-                    print(f"[{schema_name}] Seeded Mizan Ledger Chart of Accounts.")
+                    logger.info(f"[{schema_name}] Seeded Mizan Ledger Chart of Accounts.")
 
         except Exception as e:
-            print(f"Setup Error: {e}")
+            logger.exception(f"Setup Error: {e}")
             # We don't want to fail the whole process if seeding fails, just log it.
             # But for now, let's return success with warning or just success.
             # return Response({'error': str(e)}, status=500) 
@@ -452,3 +453,95 @@ class SetupTenantView(APIView):
 
 
 
+
+
+from rest_framework.permissions import IsAdminUser
+from django_tenants.utils import get_public_schema_name
+
+
+class PlatformStatsView(APIView):
+    """
+    Superadmin platform dashboard: latest usage snapshot per tenant plus
+    daily platform totals. Reads only the public-schema rollup table.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        from .analytics import get_platform_overview
+        from .serializers import TenantUsageSnapshotSerializer
+
+        if request.tenant.schema_name != get_public_schema_name():
+            return Response({'error': 'Platform stats are only available on the admin domain.'}, status=403)
+
+        try:
+            days = min(int(request.query_params.get('days', 30)), 365)
+        except ValueError:
+            return Response({'error': 'days must be an integer'}, status=400)
+
+        latest, history = get_platform_overview(history_days=days)
+
+        return Response({
+            'tenants': TenantUsageSnapshotSerializer(latest, many=True).data,
+            'totals': {
+                'tenants': len(latest),
+                'households': sum(s.households for s in latest),
+                'members': sum(s.members for s in latest),
+                'active_subscriptions': sum(s.active_subscriptions for s in latest),
+                'receipts_volume_30d': sum(s.receipts_volume_30d for s in latest),
+            },
+            'history': history,
+        })
+
+
+class HealthCheckView(APIView):
+    """
+    Liveness/readiness probe with database round-trip latency.
+    Staff users additionally get connection, gateway, LLM and streaming statistics.
+    """
+    permission_classes = []
+
+    def get(self, request):
+        from .db import check_database, get_connection_stats
+        from .llm import get_llm_usage
+        from .streaming import get_stream_stats
+        from apps.jamath.payment_gateways import get_gateway_stats
+
+        try:
+            db_latency = check_database()
+        except Exception as e:
+            return Response({'status': 'error', 'database': str(e)}, status=503)
+
+        data = {'status': 'ok', 'database_ms': db_latency}
+        if request.user and request.user.is_staff:
+            data['connections'] = get_connection_stats(include_server=True)
+            data['payment_gateways'] = get_gateway_stats()
+            data['llm_usage'] = get_llm_usage(days=1)
+            data['streams'] = get_stream_stats()
+        return Response(data)
+
+
+class MetricsView(APIView):
+    """
+    Prometheus scrape endpoint (METRICS_ENABLED). Platform-wide, so it is
+    served on the public schema only (e.g. http://web:8000/metrics from inside
+    the Docker network) and needs `Authorization: Bearer <METRICS_TOKEN>`.
+    The scrape host (`web`) must be in ALLOWED_HOSTS; /metrics is exempt
+    from the HTTPS redirect.
+    """
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        import hmac
+        from django.http import HttpResponse
+        from . import metrics
+
+        if not metrics.is_enabled() or not settings.METRICS_TOKEN:
+            return Response({'error': 'Metrics are disabled.'}, status=404)
+        if request.tenant.schema_name != get_public_schema_name():
+            return Response({'error': 'Metrics are only available on the public schema.'}, status=403)
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        if not hmac.compare_digest(supplied.encode(), settings.METRICS_TOKEN.encode()):
+            return Response({'error': 'Invalid metrics token.'}, status=401)
+
+        return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -4,23 +4,25 @@ Provides AI-powered insights on Jamath data (households, members, transactions).
 Implements RBAC-based data filtering and pyramid principle communication.
 """
 
-import os
 import json
 import re
-import requests
 from datetime import date, timedelta
 from decimal import Decimal
 
-from django.db.models import Sum, Avg, Count, Q
-from django.db.models.functions import TruncMonth
+from django.db.models import Sum, Avg, Count, Q, Prefetch, OuterRef, Subquery
+from django.db.models.functions import Coalesce, TruncMonth
 from django.utils import timezone
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.http import StreamingHttpResponse
 
 from apps.jamath.models import Household, Member, Subscription, JournalEntry, Ledger, StaffMember
+from apps.jamath import ledger_summary
+from apps.jamath.stats import get_census_stats
+from apps.shared.http import is_async_request
+from apps.shared.llm import LLMGateway, get_api_key, is_configured
+from apps.shared.streaming import stream_simple_response
 
 
 # =============================================================================
@@ -112,125 +114,37 @@ def sanitize_user_input(message):
     return message, None
 
 
-def stream_simple_response(text):
-    """
-    Create a streaming response for a simple text message.
-    This ensures the frontend can parse it correctly.
-    """
-    def generate():
-        yield f"data: {json.dumps({'content': text})}\n\n"
-        yield "data: [DONE]\n\n"
-    
-    response = StreamingHttpResponse(generate(), content_type='text/event-stream')
-    response['Cache-Control'] = 'no-cache'
-    response['X-Accel-Buffering'] = 'no'
-    return response
-
-
 
 def get_household_stats():
     """Get summary statistics about households."""
-    total = Household.objects.count()
-    zakat_eligible = Household.objects.filter(economic_status='ZAKAT_ELIGIBLE').count()
-    verified = Household.objects.filter(is_verified=True).count()
-    
-    return {
-        "total_households": total,
-        "zakat_eligible": zakat_eligible,
-        "sahib_e_nisab": total - zakat_eligible,
-        "verified": verified,
-        "unverified": total - verified
-    }
+    return get_census_stats()['households']
 
 
 def get_member_stats():
     """Get summary statistics about members."""
-    total = Member.objects.filter(is_alive=True).count()
-    male = Member.objects.filter(is_alive=True, gender='MALE').count()
-    female = Member.objects.filter(is_alive=True, gender='FEMALE').count()
-    employed = Member.objects.filter(is_alive=True, is_employed=True).count()
-    
-    # Age distribution
-    today = date.today()
-    children = Member.objects.filter(is_alive=True, dob__gt=today - timedelta(days=18*365)).count()
-    adults = Member.objects.filter(
-        is_alive=True, 
-        dob__lte=today - timedelta(days=18*365),
-        dob__gt=today - timedelta(days=60*365)
-    ).count()
-    seniors = Member.objects.filter(is_alive=True, dob__lte=today - timedelta(days=60*365)).count()
-    
-    # Marital status
-    married = Member.objects.filter(is_alive=True, marital_status='MARRIED').count()
-    widowed = Member.objects.filter(is_alive=True, marital_status='WIDOWED').count()
-    
-    return {
-        "total_members": total,
-        "male": male,
-        "female": female,
-        "employed": employed,
-        "unemployed": total - employed,
-        "children_under_18": children,
-        "adults_18_60": adults,
-        "seniors_above_60": seniors,
-        "married": married,
-        "widowed": widowed
-    }
+    return get_census_stats()['members']
 
 
 def get_financial_summary(months_back=6):
-    """Get financial summary for the last N months using Mizan Ledger."""
+    """Get financial summary for the last N months from the daily ledger summary."""
     start_date = timezone.now().date() - timedelta(days=months_back * 30)
-    
-    # Income (Receipt Vouchers)
-    # Sum of Credit Amounts in Receipt Vouchers (usually credits Income/Equity accounts)
-    # But usually Receipt Total = `total_amount` (which is sum of debits, equal to credits)
-    # We can just sum JournalEntry totals for Receipts.
-    
-    income = JournalEntry.objects.filter(
-        voucher_type='RECEIPT',
-        date__gte=start_date
-    ).aggregate(total=Sum('items__debit_amount'))['total'] or Decimal('0')
-    
-    # Expenses (Payment Vouchers)
-    expenses = JournalEntry.objects.filter(
-        voucher_type='PAYMENT',
-        date__gte=start_date
-    ).aggregate(total=Sum('items__debit_amount'))['total'] or Decimal('0')
-    
-    # This month's figures
     this_month_start = timezone.now().date().replace(day=1)
-    
-    this_month_income = JournalEntry.objects.filter(
-        voucher_type='RECEIPT',
-        date__gte=this_month_start
-    ).aggregate(total=Sum('items__debit_amount'))['total'] or Decimal('0')
-    
-    this_month_expenses = JournalEntry.objects.filter(
-        voucher_type='PAYMENT',
-        date__gte=this_month_start
-    ).aggregate(total=Sum('items__debit_amount'))['total'] or Decimal('0')
-    
-    # Top Income Sources (Account-wise breakdown from Receipt items)
-    # We need to look at Credit items in Receipt vouchers (because Cash is Debited, Income is Credited)
-    # Filter: Voucher=Receipt, Item Credit > 0
-    top_income_categories = JournalEntry.objects.filter(
-        voucher_type='RECEIPT',
-        date__gte=start_date
-    ).values('items__ledger__name').filter(
-        items__credit_amount__gt=0
-    ).annotate(
-        total=Sum('items__credit_amount')
-    ).order_by('-total')[:5]
+
+    totals = ledger_summary.period_totals(start_date, this_month_start)
+    top_income_categories = ledger_summary.top_income_sources(start=start_date)
     
     return {
-        f"total_income_{months_back}_months": float(income),
-        f"total_expenses_{months_back}_months": float(expenses),
-        "net_surplus": float(income - expenses),
-        "this_month_income": float(this_month_income),
-        "this_month_expenses": float(this_month_expenses),
+        f"total_income_{months_back}_months": float(totals['income']),
+        f"total_expenses_{months_back}_months": float(totals['expense']),
+        "net_surplus": float(totals['income'] - totals['expense']),
+        "this_month_income": float(totals['month_income']),
+        "this_month_expenses": float(totals['month_expense']),
+        "monthly": [
+            {"month": row['month'], "income": float(row['income']), "expense": float(row['expense'])}
+            for row in ledger_summary.monthly_totals(months_back)
+        ],
         "top_income_sources": [
-            {"fund": item['items__ledger__name'] or "Unknown", "amount": float(item['total'])}
+            {"fund": item['ledger__name'] or "Unknown", "amount": float(item['total'])}
             for item in top_income_categories
         ]
     }
@@ -260,12 +174,21 @@ def get_subscription_status():
 
 def search_households(query):
     """Search households by name, phone, or ID."""
+    # Counted in a subquery: a Count() here would reuse the member-name
+    # filter's join and only count the members whose name matched
+    member_total = Member.objects.filter(household=OuterRef('pk')).order_by().values('household').annotate(
+        total=Count('pk')
+    ).values('total')
     results = Household.objects.filter(
         Q(membership_id__icontains=query) |
         Q(phone_number__icontains=query) |
         Q(address__icontains=query) |
         Q(members__full_name__icontains=query)
-    ).distinct()[:10]
+    ).distinct().annotate(
+        member_total=Coalesce(Subquery(member_total), 0)
+    ).prefetch_related(
+        Prefetch('members', queryset=Member.objects.filter(is_head_of_family=True), to_attr='heads')
+    )[:10]
     
     return [
         {
@@ -273,8 +196,8 @@ def search_households(query):
             "membership_id": h.membership_id,
             "address": h.address[:50] if h.address else "",
             "phone": h.phone_number,
-            "head_name": h.members.filter(is_head_of_family=True).first().full_name if h.members.filter(is_head_of_family=True).exists() else "Unknown",
-            "member_count": h.members.count(),
+            "head_name": h.heads[0].full_name if h.heads else "Unknown",
+            "member_count": h.member_total,
             "economic_status": h.get_economic_status_display()
         }
         for h in results
@@ -283,9 +206,7 @@ def search_households(query):
 
 def get_recent_transactions(limit=10):
     """Get recent transactions (Journal Entries)."""
-    # Use select_related/prefetch_related for optimization if needed, 
-    # but for just 10 items it's fine.
-    transactions = JournalEntry.objects.all().order_by('-date', '-id')[:limit]
+    transactions = JournalEntry.objects.select_related('donor').order_by('-date', '-id')[:limit]
     
     return [
         {
@@ -307,8 +228,7 @@ def get_recent_transactions(limit=10):
 DATA_AGENT_PROMPT = """You are Basira Data Agent, an AI assistant for DigitalJamath.
 
 ## CURRENT CONTEXT
-Date & Time: {current_datetime}
-User: {user_name}
+Date: {current_date}
 Access Level: {user_access_level}
 Access Details: {access_description}
 
@@ -382,21 +302,18 @@ class BasiraDataAgentView(APIView):
         # Get user permissions
         user_perms = get_user_permissions(request.user)
 
-        from apps.shared.models import SystemConfig
-        config = SystemConfig.get_solo()
-        api_key = config.openrouter_api_key or os.environ.get('OPENROUTER_API_KEY')
-
-        if not api_key:
+        api_key = get_api_key()
+        if not is_configured(api_key):
             return stream_simple_response("⚠️ API key not configured. Please contact administrator.")
 
         # Build data context based on user permissions
-        data_context = self._build_data_context(sanitized_message, user_perms)
+        data_context = self._build_data_context(sanitized_message, user_perms, conversation_history)
 
-        # Build system prompt with RBAC context
-        current_dt = timezone.now().strftime('%A, %d %B %Y, %I:%M %p IST')
+        # Build system prompt with RBAC context (no user name or time of day, so
+        # answers can be shared by users with the same access level)
+        today = timezone.now().date()
         system_prompt = DATA_AGENT_PROMPT.format(
-            current_datetime=current_dt,
-            user_name=request.user.get_full_name() or request.user.username,
+            current_date=today.strftime('%A, %d %B %Y'),
             user_access_level=user_perms['level'],
             access_description=user_perms['description'],
             data_context=data_context
@@ -408,98 +325,17 @@ class BasiraDataAgentView(APIView):
             messages.append(msg)
         messages.append({"role": "user", "content": sanitized_message})
 
-        # Stream response
-        return self._stream_response(api_key, messages)
-
-    def _build_data_context(self, query, user_perms):
-        """Build relevant data context based on user permissions."""
-        context_parts = []
-
-        # Census data - only if user has access
-        if user_perms['census'] in ['admin', 'view']:
-            context_parts.append("### HOUSEHOLD STATISTICS")
-            context_parts.append(json.dumps(get_household_stats(), indent=2))
-
-            context_parts.append("\n### MEMBER STATISTICS")
-            context_parts.append(json.dumps(get_member_stats(), indent=2))
-
-            # Search if query contains search keywords
-            search_keywords = ['find', 'search', 'look up', 'who is', 'which household', 'phone', 'member named']
-            if any(kw in query.lower() for kw in search_keywords):
-                words = query.split()
-                for word in words:
-                    if len(word) >= 4 and (word.isdigit() or word.isalpha()):
-                        results = search_households(word)
-                        if results:
-                            context_parts.append(f"\n### SEARCH RESULTS FOR '{word}'")
-                            context_parts.append(json.dumps(results, indent=2))
-                            break
-        else:
-            context_parts.append("### CENSUS DATA")
-            context_parts.append("You do not have permission to view household/member data.")
-
-        # Financial data - only if user has finance access
-        if user_perms['finance'] in ['admin', 'view']:
-            context_parts.append("\n### FINANCIAL SUMMARY (Last 6 Months)")
-            context_parts.append(json.dumps(get_financial_summary(), indent=2))
-
-            context_parts.append("\n### MEMBERSHIP STATUS")
-            context_parts.append(json.dumps(get_subscription_status(), indent=2))
-
-            if user_perms['finance'] == 'admin':
-                context_parts.append("\n### RECENT TRANSACTIONS (Last 10)")
-                context_parts.append(json.dumps(get_recent_transactions(), indent=2))
-        else:
-            context_parts.append("\n### FINANCIAL DATA")
-            context_parts.append("You do not have permission to view financial data.")
-
-        return "\n".join(context_parts)
-
-    def _stream_response(self, api_key, messages):
-        """Stream response using Server-Sent Events."""
-        def generate():
-            try:
-                response = requests.post(
-                    "https://openrouter.ai/api/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {api_key}",
-                        "Content-Type": "application/json",
-                        "HTTP-Referer": "https://project-mizan.com",
-                        "X-Title": "DigitalJamath - Basira Data Agent"
-                    },
-                    json={
-                        "model": "meta-llama/llama-3.2-3b-instruct:free",
-                        "messages": messages,
-                        "max_tokens": 800,
-                        "temperature": 0.3,
-                        "stream": True
-                    },
-                    stream=True,
-                    timeout=60
-                )
-
-                for line in response.iter_lines():
-                    if line:
-                        line_text = line.decode('utf-8')
-                        if line_text.startswith('data: '):
-                            data = line_text[6:]
-                            if data == '[DONE]':
-                                yield f"data: [DONE]\n\n"
-                                break
-                            try:
-                                chunk = json.loads(data)
-                                if 'choices' in chunk and len(chunk['choices']) > 0:
-                                    delta = chunk['choices'][0].get('delta', {})
-                                    content = delta.get('content', '')
-                                    if content:
-                                        yield f"data: {json.dumps({'content': content})}\n\n"
-                            except json.JSONDecodeError:
-                                pass
-
-            except Exception as e:
-                yield f"data: {json.dumps({'error': str(e)})}\n\n"
-
-        response = StreamingHttpResponse(generate(), content_type='text/event-stream')
-        response['Cache-Control'] = 'no-cache'
-        response['X-Accel-Buffering'] = 'no'
-        return response
+        # Answers depend on this tenant's data and the caller's access level
+        gateway = LLMGateway(
+            api_key, "DigitalJamath - Basira Data Agent", max_tokens=800, temperature=0.3, tenant_scoped=True
+        )
+        return gateway.streaming_response(
+            messages,
+            cache_context=f"{DATA_AGENT_PROMPT}\n{today.isoformat()}\n{user_perms['level']}\n{data_context}",
+            use_async=is_async_request(request)
+        )
+
+    def _build_data_context(self, query, user_perms, history=None):
+        """Build the data context for this message, limited by user permissions."""
+        from .data_context import build_data_context
+        return build_data_context(query, user_perms, history)
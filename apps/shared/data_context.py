@@ -0,0 +1,120 @@
+"""
+Intent-aware data context for the Basira Data Agent.
+
+Only the sections relevant to the user's question are included. Each
+section is cached per tenant with a short TTL and serialized compactly,
+so a chat message costs a few cache reads instead of a dozen aggregate
+queries and fewer prompt tokens.
+"""
+import json
+import re
+
+from django.core.cache import cache
+
+from .tenant_cache import tenant_cache_key
+
+
+class Section:
+    def __init__(self, name, title, area, loader, keywords, ttl=120, levels=('admin', 'view')):
+        self.name = name
+        self.title = title
+        self.area = area          # permission area: 'census' or 'finance'
+        self.loader = loader      # function name in apps.shared.data_agent
+        self.keywords = keywords
+        self.ttl = ttl
+        self.levels = levels
+
+    def load(self):
+        from . import data_agent
+        loader = getattr(data_agent, self.loader)
+        if not self.ttl:
+            return loader()
+        return cache.get_or_set(tenant_cache_key('basira_context', self.name), loader, self.ttl)
+
+
+# Census sections use ttl=0: apps.jamath.stats already caches them and
+# invalidates on writes.
+SECTIONS = [
+    Section('households', 'HOUSEHOLD STATISTICS', 'census', 'get_household_stats',
+            ['household', 'family', 'families', 'zakat', 'eligible', 'nisab', 'verified', 'census', 'ghar'],
+            ttl=0),
+    Section('members', 'MEMBER STATISTICS', 'census', 'get_member_stats',
+            ['member', 'people', 'population', 'male', 'female', 'men', 'women', 'child', 'children',
+             'adult', 'senior', 'age', 'employed', 'unemployed', 'job', 'married', 'widow', 'census'],
+            ttl=0),
+    Section('finance', 'FINANCIAL SUMMARY (Last 6 Months)', 'finance', 'get_financial_summary',
+            ['income', 'expense', 'spend', 'spent', 'finance', 'financial', 'money', 'fund', 'donation',
+             'surplus', 'deficit', 'revenue', 'collection', 'collected', 'budget', 'month', 'source']),
+    Section('subscriptions', 'MEMBERSHIP STATUS', 'finance', 'get_subscription_status',
+            ['subscription', 'membership', 'renewal', 'renew', 'expired', 'fee', 'dues', 'paid', 'pending']),
+    Section('transactions', 'RECENT TRANSACTIONS (Last 10)', 'finance', 'get_recent_transactions',
+            ['transaction', 'recent', 'latest', 'last', 'voucher', 'receipt', 'payment', 'entry', 'entries'],
+            ttl=60, levels=('admin',)),
+]
+
+# Used when a message matches no section (greetings, "give me an overview")
+DEFAULT_SECTIONS = {'households', 'members', 'finance', 'subscriptions'}
+
+SEARCH_KEYWORDS = ['find', 'search', 'look up', 'who is', 'which household', 'phone', 'member named']
+
+_WORD_RE = re.compile(r"[a-z]+")
+
+
+def compact_json(data) -> str:
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def detect_sections(message: str, history=None) -> set:
+    """
+    Pick the sections a message is about. The previous user turn is
+    included so short follow-ups ("and last month?") keep their topic.
+    """
+    texts = [message]
+    for msg in reversed(history or []):
+        if isinstance(msg, dict) and msg.get('role') == 'user':
+            texts.append(str(msg.get('content', '')))
+            break
+
+    words = set(_WORD_RE.findall(' '.join(texts).lower()))
+    selected = set()
+    for section in SECTIONS:
+        for keyword in section.keywords:
+            # Keywords match whole words, allowing simple plurals
+            if keyword in words or f"{keyword}s" in words:
+                selected.add(section.name)
+                break
+    return selected or set(DEFAULT_SECTIONS)
+
+
+def build_data_context(message: str, user_perms: dict, history=None) -> str:
+    """Build the DATA CONTEXT block of the system prompt for one message."""
+    from .data_agent import search_households
+
+    wanted = detect_sections(message, history)
+    parts = []
+    shown, denied = set(), set()
+
+    for section in SECTIONS:
+        if section.name not in wanted:
+            continue
+        if user_perms.get(section.area) not in section.levels:
+            denied.add(section.area)
+            continue
+        shown.add(section.area)
+        parts.append(f"### {section.title}\n{compact_json(section.load())}")
+
+    if user_perms.get('census') in ('admin', 'view') and any(kw in message.lower() for kw in SEARCH_KEYWORDS):
+        for word in message.split():
+            if len(word) >= 4 and (word.isdigit() or word.isalpha()):
+                results = search_households(word)
+                if results:
+                    parts.append(f"### SEARCH RESULTS FOR '{word}'\n{compact_json(results)}")
+                    break
+
+    denied -= shown
+    if 'census' in denied:
+        parts.append("### CENSUS DATA\nYou do not have permission to view household/member data.")
+    if 'finance' in denied:
+        parts.append("### FINANCIAL DATA\nYou do not have permission to view financial data.")
+
+    return "\n\n".join(parts)
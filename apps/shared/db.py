@@ -0,0 +1,41 @@
+"""
+Database connection helpers: health checks and connection statistics for
+monitoring persistent Postgres connections.
+"""
+import time
+
+from django.conf import settings
+from django.db import connection
+
+
+def check_database():
+    """Run a trivial query and return its round-trip latency in milliseconds."""
+    started = time.monotonic()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    return round((time.monotonic() - started) * 1000, 2)
+
+
+def get_server_connection_stats():
+    """Connections to the current database on the Postgres server, grouped by state."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COALESCE(state, 'unknown'), COUNT(*) FROM pg_stat_activity "
+            "WHERE datname = current_database() GROUP BY 1"
+        )
+        return {state: count for state, count in cursor.fetchall()}
+
+
+def get_connection_stats(include_server=False):
+    """Summary of how this process talks to Postgres."""
+    db = settings.DATABASES['default']
+    stats = {
+        'mode': 'pgbouncer' if settings.DATABASE_PGBOUNCER else 'direct',
+        'conn_max_age': db.get('CONN_MAX_AGE', 0),
+        'health_checks': db.get('CONN_HEALTH_CHECKS', False),
+        'limit_set_calls': getattr(settings, 'TENANT_LIMIT_SET_CALLS', False),
+    }
+    if include_server:
+        stats['server'] = get_server_connection_stats()
+    return stats
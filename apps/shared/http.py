@@ -0,0 +1,47 @@
+"""
+Shared outbound HTTP clients.
+
+Reusing one client per process (and one async client per event loop) keeps
+TCP/TLS connections to OpenRouter, Telegram and payment gateways alive
+instead of re-handshaking on every request.
+"""
+import asyncio
+import weakref
+
+import httpx
+
+DEFAULT_TIMEOUT = httpx.Timeout(10.0, read=60.0)
+DEFAULT_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+_sync_client = None
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_http_client() -> httpx.Client:
+    """Process-wide pooled sync client."""
+    global _sync_client
+    if _sync_client is None or _sync_client.is_closed:
+        _sync_client = httpx.Client(timeout=DEFAULT_TIMEOUT, limits=DEFAULT_LIMITS)
+    return _sync_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Pooled async client bound to the running event loop.
+    Under ASGI there is one long-lived loop per worker, so this is shared
+    by every request served by that worker. Only use it on that loop: a
+    short-lived loop (async_to_sync under WSGI or Celery) would leave the
+    client open when it ends, so use `async with httpx.AsyncClient()` there.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(timeout=DEFAULT_TIMEOUT, limits=DEFAULT_LIMITS)
+        _async_clients[loop] = client
+    return client
+
+
+def is_async_request(request) -> bool:
+    """True when the request is being served by the ASGI handler."""
+    from django.core.handlers.asgi import ASGIRequest
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
@@ -0,0 +1,416 @@
+"""
+LLM gateway for Basira (AI Guide and Data Agent).
+
+- Talks to OpenRouter over the shared pooled HTTP clients (sync and async)
+  instead of a new connection per message.
+- Streams through apps.shared.streaming (batched frames, budgets, TTFT).
+- Caches answers to first-turn questions keyed by (normalized prompt,
+  context hash, model) and replays them in the same SSE format.
+- Falls back to LLM_FALLBACK_MODELS when a model fails before streaming.
+- Accounts tokens, latency, cache hits and errors per tenant per day.
+
+LLM_PROVIDER=stub swaps OpenRouter for a local provider for tests and
+benchmarks.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from . import metrics
+from .http import get_async_http_client, get_http_client
+from .streaming import (
+    SSE_DONE, StreamMonitor, arelay_stream, relay_stream, split_for_replay, sse_event, sse_response
+)
+from .tenant_cache import tenant_cache_key
+
+logger = logging.getLogger(__name__)
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+USAGE_FIELDS = (
+    'requests', 'cache_hits', 'errors', 'prompt_tokens', 'completion_tokens', 'latency_ms', 'ttft_ms'
+)
+USAGE_TTL = 60 * 60 * 24 * 8
+
+class LLMError(Exception):
+    """Raised when every configured model fails."""
+    pass
+
+
+def get_api_key():
+    from .models import SystemConfig
+    config = SystemConfig.get_solo()
+    return config.openrouter_api_key or os.environ.get('OPENROUTER_API_KEY')
+
+
+def is_configured(api_key) -> bool:
+    return bool(api_key) or settings.LLM_PROVIDER == 'stub'
+
+
+# ============================================================================
+# PROVIDERS
+# ============================================================================
+
+def _parse_sse_line(line: str):
+    """Return the decoded chunk, 'DONE', or None for lines to skip."""
+    if not line.startswith('data: '):
+        return None
+    data = line[6:].strip()
+    if data == '[DONE]':
+        return 'DONE'
+    try:
+        return json.loads(data)
+    except json.JSONDecodeError:
+        return None
+
+
+def _chunk_content(chunk: dict, usage: dict) -> str:
+    if chunk.get('usage'):
+        usage['prompt_tokens'] = chunk['usage'].get('prompt_tokens', 0)
+        usage['completion_tokens'] = chunk['usage'].get('completion_tokens', 0)
+    choices = chunk.get('choices') or []
+    if choices:
+        return choices[0].get('delta', {}).get('content', '') or ''
+    return ''
+
+
+class OpenRouterProvider:
+    name = 'openrouter'
+
+    def __init__(self, api_key: str, title: str):
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://project-mizan.com",
+            "X-Title": title,
+        }
+
+    def _payload(self, messages, model, params, stream):
+        payload = {"model": model, "messages": messages, **params}
+        if stream:
+            payload["stream"] = True
+            payload["stream_options"] = {"include_usage": True}
+        return payload
+
+    def stream(self, messages, model, usage, **params):
+        """Yield content deltas; token usage is written into `usage`."""
+        client = get_http_client()
+        with client.stream(
+            "POST", OPENROUTER_URL, headers=self.headers,
+            json=self._payload(messages, model, params, stream=True), timeout=settings.LLM_TIMEOUT
+        ) as response:
+            if response.status_code != 200:
+                raise LLMError(f"{model}: HTTP {response.status_code}")
+            for line in response.iter_lines():
+                chunk = _parse_sse_line(line)
+                if chunk == 'DONE':
+                    break
+                if chunk:
+                    content = _chunk_content(chunk, usage)
+                    if content:
+                        yield content
+
+    async def astream(self, messages, model, usage, **params):
+        client = get_async_http_client()
+        async with client.stream(
+            "POST", OPENROUTER_URL, headers=self.headers,
+            json=self._payload(messages, model, params, stream=True), timeout=settings.LLM_TIMEOUT
+        ) as response:
+            if response.status_code != 200:
+                raise LLMError(f"{model}: HTTP {response.status_code}")
+            async for line in response.aiter_lines():
+                chunk = _parse_sse_line(line)
+                if chunk == 'DONE':
+                    break
+                if chunk:
+                    content = _chunk_content(chunk, usage)
+                    if content:
+                        yield content
+
+    def complete(self, messages, model, usage, **params) -> str:
+        response = get_http_client().post(
+            OPENROUTER_URL, headers=self.headers,
+            json=self._payload(messages, model, params, stream=False), timeout=settings.LLM_TIMEOUT
+        )
+        if response.status_code != 200:
+            raise LLMError(f"{model}: HTTP {response.status_code}")
+        data = response.json()
+        _chunk_content(data, usage)
+        return data['choices'][0]['message']['content']
+
+
+class StubProvider:
+    """Deterministic local provider (LLM_PROVIDER=stub)."""
+    name = 'stub'
+
+    def reply(self, messages) -> str:
+        question = next((m['content'] for m in reversed(messages) if m.get('role') == 'user'), '')
+        return f"Stub answer to: {question}"
+
+    def _account(self, messages, reply, usage):
+        usage['prompt_tokens'] = sum(len(str(m.get('content', '')).split()) for m in messages)
+        usage['completion_tokens'] = len(reply.split())
+
+    def stream(self, messages, model, usage, **params):
+        reply = self.reply(messages)
+        self._account(messages, reply, usage)
+        yield from split_for_replay(reply)
+
+    async def astream(self, messages, model, usage, **params):
+        reply = self.reply(messages)
+        self._account(messages, reply, usage)
+        for part in split_for_replay(reply):
+            yield part
+
+    def complete(self, messages, model, usage, **params) -> str:
+        reply = self.reply(messages)
+        self._account(messages, reply, usage)
+        return reply
+
+
+def get_provider(api_key, title):
+    if settings.LLM_PROVIDER == 'stub':
+        return StubProvider()
+    return OpenRouterProvider(api_key, title)
+
+
+# ============================================================================
+# CACHE & ACCOUNTING
+# ============================================================================
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_prompt(text: str) -> str:
+    """Case, punctuation and whitespace-insensitive form of a question."""
+    text = _PUNCTUATION_RE.sub(' ', text.lower())
+    return _SPACE_RE.sub(' ', text).strip()
+
+
+def record_llm_usage(schema_name: str, **counts) -> None:
+    """Add to today's per-tenant counters (see USAGE_FIELDS)."""
+    day = timezone.now().date().isoformat()
+    for field, amount in counts.items():
+        if not amount:
+            continue
+        key = tenant_cache_key('llm_usage', day, field, schema_name=schema_name)
+        cache.add(key, 0, USAGE_TTL)
+        try:
+            cache.incr(key, int(amount))
+        except ValueError:
+            cache.set(key, int(amount), USAGE_TTL)
+
+
+def get_llm_usage(schema_name=None, days: int = 7) -> list:
+    """Daily usage for a tenant, newest first."""
+    schema_name = schema_name or connection.schema_name
+    today = timezone.now().date()
+    result = []
+    for offset in range(days):
+        day = (today - timedelta(days=offset)).isoformat()
+        keys = {f: tenant_cache_key('llm_usage', day, f, schema_name=schema_name) for f in USAGE_FIELDS}
+        values = cache.get_many(keys.values())
+        row = {field: values.get(key, 0) for field, key in keys.items()}
+        if row['requests']:
+            row['avg_latency_ms'] = round(row['latency_ms'] / row['requests'])
+            answered = row['requests'] - row['cache_hits']
+            row['avg_ttft_ms'] = round(row['ttft_ms'] / answered) if answered else 0
+            row['date'] = day
+            result.append(row)
+    return result
+
+
+# ============================================================================
+# GATEWAY
+# ============================================================================
+
+class LLMGateway:
+    """
+    One Basira endpoint's view of the LLM: its title, generation params
+    and cache scope. Build one per request.
+    """
+
+    def __init__(self, api_key, title: str, max_tokens: int, temperature: float, tenant_scoped: bool = False):
+        self.title = title
+        self.provider = get_provider(api_key, title)
+        self.params = {'max_tokens': max_tokens, 'temperature': temperature}
+        self.models = [settings.LLM_MODEL] + [m for m in settings.LLM_FALLBACK_MODELS if m != settings.LLM_MODEL]
+        self.tenant_scoped = tenant_scoped
+        # Captured up front: async generators run outside the request's connection
+        self.schema_name = connection.schema_name
+
+    def cache_key(self, messages, cache_context):
+        """
+        Key for a cacheable request, or None. Only first-turn questions are
+        cached, since follow-ups depend on the conversation. cache_context
+        stands in for the system prompt: the caller passes the template and
+        whatever it was rendered with, and must keep per-user details (name,
+        time of day) out of a prompt it asks to cache.
+        """
+        if cache_context is None or not settings.LLM_CACHE_TTL:
+            return None
+        if any(m.get('role') == 'assistant' for m in messages):
+            return None
+        question = next((m['content'] for m in reversed(messages) if m.get('role') == 'user'), '')
+        digest = hashlib.sha256('|'.join([
+            self.provider.name,
+            self.models[0],
+            hashlib.sha256(cache_context.encode()).hexdigest(),
+            normalize_prompt(question),
+        ]).encode()).hexdigest()
+        if self.tenant_scoped:
+            return tenant_cache_key('llm_answer', digest, schema_name=self.schema_name)
+        return f"llm_answer:{digest}"
+
+    def _finish(self, started, usage, error=False, ttft=None):
+        metrics.Batch().inc(
+            'llm_requests_total', provider=self.provider.name, outcome='error' if error else 'ok'
+        ).observe(
+            'llm_request_duration_seconds', time.monotonic() - started, provider=self.provider.name
+        ).inc(
+            'llm_tokens_total', usage.get('prompt_tokens', 0), tenant=self.schema_name, kind='prompt'
+        ).inc(
+            'llm_tokens_total', usage.get('completion_tokens', 0), tenant=self.schema_name, kind='completion'
+        ).write()
+        record_llm_usage(
+            self.schema_name,
+            requests=1,
+            errors=1 if error else 0,
+            prompt_tokens=usage.get('prompt_tokens', 0),
+            completion_tokens=usage.get('completion_tokens', 0),
+            latency_ms=(time.monotonic() - started) * 1000,
+            ttft_ms=(ttft or 0) * 1000,
+        )
+
+    def _record_cache_hit(self):
+        record_llm_usage(self.schema_name, requests=1, cache_hits=1)
+        metrics.inc('llm_requests_total', provider=self.provider.name, outcome='cached')
+
+    def _replay(self, cached):
+        self._record_cache_hit()
+        for part in split_for_replay(cached['content']):
+            yield sse_event({'content': part})
+        yield SSE_DONE
+
+    def _deltas(self, messages, usage, state):
+        """Provider deltas, falling back to the next model until one starts streaming."""
+        error = None
+        for model in self.models:
+            started = False
+            try:
+                for content in self.provider.stream(messages, model, usage, **self.params):
+                    started = True
+                    state['model'] = model
+                    yield content
+                return
+            except LLMError as e:
+                if started:
+                    raise
+                error = e
+            except Exception as e:
+                if started:
+                    raise
+                error = LLMError(f"{model}: {e}")
+            logger.warning(f"LLM model failed, trying fallback: {error}")
+        raise error
+
+    async def _adeltas(self, messages, usage, state):
+        error = None
+        for model in self.models:
+            started = False
+            try:
+                async for content in self.provider.astream(messages, model, usage, **self.params):
+                    started = True
+                    state['model'] = model
+                    yield content
+                return
+            except LLMError as e:
+                if started:
+                    raise
+                error = e
+            except Exception as e:
+                if started:
+                    raise
+                error = LLMError(f"{model}: {e}")
+            logger.warning(f"LLM model failed, trying fallback: {error}")
+        raise error
+
+    def _generate(self, messages, key):
+        usage, state = {}, {}
+        monitor = StreamMonitor(self.title)
+
+        def on_complete(text):
+            if key and text:
+                cache.set(key, {'content': text, 'model': state.get('model')}, settings.LLM_CACHE_TTL)
+
+        try:
+            yield from relay_stream(self._deltas(messages, usage, state), monitor, on_complete)
+        finally:
+            self._finish(monitor.started, usage, bool(monitor.error), monitor.ttft)
+
+    async def _agenerate(self, messages, key):
+        usage, state = {}, {}
+        monitor = StreamMonitor(self.title)
+
+        async def on_complete(text):
+            if key and text:
+                await cache.aset(key, {'content': text, 'model': state.get('model')}, settings.LLM_CACHE_TTL)
+
+        try:
+            async for frame in arelay_stream(self._adeltas(messages, usage, state), monitor, on_complete):
+                yield frame
+        finally:
+            # A few small cache writes; not worth a thread hop
+            self._finish(monitor.started, usage, bool(monitor.error), monitor.ttft)
+
+    def streaming_response(self, messages, cache_context=None, use_async=False) -> StreamingHttpResponse:
+        """
+        SSE response for `messages`. Cached answers are replayed without
+        calling the provider; under ASGI (use_async) the upstream stream runs
+        on the event loop.
+        """
+        key = self.cache_key(messages, cache_context)
+        cached = cache.get(key) if key else None
+        if cached:
+            response = sse_response(self._replay(cached))
+            response['X-Basira-Cache'] = 'HIT'
+            return response
+        if use_async:
+            return sse_response(self._agenerate(messages, key))
+        return sse_response(self._generate(messages, key))
+
+    def complete(self, messages, cache_context=None) -> dict:
+        """Non-streaming answer: {'response', 'model', 'cached'}. Raises LLMError."""
+        key = self.cache_key(messages, cache_context)
+        cached = cache.get(key) if key else None
+        if cached:
+            self._record_cache_hit()
+            return {'response': cached['content'], 'model': cached['model'], 'cached': True}
+
+        started = time.monotonic()
+        usage, error = {}, None
+        for model in self.models:
+            try:
+                content = self.provider.complete(messages, model, usage, **self.params)
+            except Exception as e:
+                error = e
+                logger.warning(f"LLM model {model} failed: {e}")
+                continue
+            self._finish(started, usage)
+            if key:
+                cache.set(key, {'content': content, 'model': model}, settings.LLM_CACHE_TTL)
+            return {'response': content, 'model': model, 'cached': False}
+
+        self._finish(started, usage, error=True)
+        raise LLMError(str(error))
@@ -0,0 +1,26 @@
+"""
+JSON log formatter (LOG_FORMAT=json): one object per line, with any
+`extra={...}` fields passed to the logger merged in.
+"""
+import json
+import logging
+from datetime import datetime, timezone
+
+# Attributes every LogRecord has; anything else came from `extra`
+_RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            'time': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
@@ -0,0 +1,139 @@
+"""
+Run the load-testing scenarios in benchmarks/ against a running stack.
+
+The server should run with TELEGRAM_FAKE_SEND=true (portal OTPs are read
+back from the fake outbox) and LLM_PROVIDER=stub (Basira answers locally),
+sharing its cache with this command. Fill the tenant first with
+generate_tenant_data.
+
+Usage:
+    python manage.py run_benchmarks --base-url http://demo.localhost:8000 --duration 30 --concurrency 20
+    python manage.py run_benchmarks --base-url ... --compare benchmarks/results/1.4.0-20250101-120000.json
+"""
+import asyncio
+import secrets
+from pathlib import Path
+from urllib.parse import urlparse
+
+import httpx
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django_tenants.utils import get_tenant_domain_model, schema_context
+
+from apps.shared.telegram import is_demo_tenant
+
+BENCH_USERNAME = 'bench_admin'
+
+
+class Command(BaseCommand):
+    help = 'Load-test API hot paths and report p50/p95/p99 latency and RPS per scenario'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', required=True, help="Tenant URL, e.g. http://demo.localhost:8000")
+        parser.add_argument('--schema', help='Tenant schema (default: looked up from the base URL host)')
+        parser.add_argument('--scenarios', help='Comma-separated scenario names (default: all)')
+        parser.add_argument('--concurrency', type=int, default=10, help='Concurrent workers per scenario')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds per scenario')
+        parser.add_argument('--requests', type=int, help='Stop a scenario after this many operations')
+        parser.add_argument('--label', default='', help='Free-form label stored with the results')
+        parser.add_argument('--output', help='Results file (default: benchmarks/results/<version>-<time>.json)')
+        parser.add_argument('--compare', help='Earlier results file to compare against')
+
+    def handle(self, *args, **options):
+        from benchmarks import runner
+        from benchmarks.scenarios import SCENARIOS
+
+        names = [n.strip() for n in (options['scenarios'] or ','.join(SCENARIOS)).split(',') if n.strip()]
+        unknown = [n for n in names if n not in SCENARIOS]
+        if unknown:
+            raise CommandError(f"Unknown scenario(s): {', '.join(unknown)}. Available: {', '.join(SCENARIOS)}")
+        if 'portal_login' in names and not settings.TELEGRAM_FAKE_SEND:
+            self.stdout.write(self.style.WARNING(
+                'TELEGRAM_FAKE_SEND is off here; portal_login needs it on for both the server and this command'
+            ))
+
+        base_url = options['base_url'].rstrip('/')
+        schema = options['schema'] or self._schema_for(base_url)
+        context = self._prepare(schema)
+        context['base_url'] = base_url
+        context['admin_token'] = self._admin_token(base_url, context.pop('admin_password'))
+
+        results = {}
+        for name in names:
+            self.stdout.write(f"Running {name} ({options['concurrency']} workers)...")
+            results[name] = asyncio.run(runner.run_scenario(
+                SCENARIOS[name], context, concurrency=options['concurrency'],
+                duration=options['duration'], max_requests=options['requests'],
+            ))
+            for sample in results[name].get('error_samples', []):
+                self.stdout.write(self.style.WARNING(f"  {sample}"))
+
+        self.stdout.write('\n' + runner.format_table(results))
+
+        version_file = Path(settings.BASE_DIR) / 'VERSION'
+        version = version_file.read_text().strip() if version_file.exists() else 'dev'
+        path = runner.save_results(results, {
+            'version': version, 'label': options['label'], 'schema': schema, 'base_url': base_url,
+            'concurrency': options['concurrency'], 'duration': options['duration'],
+            'started_at': timezone.now().isoformat(),
+        }, options['output'])
+        self.stdout.write(self.style.SUCCESS(f"\nSaved results to {path}"))
+
+        if options['compare']:
+            self.stdout.write(f"\nCompared with {options['compare']}:")
+            for name, metric, old, new, change in runner.compare(results, runner.load_results(options['compare'])):
+                delta = f"{change:+.1f}%" if change is not None else 'n/a'
+                self.stdout.write(f"  {name:<20} {metric:<7} {old:>10} -> {new:>10} ({delta})")
+
+    def _schema_for(self, base_url):
+        host = urlparse(base_url).hostname
+        domain = get_tenant_domain_model().objects.select_related('tenant').filter(domain=host).first()
+        if not domain:
+            raise CommandError(f"No tenant for host '{host}'; pass --schema")
+        return domain.tenant.schema_name
+
+    def _prepare(self, schema):
+        """Benchmark admin, portal members with Telegram links, ledgers and search terms."""
+        from apps.jamath.models import Household, Ledger, Member, TelegramLink
+
+        with schema_context(schema):
+            password = secrets.token_urlsafe(16)
+            User = get_user_model()
+            user, _ = User.objects.get_or_create(username=BENCH_USERNAME, defaults={'email': 'bench@localhost'})
+            user.is_staff = user.is_superuser = True
+            user.set_password(password)
+            user.save()
+
+            links = dict(TelegramLink.objects.filter(is_verified=True).values_list('phone_number', 'chat_id')[:5000])
+            members = [
+                (phone, links[phone])
+                for phone in Household.objects.filter(phone_number__in=list(links)).values_list('phone_number', flat=True)[:500]
+            ]
+            ledgers = {code: pk for code, pk in Ledger.objects.filter(code__in=['1001', '3001']).values_list('code', 'id')}
+            if len(ledgers) < 2:
+                raise CommandError("Ledgers 1001/3001 missing; run seed_ledger or generate_tenant_data first")
+            search_terms = list(Household.objects.order_by('?').values_list('membership_id', flat=True)[:50])
+            search_terms += [name.split()[0] for name in Member.objects.order_by('?').values_list('full_name', flat=True)[:50]]
+            # Demo tenants skip sending and accept a fixed OTP
+            fixed_otp = '123456' if is_demo_tenant() else None
+
+        if not members:
+            self.stdout.write(self.style.WARNING('No households with verified Telegram links; portal_login will fail'))
+        today = timezone.localdate()
+        return {
+            'schema': schema,
+            'admin_password': password,
+            'members': members or [('', '')],
+            'search_terms': search_terms or ['a'],
+            'ledgers': {'cash': ledgers['1001'], 'income': ledgers['3001']},
+            'fy_year': today.year if today.month >= 4 else today.year - 1,
+            'fixed_otp': fixed_otp,
+        }
+
+    def _admin_token(self, base_url, password):
+        response = httpx.post(f"{base_url}/api/token/", json={'username': BENCH_USERNAME, 'password': password}, timeout=30)
+        if response.status_code != 200:
+            raise CommandError(f"Could not log in as {BENCH_USERNAME}: HTTP {response.status_code} {response.text[:200]}")
+        return response.json()['access']
@@ -0,0 +1,318 @@
+"""
+Prometheus metrics (METRICS_ENABLED), served in the text exposition format
+at /metrics.
+
+Counters and histograms are kept in Redis (METRICS_REDIS_URL, the Celery
+broker by default) so every gunicorn worker and Celery worker adds to the
+same series. METRICS_REDIS_URL=memory:// keeps them in-process instead
+(single-process development and tests).
+
+Gauges (Celery queue depth, Postgres connections) are read at scrape time.
+Ratios such as the cache hit ratio are left to PromQL:
+
+    sum(rate(digitaljamath_cache_requests_total{result="hit"}[5m]))
+      / sum(rate(digitaljamath_cache_requests_total[5m]))
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'digitaljamath_'
+KEY_PREFIX = 'metrics:'
+
+# Request/task/LLM latency buckets, in seconds
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# name -> (type, help, buckets)
+METRICS = {
+    'http_requests_total': ('counter', 'HTTP requests by route, tenant and status class', None),
+    'http_request_duration_seconds': ('histogram', 'HTTP request latency by route and tenant', LATENCY_BUCKETS),
+    'cache_requests_total': ('counter', 'Cache lookups made while serving requests, by result', None),
+    'http_client_requests_total': ('counter', 'Outbound HTTP calls (Telegram, OpenRouter, payment gateways) by host', None),
+    'http_client_duration_seconds': ('histogram', 'Outbound HTTP time to response headers, by host', LATENCY_BUCKETS),
+    'celery_tasks_total': ('counter', 'Celery tasks finished, by task and state', None),
+    'celery_task_duration_seconds': ('histogram', 'Celery task run time', LATENCY_BUCKETS),
+    'telegram_messages_total': ('counter', 'Telegram sends by result (ok, rate_limited, error)', None),
+    'llm_requests_total': ('counter', 'Basira LLM requests by provider and outcome (ok, error, cached)', None),
+    'llm_request_duration_seconds': ('histogram', 'Basira LLM request latency, including streaming', LATENCY_BUCKETS),
+    'llm_tokens_total': ('counter', 'Basira LLM tokens by tenant and kind (prompt, completion)', None),
+}
+
+
+def is_enabled() -> bool:
+    return settings.METRICS_ENABLED
+
+
+# ============================================================================
+# STORAGE
+# ============================================================================
+
+class MemoryStore:
+    def __init__(self):
+        self.data = defaultdict(lambda: defaultdict(float))
+        self.lock = threading.Lock()
+
+    def add(self, ops):
+        with self.lock:
+            for name, field, amount in ops:
+                self.data[name][field] += amount
+
+    def dump(self) -> dict:
+        with self.lock:
+            return {name: dict(fields) for name, fields in self.data.items()}
+
+
+class RedisStore:
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    def add(self, ops):
+        pipe = self.client.pipeline(transaction=False)
+        for name, field, amount in ops:
+            pipe.hincrbyfloat(KEY_PREFIX + name, field, amount)
+        pipe.execute()
+
+    def dump(self) -> dict:
+        pipe = self.client.pipeline(transaction=False)
+        for name in METRICS:
+            pipe.hgetall(KEY_PREFIX + name)
+        return {
+            name: {field.decode(): float(value) for field, value in fields.items()}
+            for name, fields in zip(METRICS, pipe.execute())
+        }
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        url = settings.METRICS_REDIS_URL
+        _store = MemoryStore() if url.startswith('memory://') else RedisStore(url)
+    return _store
+
+
+def reset_store() -> None:
+    """Forget the store (tests, or after changing METRICS_REDIS_URL)."""
+    global _store
+    _store = None
+
+
+# ============================================================================
+# RECORDING
+# ============================================================================
+
+def _labels(labels: dict) -> str:
+    parts = []
+    for key in sorted(labels):
+        value = str(labels[key]).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{value}"')
+    return ','.join(parts)
+
+
+class Batch:
+    """Collect several updates and write them in one round trip."""
+
+    def __init__(self):
+        self.ops = []
+
+    def inc(self, name, amount=1, **labels):
+        self.ops.append((name, _labels(labels), amount))
+        return self
+
+    def observe(self, name, seconds, **labels):
+        series = _labels(labels)
+        bucket = next((b for b in METRICS[name][2] if seconds <= b), '+Inf')
+        self.ops += [
+            (name, f'{series}\tle={bucket}', 1),
+            (name, f'{series}\tsum', seconds),
+            (name, f'{series}\tcount', 1),
+        ]
+        return self
+
+    def write(self) -> None:
+        if not self.ops or not is_enabled():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            _add(self.ops)
+        else:
+            # Called from async code (async httpx, ASGI streams): keep the
+            # Redis round trip off the event loop
+            loop.run_in_executor(None, _add, self.ops)
+
+
+def _add(ops) -> None:
+    try:
+        get_store().add(ops)
+    except Exception as e:
+        # Metrics must never break the request or task being measured
+        logger.warning(f"Could not record metrics: {e}")
+
+
+def inc(name, amount=1, **labels) -> None:
+    if is_enabled():
+        Batch().inc(name, amount, **labels).write()
+
+
+def observe(name, seconds, **labels) -> None:
+    if is_enabled():
+        Batch().observe(name, seconds, **labels).write()
+
+
+# ============================================================================
+# EXPOSITION
+# ============================================================================
+
+def _number(value) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _series(name, labels, value, extra='') -> str:
+    labels = ','.join(part for part in (labels, extra) if part)
+    return f"{PREFIX}{name}{{{labels}}} {_number(value)}" if labels else f"{PREFIX}{name} {_number(value)}"
+
+
+def _render_histogram(name, fields, buckets) -> list:
+    grouped = defaultdict(dict)
+    for field, value in fields.items():
+        labels, _, part = field.partition('\t')
+        grouped[labels][part] = value
+    lines = []
+    for labels, parts in sorted(grouped.items()):
+        running = 0
+        for bucket in [*buckets, '+Inf']:
+            running += parts.get(f'le={bucket}', 0)
+            lines.append(_series(f'{name}_bucket', labels, running, f'le="{bucket}"'))
+        lines.append(_series(f'{name}_sum', labels, parts.get('sum', 0)))
+        lines.append(_series(f'{name}_count', labels, parts.get('count', 0)))
+    return lines
+
+
+def collect_gauges() -> list:
+    """(name, help, {labels: value}) read at scrape time; sources that are unavailable are skipped."""
+    gauges = []
+    try:
+        depth, queued = get_celery_queue_depth()
+        gauges.append(('celery_queue_length', 'Messages waiting in each Celery queue', depth))
+        gauges.append(('celery_queued_tasks', 'Waiting Celery messages by task (first 1000 per queue)', queued))
+    except Exception as e:
+        logger.warning(f"Could not read Celery queue depth: {e}")
+    try:
+        from .db import get_server_connection_stats
+        connections = get_server_connection_stats()
+        gauges.append(('db_connections', 'Postgres connections to this database by state',
+                       {_labels({'state': state}): count for state, count in connections.items()}))
+    except Exception as e:
+        logger.warning(f"Could not read database connection stats: {e}")
+    return gauges
+
+
+def get_celery_queue_depth():
+    """
+    ({queue: length}, {task: waiting}) from the Redis broker. Tasks are
+    counted from the head of each queue only, so the scrape stays cheap.
+    """
+    import redis
+    broker_url = settings.CELERY_BROKER_URL
+    if not broker_url.startswith(('redis://', 'rediss://')):
+        return {}, {}
+    client = redis.Redis.from_url(broker_url, socket_timeout=1, socket_connect_timeout=1)
+    depth, queued = {}, defaultdict(int)
+    for queue in settings.METRICS_CELERY_QUEUES:
+        depth[_labels({'queue': queue})] = client.llen(queue)
+        for raw in client.lrange(queue, 0, 999):
+            try:
+                task = json.loads(raw).get('headers', {}).get('task', 'unknown')
+            except ValueError:
+                task = 'unknown'
+            queued[_labels({'task': task})] += 1
+    return depth, dict(queued)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text format (version 0.0.4)."""
+    data = get_store().dump()
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines += [f"# HELP {PREFIX}{name} {help_text}", f"# TYPE {PREFIX}{name} {kind}"]
+        fields = data.get(name, {})
+        if kind == 'histogram':
+            lines += _render_histogram(name, fields, buckets)
+        else:
+            lines += [_series(name, labels, value) for labels, value in sorted(fields.items())]
+    for name, help_text, values in collect_gauges():
+        lines += [f"# HELP {PREFIX}{name} {help_text}", f"# TYPE {PREFIX}{name} gauge"]
+        lines += [_series(name, labels, value) for labels, value in sorted(values.items())]
+    return '\n'.join(lines) + '\n'
+
+
+# ============================================================================
+# MIDDLEWARE & CELERY
+# ============================================================================
+
+class MetricsMiddleware:
+    """
+    Request count and latency per route pattern (not raw path, to keep the
+    number of series bounded), tenant and status class, plus cache lookups.
+    Place it right after TenantMainMiddleware (after the profiling
+    middleware when both are on; it then shares its request profile).
+    """
+
+    def __init__(self, get_response):
+        from .profiling import instrument
+        self.get_response = get_response
+        instrument()
+
+    def __call__(self, request):
+        from . import profiling
+
+        profile, token = profiling.current_profile(), None
+        if profile is None:
+            profile = profiling.RequestProfile(request)
+            token = profiling.activate(profile)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                profiling.deactivate(token)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match and match.route else 'unmatched'
+        tenant = getattr(getattr(request, 'tenant', None), 'schema_name', '')
+        labels = {'method': request.method, 'route': route, 'tenant': tenant}
+        batch = Batch().inc('http_requests_total', status=f"{response.status_code // 100}xx", **labels)
+        batch.observe('http_request_duration_seconds', elapsed, **labels)
+        if profile.cache_hits:
+            batch.inc('cache_requests_total', profile.cache_hits, result='hit', tenant=tenant)
+        if profile.cache_misses:
+            batch.inc('cache_requests_total', profile.cache_misses, result='miss', tenant=tenant)
+        batch.write()
+        return response
+
+
+_task_started = {}
+
+
+def task_started(task_id) -> None:
+    _task_started[task_id] = time.perf_counter()
+
+
+def task_finished(task_id, task_name, state) -> None:
+    started = _task_started.pop(task_id, None)
+    batch = Batch().inc('celery_tasks_total', task=task_name, state=state or 'UNKNOWN')
+    if started is not None:
+        batch.observe('celery_task_duration_seconds', time.perf_counter() - started, task=task_name)
+    batch.write()
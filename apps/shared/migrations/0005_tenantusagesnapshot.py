@@ -0,0 +1,69 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shared", "0004_systemconfig"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TenantUsageSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("snapshot_date", models.DateField()),
+                ("households", models.IntegerField(default=0)),
+                ("verified_households", models.IntegerField(default=0)),
+                ("zakat_eligible_households", models.IntegerField(default=0)),
+                ("members", models.IntegerField(default=0, help_text="Living members")),
+                ("active_subscriptions", models.IntegerField(default=0)),
+                (
+                    "receipts_count",
+                    models.IntegerField(
+                        default=0, help_text="All-time receipt vouchers"
+                    ),
+                ),
+                (
+                    "receipts_volume",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "receipts_volume_30d",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("journal_items", models.IntegerField(default=0)),
+                ("computed_at", models.DateTimeField(auto_now=True)),
+                (
+                    "duration_ms",
+                    models.IntegerField(
+                        default=0, help_text="Time taken to compute this snapshot"
+                    ),
+                ),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="usage_snapshots",
+                        to="shared.client",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Tenant Usage Snapshot",
+                "ordering": ["-snapshot_date", "tenant"],
+                "unique_together": {("tenant", "snapshot_date")},
+            },
+        ),
+    ]
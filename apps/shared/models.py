@@ -52,3 +52,39 @@ class SystemConfig(models.Model):
     def get_solo(cls):
         obj, created = cls.objects.get_or_create(pk=1)
         return obj
+
+
+class TenantUsageSnapshot(models.Model):
+    """
+    Daily per-tenant usage aggregates, rolled up into the public schema.
+    Populated by the `rollup_platform_stats` Celery task so platform
+    dashboards never have to fan out across tenant schemas at read time.
+    """
+    tenant = models.ForeignKey(Client, related_name='usage_snapshots', on_delete=models.CASCADE)
+    snapshot_date = models.DateField()
+
+    # Census
+    households = models.IntegerField(default=0)
+    verified_households = models.IntegerField(default=0)
+    zakat_eligible_households = models.IntegerField(default=0)
+    members = models.IntegerField(default=0, help_text="Living members")
+
+    # Membership
+    active_subscriptions = models.IntegerField(default=0)
+
+    # Mizan Ledger
+    receipts_count = models.IntegerField(default=0, help_text="All-time receipt vouchers")
+    receipts_volume = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    receipts_volume_30d = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    journal_items = models.IntegerField(default=0)
+
+    computed_at = models.DateTimeField(auto_now=True)
+    duration_ms = models.IntegerField(default=0, help_text="Time taken to compute this snapshot")
+
+    class Meta:
+        unique_together = ('tenant', 'snapshot_date')
+        ordering = ['-snapshot_date', 'tenant']
+        verbose_name = "Tenant Usage Snapshot"
+
+    def __str__(self):
+        return f"{self.tenant.schema_name} @ {self.snapshot_date}"
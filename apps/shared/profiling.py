@@ -0,0 +1,268 @@
+"""
+Opt-in request profiling (PROFILING_ENABLED).
+
+For every request the middleware records wall time, DB query count and
+time, cache hits/misses, outbound HTTP time (httpx and requests: Telegram,
+OpenRouter, payment gateways) and the tenant schema. It then:
+
+- logs one structured line to the `digitaljamath.profiling` logger
+- adds a Server-Timing header (visible in the browser's network panel)
+- logs any SQL statement slower than PROFILING_SLOW_SQL_MS, with its view
+- for a PROFILING_SAMPLE_RATE share of requests, runs a profiler and keeps
+  the trace in PROFILING_DIR when the request is slower than
+  PROFILING_SLOW_MS. pyinstrument is used if installed, else cProfile.
+
+Cache and HTTP timing patch the client classes once per process, and only
+when this middleware (or the metrics middleware) is enabled.
+"""
+import contextvars
+import logging
+import random
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger('digitaljamath.profiling')
+
+_current = contextvars.ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    def __init__(self, request):
+        self.method = request.method
+        self.path = request.path
+        self.view = ''
+        self.db_count = 0
+        self.db_ms = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.http_count = 0
+        self.http_ms = 0.0
+        self.start = time.perf_counter()
+
+    def as_dict(self, status, total_ms) -> dict:
+        return {
+            'method': self.method, 'path': self.path, 'view': self.view, 'status': status,
+            'schema': getattr(connection, 'schema_name', ''), 'total_ms': round(total_ms, 1),
+            'db_queries': self.db_count, 'db_ms': round(self.db_ms, 1),
+            'cache_hits': self.cache_hits, 'cache_misses': self.cache_misses,
+            'http_calls': self.http_count, 'http_ms': round(self.http_ms, 1),
+        }
+
+    def server_timing(self, total_ms) -> str:
+        return ', '.join([
+            f'db;dur={self.db_ms:.1f};desc="{self.db_count} queries"',
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            f'http;dur={self.http_ms:.1f};desc="{self.http_count} calls"',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+
+def current_profile():
+    """The profile of the request being served, or None."""
+    return _current.get()
+
+
+def activate(profile):
+    """Make `profile` current; pass the returned token to deactivate()."""
+    return _current.set(profile)
+
+
+def deactivate(token) -> None:
+    _current.reset(token)
+
+
+# ============================================================================
+# INSTRUMENTATION
+# ============================================================================
+
+def record_http(elapsed_ms: float, host: str = None) -> None:
+    profile = _current.get()
+    if profile is not None:
+        profile.http_count += 1
+        profile.http_ms += elapsed_ms
+    if host:
+        from . import metrics
+        if metrics.is_enabled():
+            metrics.Batch().inc('http_client_requests_total', host=host).observe(
+                'http_client_duration_seconds', elapsed_ms / 1000, host=host
+            ).write()
+
+
+def _httpx_host(transport, request, *args, **kwargs):
+    return request.url.host
+
+
+def _requests_host(session, request, *args, **kwargs):
+    return urlsplit(request.url).hostname
+
+
+def _timed(send, host_of):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return send(*args, **kwargs)
+        finally:
+            record_http((time.perf_counter() - start) * 1000, host_of(*args, **kwargs))
+    return wrapper
+
+
+def _timed_async(send, host_of):
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await send(*args, **kwargs)
+        finally:
+            record_http((time.perf_counter() - start) * 1000, host_of(*args, **kwargs))
+    return wrapper
+
+
+def _counted_get(get):
+    _missing = object()
+
+    def wrapper(self, key, default=None, version=None):
+        value = get(self, key, _missing, version=version)
+        profile = _current.get()
+        if profile is not None:
+            if value is _missing:
+                profile.cache_misses += 1
+            else:
+                profile.cache_hits += 1
+        return default if value is _missing else value
+    return wrapper
+
+
+_instrumented = False
+
+
+def instrument() -> None:
+    """
+    Patch the HTTP clients and the cache backend to report into the current
+    profile (and outbound HTTP into metrics). Used by the profiling and
+    metrics middleware and by Celery workers when metrics are on.
+    """
+    global _instrumented
+    if _instrumented:
+        return
+    _instrumented = True
+
+    import httpx
+    httpx.HTTPTransport.handle_request = _timed(httpx.HTTPTransport.handle_request, _httpx_host)
+    httpx.AsyncHTTPTransport.handle_async_request = _timed_async(
+        httpx.AsyncHTTPTransport.handle_async_request, _httpx_host
+    )
+    try:
+        import requests
+        requests.Session.send = _timed(requests.Session.send, _requests_host)
+    except ImportError:
+        pass
+
+    from django.core.cache import caches
+    backend = type(caches['default'])
+    backend.get = _counted_get(backend.get)
+
+
+# ============================================================================
+# MIDDLEWARE
+# ============================================================================
+
+class _QueryTimer:
+    """connection.execute_wrapper: time every query and log the slow ones."""
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.slow_ms = settings.PROFILING_SLOW_SQL_MS
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.profile.db_count += 1
+            self.profile.db_ms += elapsed
+            if elapsed >= self.slow_ms:
+                logger.warning(
+                    f"Slow SQL ({elapsed:.0f} ms) in {self.profile.view or self.profile.path} "
+                    f"[{getattr(connection, 'schema_name', '')}]: {sql[:2000]}",
+                    extra={'event': 'slow_sql', 'view': self.profile.view, 'duration_ms': round(elapsed, 1)},
+                )
+
+
+def _start_profiler():
+    try:
+        from pyinstrument import Profiler
+        profiler = Profiler()
+    except ImportError:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+    profiler.start()
+    return profiler
+
+
+def _save_trace(profiler, profile) -> str:
+    directory = Path(settings.PROFILING_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{profile.method}-{profile.path.strip('/').replace('/', '_')[:80] or 'root'}"
+    if hasattr(profiler, 'output_html'):
+        path = directory / f"{name}.html"
+        path.write_text(profiler.output_html())
+    else:
+        path = directory / f"{name}.prof"
+        profiler.dump_stats(str(path))
+    return str(path)
+
+
+def _stop_profiler(profiler):
+    if hasattr(profiler, 'stop'):
+        profiler.stop()
+    else:
+        profiler.disable()
+
+
+class RequestProfilingMiddleware:
+    """See the module docstring. Place it right after TenantMainMiddleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrument()
+
+    def __call__(self, request):
+        profile = RequestProfile(request)
+        token = activate(profile)
+        profiler = _start_profiler() if random.random() < settings.PROFILING_SAMPLE_RATE else None
+        try:
+            with connection.execute_wrapper(_QueryTimer(profile)):
+                response = self.get_response(request)
+        finally:
+            if profiler is not None:
+                _stop_profiler(profiler)
+            deactivate(token)
+
+        total_ms = (time.perf_counter() - profile.start) * 1000
+        data = profile.as_dict(response.status_code, total_ms)
+        if profiler is not None and total_ms >= settings.PROFILING_SLOW_MS:
+            data['trace'] = _save_trace(profiler, profile)
+        response['Server-Timing'] = profile.server_timing(total_ms)
+
+        level = logging.WARNING if total_ms >= settings.PROFILING_SLOW_MS else logging.INFO
+        logger.log(
+            level,
+            f"{profile.method} {profile.path} {response.status_code} {total_ms:.0f} ms "
+            f"(db {profile.db_count}/{profile.db_ms:.0f} ms, http {profile.http_count}/{profile.http_ms:.0f} ms)",
+            extra={'event': 'request', **data},
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = _current.get()
+        if profile is not None:
+            view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+            target = view_class or view_func
+            profile.view = f"{target.__module__}.{getattr(target, '__qualname__', target.__name__)}"
+        return None
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Client, Domain
+from .models import Client, Domain, TenantUsageSnapshot
 from django.db import transaction
 import os
 
@@ -44,3 +44,15 @@ class TenantRegistrationSerializer(serializers.ModelSerializer):
             # We need to attach the password back to the instance temporarily? 
             # No, view has access to serializer.validated_data['password']
             return tenant
+
+
+class TenantUsageSnapshotSerializer(serializers.ModelSerializer):
+    tenant_name = serializers.CharField(source='tenant.name', read_only=True)
+    schema_name = serializers.CharField(source='tenant.schema_name', read_only=True)
+
+    class Meta:
+        model = TenantUsageSnapshot
+        fields = ['tenant', 'tenant_name', 'schema_name', 'snapshot_date',
+                  'households', 'verified_households', 'zakat_eligible_households', 'members',
+                  'active_subscriptions', 'receipts_count', 'receipts_volume', 'receipts_volume_30d',
+                  'journal_items', 'computed_at', 'duration_ms']
@@ -0,0 +1,260 @@
+"""
+Server-Sent Events streaming shared by the Basira endpoints.
+
+relay_stream / arelay_stream turn an iterator of text deltas into SSE frames:
+- small deltas are batched into larger frames (flush interval / size),
+- a client disconnect closes the delta iterator, which cancels the
+  upstream request,
+- max-duration and max-token budgets cut runaway answers short,
+- time-to-first-token and tokens/sec are recorded per stream.
+
+The wire format is unchanged: `data: {"content": ...}` frames, an optional
+`data: {"error": ...}` or `data: {"truncated": ...}`, then `data: [DONE]`.
+"""
+import asyncio
+import json
+import logging
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+logger = logging.getLogger(__name__)
+
+SSE_DONE = "data: [DONE]\n\n"
+
+
+def sse_event(payload: dict) -> str:
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+def sse_response(events) -> StreamingHttpResponse:
+    """Wrap a (sync or async) iterator of SSE strings in a streaming response."""
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def stream_simple_response(text):
+    """
+    Create a streaming response for a simple text message.
+    This ensures the frontend can parse it correctly.
+    """
+    def generate():
+        yield sse_event({'content': text})
+        yield SSE_DONE
+    return sse_response(generate())
+
+
+def split_for_replay(text: str, words_per_chunk: int = 4) -> list:
+    words = re.findall(r"\S+\s*", text)
+    return [''.join(words[i:i + words_per_chunk]) for i in range(0, len(words), words_per_chunk)]
+
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def record_stream(name: str, monitor) -> None:
+    with _stats_lock:
+        entry = _stats.setdefault(name, {
+            'streams': 0, 'cancelled': 0, 'truncated': 0, 'errors': 0,
+            'ttft_total': 0.0, 'ttft_count': 0, 'ttft_max': 0.0,
+            'tokens': 0, 'stream_seconds': 0.0,
+        })
+        entry['streams'] += 1
+        entry['cancelled'] += monitor.cancelled
+        entry['truncated'] += bool(monitor.truncated)
+        entry['errors'] += bool(monitor.error)
+        if monitor.ttft is not None:
+            entry['ttft_total'] += monitor.ttft
+            entry['ttft_count'] += 1
+            entry['ttft_max'] = max(entry['ttft_max'], monitor.ttft)
+            entry['tokens'] += monitor.tokens
+            entry['stream_seconds'] += monitor.duration - monitor.ttft
+
+
+def get_stream_stats() -> list:
+    """Per-endpoint streaming metrics for this process."""
+    with _stats_lock:
+        return [
+            {
+                'name': name,
+                'streams': entry['streams'],
+                'cancelled': entry['cancelled'],
+                'truncated': entry['truncated'],
+                'errors': entry['errors'],
+                'avg_ttft_ms': round(entry['ttft_total'] / entry['ttft_count'] * 1000, 1) if entry['ttft_count'] else 0,
+                'max_ttft_ms': round(entry['ttft_max'] * 1000, 1),
+                'tokens_per_sec': round(entry['tokens'] / entry['stream_seconds'], 1) if entry['stream_seconds'] else 0,
+            }
+            for name, entry in sorted(_stats.items())
+        ]
+
+
+class StreamMonitor:
+    """Budget and timing for one stream. Each upstream delta counts as a token."""
+
+    def __init__(self, name: str, max_seconds: float = None, max_tokens: int = None):
+        self.name = name
+        self.max_seconds = max_seconds if max_seconds is not None else settings.LLM_STREAM_MAX_SECONDS
+        self.max_tokens = max_tokens if max_tokens is not None else settings.LLM_STREAM_MAX_TOKENS
+        self.started = time.monotonic()
+        self.ttft = None
+        self.duration = 0.0
+        self.tokens = 0
+        self.truncated = None
+        self.cancelled = False
+        self.error = None
+        self._finished = False
+
+    def delta(self) -> None:
+        if self.ttft is None:
+            self.ttft = time.monotonic() - self.started
+        self.tokens += 1
+
+    def over_budget(self) -> bool:
+        if self.max_tokens and self.tokens >= self.max_tokens:
+            self.truncated = 'max_tokens'
+        elif self.max_seconds and time.monotonic() - self.started >= self.max_seconds:
+            self.truncated = 'max_duration'
+        return self.truncated is not None
+
+    @property
+    def tokens_per_sec(self) -> float:
+        streaming = self.duration - (self.ttft or 0)
+        return self.tokens / streaming if streaming > 0 else 0.0
+
+    def finish(self) -> None:
+        if self._finished:
+            return
+        self._finished = True
+        self.duration = time.monotonic() - self.started
+        record_stream(self.name, self)
+        ttft_ms = round(self.ttft * 1000) if self.ttft is not None else None
+        logger.info(
+            f"stream {self.name}: ttft={ttft_ms}ms tokens={self.tokens} "
+            f"rate={self.tokens_per_sec:.1f}/s duration={self.duration:.2f}s "
+            f"truncated={self.truncated} cancelled={self.cancelled} error={bool(self.error)}"
+        )
+
+
+class DeltaBatcher:
+    """
+    Coalesces deltas into frames. The first delta is sent at once (so the
+    user sees the answer start); after that a frame goes out every
+    `interval` seconds or `max_chars` characters.
+    """
+
+    def __init__(self, interval: float = None, max_chars: int = 512):
+        self.interval = interval if interval is not None else settings.LLM_STREAM_FLUSH_MS / 1000
+        self.max_chars = max_chars
+        self.buffer = []
+        self.size = 0
+        self.last_flush = None
+
+    def add(self, text: str):
+        self.buffer.append(text)
+        self.size += len(text)
+        now = time.monotonic()
+        if self.last_flush is None or self.size >= self.max_chars or now - self.last_flush >= self.interval:
+            return self.flush(now)
+        return None
+
+    def flush(self, now=None):
+        self.last_flush = now or time.monotonic()
+        if not self.buffer:
+            return None
+        frame = sse_event({'content': ''.join(self.buffer)})
+        self.buffer, self.size = [], 0
+        return frame
+
+
+# ============================================================================
+# RELAYS
+# ============================================================================
+
+def relay_stream(deltas, monitor: StreamMonitor, on_complete=None):
+    """
+    Sync relay. `on_complete(text)` runs only for answers that finished
+    normally (not truncated, cancelled or failed).
+    """
+    batcher = DeltaBatcher()
+    parts = []
+    try:
+        for text in deltas:
+            parts.append(text)
+            monitor.delta()
+            frame = batcher.add(text)
+            if frame:
+                yield frame
+            if monitor.over_budget():
+                break
+        frame = batcher.flush()
+        if frame:
+            yield frame
+        if on_complete and not monitor.truncated:
+            on_complete(''.join(parts))
+        if monitor.truncated:
+            yield sse_event({'truncated': monitor.truncated})
+        yield SSE_DONE
+    except GeneratorExit:
+        # The server closes the response iterator when the client goes away
+        monitor.cancelled = True
+        raise
+    except Exception as e:
+        monitor.error = str(e)
+        frame = batcher.flush()
+        if frame:
+            yield frame
+        yield sse_event({'error': str(e)})
+    finally:
+        close = getattr(deltas, 'close', None)
+        if close:
+            close()
+        monitor.finish()
+
+
+async def arelay_stream(deltas, monitor: StreamMonitor, on_complete=None):
+    """Async relay (ASGI). Django cancels the task when the client disconnects."""
+    batcher = DeltaBatcher()
+    parts = []
+    try:
+        async for text in deltas:
+            parts.append(text)
+            monitor.delta()
+            frame = batcher.add(text)
+            if frame:
+                yield frame
+            if monitor.over_budget():
+                break
+        frame = batcher.flush()
+        if frame:
+            yield frame
+        if on_complete and not monitor.truncated:
+            await on_complete(''.join(parts))
+        if monitor.truncated:
+            yield sse_event({'truncated': monitor.truncated})
+        yield SSE_DONE
+    except (asyncio.CancelledError, GeneratorExit):
+        monitor.cancelled = True
+        raise
+    except Exception as e:
+        monitor.error = str(e)
+        frame = batcher.flush()
+        if frame:
+            yield frame
+        yield sse_event({'error': str(e)})
+    finally:
+        aclose = getattr(deltas, 'aclose', None)
+        if aclose:
+            # Closes the upstream httpx stream
+            await aclose()
+        monitor.finish()
@@ -198,3 +198,13 @@ def create_tenant_task(tenant_data):
             logger.error(f"Failed to send failure email: {email_err}")
         
         raise e
+
+
+@shared_task
+def rollup_platform_stats():
+    """
+    Periodic task: visit each tenant schema once and store compact usage
+    aggregates in the public schema (see apps.shared.analytics).
+    """
+    from .analytics import rollup_all_tenants
+    return rollup_all_tenants()
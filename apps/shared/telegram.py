@@ -4,13 +4,26 @@ Telegram OTP Service for Member Portal Authentication.
 For demo tenants: Uses mock OTP (123456)
 For production tenants: Sends real OTP via Telegram Bot
 """
+import asyncio
+import time
+
 import httpx
+from asgiref.sync import async_to_sync
 from django.conf import settings
+from django.core.cache import cache
 from django.db import connection
 import logging
 
+from . import metrics
+from .http import DEFAULT_LIMITS, DEFAULT_TIMEOUT
+from .tenant_cache import tenant_cache_key
+
 logger = logging.getLogger(__name__)
 
+# Messages kept per chat by the fake sender
+FAKE_OUTBOX_SIZE = 10
+FAKE_OUTBOX_TTL = 600
+
 
 def is_demo_tenant() -> bool:
     """Check if the current tenant is the demo tenant."""
@@ -31,8 +44,39 @@ def get_telegram_chat_id(phone: str) -> str | None:
         return None
 
 
+def fake_outbox_key(chat_id: str, schema_name=None) -> str:
+    return tenant_cache_key('telegram_outbox', chat_id, schema_name=schema_name)
+
+
+def _fake_send(chat_id: str, message: str) -> bool:
+    """TELEGRAM_FAKE_SEND: keep the message in the cache instead of sending it."""
+    key = fake_outbox_key(chat_id)
+    outbox = cache.get(key) or []
+    cache.set(key, (outbox + [message])[-FAKE_OUTBOX_SIZE:], FAKE_OUTBOX_TTL)
+    return True
+
+
+def get_fake_messages(chat_id: str, schema_name=None) -> list:
+    """Messages the fake sender recorded for a chat, oldest first."""
+    return cache.get(fake_outbox_key(chat_id, schema_name)) or []
+
+
+def _record_send(response=None) -> bool:
+    """Count the send for /metrics; Telegram answers 429 when a bot sends too fast."""
+    if response is None:
+        result = 'error'
+    elif response.status_code == 429:
+        result = 'rate_limited'
+    else:
+        result = 'ok' if response.is_success else 'error'
+    metrics.inc('telegram_messages_total', result=result)
+    return result == 'ok'
+
+
 def send_telegram_message(chat_id: str, message: str) -> bool:
     """Send a message via Telegram Bot API."""
+    if settings.TELEGRAM_FAKE_SEND:
+        return _fake_send(chat_id, message)
     bot_token = getattr(settings, 'TELEGRAM_BOT_TOKEN', None)
     
     if not bot_token:
@@ -49,10 +93,89 @@ def send_telegram_message(chat_id: str, message: str) -> bool:
             },
             timeout=10.0
         )
-        return response.is_success
+        return _record_send(response)
     except Exception as e:
         logger.error(f"Failed to send Telegram message: {e}")
+        return _record_send()
+
+
+# Telegram allows ~30 messages/second per bot: cap both the sends in flight
+# and the rate at which new ones start when fanning out
+TELEGRAM_SEND_CONCURRENCY = 20
+TELEGRAM_SEND_RATE = 25
+
+
+class AsyncRateLimiter:
+    """Start at most `rate` operations per second (evenly spaced)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self.next_at = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self.lock:
+            now = time.monotonic()
+            delay = self.next_at - now
+            self.next_at = max(now, self.next_at) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def send_telegram_message_async(client: httpx.AsyncClient, chat_id: str, message: str) -> bool:
+    """Send a message via Telegram Bot API using a shared async client."""
+    if settings.TELEGRAM_FAKE_SEND:
+        return _fake_send(chat_id, message)
+    bot_token = getattr(settings, 'TELEGRAM_BOT_TOKEN', None)
+    
+    if not bot_token:
+        logger.error("TELEGRAM_BOT_TOKEN not configured")
         return False
+    
+    try:
+        response = await client.post(
+            f"https://api.telegram.org/bot{bot_token}/sendMessage",
+            json={
+                "chat_id": chat_id,
+                "text": message,
+                "parse_mode": "HTML"
+            },
+            timeout=10.0
+        )
+        return _record_send(response)
+    except Exception as e:
+        logger.error(f"Failed to send Telegram message: {e}")
+        return _record_send()
+
+
+async def _send_telegram_messages(messages: list) -> list:
+    semaphore = asyncio.Semaphore(TELEGRAM_SEND_CONCURRENCY)
+    limiter = AsyncRateLimiter(TELEGRAM_SEND_RATE)
+
+    # Under WSGI and Celery, async_to_sync runs this on a fresh event loop, so
+    # the client lives as long as the fan-out and is closed with it
+    async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT, limits=DEFAULT_LIMITS) as client:
+        async def send_one(chat_id, message):
+            async with semaphore:
+                await limiter.wait()
+                return await send_telegram_message_async(client, chat_id, message)
+
+        return await asyncio.gather(*(send_one(chat_id, message) for chat_id, message in messages))
+
+
+def send_telegram_messages(messages: list) -> list:
+    """
+    Send many (chat_id, message) pairs concurrently over one async client
+    (its connections are reused for the whole broadcast) instead of one
+    blocking request after another, at no more than TELEGRAM_SEND_RATE
+    messages per second (per process).
+    
+    Returns:
+        list of bools in the same order as `messages`
+    """
+    if not messages:
+        return []
+    return async_to_sync(_send_telegram_messages)(messages)
 
 
 def send_otp_via_telegram(phone: str, otp: str) -> dict:
@@ -116,15 +239,10 @@ def broadcast_announcement(title: str, content: str) -> dict:
 
 — DigitalJamath"""
     
-    links = TelegramLink.objects.filter(is_verified=True)
-    sent = 0
-    failed = 0
-    
-    for link in links:
-        if send_telegram_message(link.chat_id, message):
-            sent += 1
-        else:
-            failed += 1
+    chat_ids = TelegramLink.objects.filter(is_verified=True).values_list('chat_id', flat=True)
+    results = send_telegram_messages([(chat_id, message) for chat_id in chat_ids])
+    sent = sum(1 for ok in results if ok)
+    failed = len(results) - sent
     
     logger.info(f"Broadcast announcement: {sent} sent, {failed} failed")
     return {'sent': sent, 'failed': failed}
@@ -143,9 +261,14 @@ def send_payment_reminder(phone: str, household_name: str, amount_due: float, po
         logger.warning(f"Cannot send reminder to {phone}: Telegram not linked")
         return False
     
+    return send_telegram_message(chat_id, format_payment_reminder(household_name, amount_due, portal_url))
+
+
+def format_payment_reminder(household_name: str, amount_due: float, portal_url: str = None) -> str:
+    """Payment reminder message text."""
     portal_link = portal_url or "https://portal.digitaljamath.com"
     
-    message = f"""💰 <b>Payment Reminder</b>
+    return f"""💰 <b>Payment Reminder</b>
 
 Assalamu Alaikum {household_name},
 
@@ -156,8 +279,6 @@ Please visit the member portal to make your payment:
 
 Jazakallah Khair
 — Your Jamath Committee"""
-    
-    return send_telegram_message(chat_id, message)
 
 
 def send_bulk_payment_reminders(portal_url: str = None) -> dict:
@@ -167,35 +288,38 @@ def send_bulk_payment_reminders(portal_url: str = None) -> dict:
     Returns:
         dict with 'sent' count and 'failed' count
     """
-    from apps.jamath.models import Household, MembershipConfig, TelegramLink
+    from django.db import models
+    from django.utils import timezone
+    from apps.jamath.models import Household, Member, MembershipConfig, Subscription, TelegramLink
     
     config = MembershipConfig.objects.filter(is_active=True).first()
     minimum_fee = float(config.minimum_fee) if config else 1200.0
     
-    # Get households without active membership that have linked Telegram
-    households = Household.objects.filter(is_membership_active=False)
+    # Households without an active membership
+    today = timezone.now().date()
+    active = Subscription.objects.filter(status='ACTIVE', end_date__gte=today).values('household_id')
+    households = Household.objects.exclude(id__in=active).prefetch_related(
+        models.Prefetch('members', queryset=Member.objects.filter(is_head_of_family=True), to_attr='heads')
+    )
     
-    sent = 0
-    failed = 0
+    # Resolve linked chat_ids in one query instead of one per household
+    chat_ids = dict(TelegramLink.objects.filter(is_verified=True).values_list('phone_number', 'chat_id'))
+    
+    messages = []
     skipped = 0
     
     for household in households:
-        if not household.phone_number:
+        chat_id = chat_ids.get(household.phone_number) if household.phone_number else None
+        if not chat_id:
             skipped += 1
             continue
-            
-        # Check if Telegram is linked
-        if not TelegramLink.objects.filter(phone_number=household.phone_number, is_verified=True).exists():
-            skipped += 1
-            continue
-        
-        head = household.members.filter(is_head_of_family=True).first()
-        head_name = head.full_name if head else "Member"
         
-        if send_payment_reminder(household.phone_number, head_name, minimum_fee, portal_url):
-            sent += 1
-        else:
-            failed += 1
+        head_name = household.heads[0].full_name if household.heads else "Member"
+        messages.append((chat_id, format_payment_reminder(head_name, minimum_fee, portal_url)))
+    
+    results = send_telegram_messages(messages)
+    sent = sum(1 for ok in results if ok)
+    failed = len(results) - sent
     
     logger.info(f"Bulk reminders: {sent} sent, {failed} failed, {skipped} skipped (no Telegram)")
     return {'sent': sent, 'failed': failed, 'skipped': skipped}
@@ -0,0 +1,17 @@
+"""
+Per-tenant cache keys.
+
+The cache backend is shared by every tenant, so keys for tenant data must
+carry the schema name of the current connection.
+"""
+from django.db import connection
+
+
+def tenant_cache_key(*parts, schema_name=None) -> str:
+    """
+    Build a cache key scoped to a tenant schema (by default the one
+    currently in context). Pass schema_name from code that runs outside the
+    request's connection, e.g. async streaming generators.
+    """
+    schema_name = schema_name or connection.schema_name
+    return ':'.join(['tenant', schema_name, *(str(p) for p in parts)])
@@ -0,0 +1,56 @@
+import asyncio
+
+import httpx
+from django.test import SimpleTestCase, override_settings
+
+from apps.shared.telegram import get_fake_messages, send_telegram_message
+from benchmarks import runner
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class RunnerTests(SimpleTestCase):
+    def test_percentiles(self):
+        values = list(range(1, 101))
+        self.assertEqual(runner.percentile(values, 50), 50)
+        self.assertEqual(runner.percentile(values, 99), 99)
+        self.assertEqual(runner.percentile([7], 95), 7)
+        self.assertEqual(runner.percentile([], 50), 0.0)
+
+    def test_run_scenario_counts_errors(self):
+        def handler(request):
+            return httpx.Response(500 if request.url.path == '/fail' else 200)
+
+        async def scenario(client, context, worker):
+            path = '/fail' if worker == 0 else '/ok'
+            response = await client.get(path)
+            if response.status_code != 200:
+                raise runner.ScenarioError('boom')
+
+        result = asyncio.run(runner.run_scenario(
+            scenario, {'base_url': 'http://bench.test'}, concurrency=2, duration=5,
+            max_requests=20, transport=httpx.MockTransport(handler),
+        ))
+        self.assertEqual(result['requests'] + result['errors'], 20)
+        self.assertGreater(result['errors'], 0)
+        self.assertEqual(result['error_samples'][0], 'boom')
+
+    def test_compare(self):
+        rows = runner.compare({'a': {'rps': 110, 'p50_ms': 9, 'p95_ms': 20, 'p99_ms': 30}},
+                              {'a': {'rps': 100, 'p50_ms': 10, 'p95_ms': 20, 'p99_ms': 0}, 'b': {}})
+        self.assertIn(('a', 'rps', 100, 110, 10.0), rows)
+        self.assertIn(('a', 'p50_ms', 10, 9, -10.0), rows)
+        self.assertIn(('a', 'p99_ms', 0, 30, None), rows)
+
+
+@override_settings(TELEGRAM_FAKE_SEND=True, TELEGRAM_BOT_TOKEN=None, CACHES=LOCMEM_CACHE)
+class FakeTelegramTests(SimpleTestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_messages_go_to_the_outbox(self):
+        self.assertTrue(send_telegram_message('42', 'hello'))
+        self.assertTrue(send_telegram_message('42', 'again'))
+        self.assertEqual(get_fake_messages('42'), ['hello', 'again'])
+        self.assertEqual(get_fake_messages('43'), [])
@@ -0,0 +1,40 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django_tenants.test.cases import TenantTestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.jamath.models import Household, Member
+from apps.shared.data_agent import BasiraDataAgentView, search_households
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class SearchHouseholdsTests(TenantTestCase):
+    def test_member_count_includes_members_that_did_not_match(self):
+        household = Household.objects.create(address='7 Noor Nagar', membership_id='PB-00007')
+        Member.objects.create(household=household, full_name='Yusuf Khan', is_head_of_family=True)
+        Member.objects.create(household=household, full_name='Amina Begum')
+        Member.objects.create(household=household, full_name='Bilal Khan')
+
+        [result] = search_households('Amina')
+        self.assertEqual(result['member_count'], 3)
+        self.assertEqual(result['head_name'], 'Yusuf Khan')
+
+
+class BasiraDataAgentViewTests(TenantTestCase):
+    # On the method: TenantTestCase.setUpClass doesn't apply class-level overrides
+    @override_settings(LLM_PROVIDER='stub', CACHES=LOCMEM_CACHE)
+    def test_message_is_answered_with_data_context(self):
+        Household.objects.create(address='1 Noor Nagar', membership_id='PB-00001')
+        admin = get_user_model().objects.create_superuser('basira-admin', 'admin@example.com', 'x')
+        request = APIRequestFactory().post('/api/basira/data-query/', {'message': 'How many households?'}, format='json')
+        force_authenticate(request, user=admin)
+
+        response = BasiraDataAgentView.as_view()(request)
+
+        self.assertEqual(response.status_code, 200)
+        body = b''.join(response.streaming_content).decode()
+        frames = [json.loads(line[6:]) for line in body.split('\n\n') if line.startswith('data: {')]
+        self.assertIn('Stub answer to: How many households?', ''.join(f.get('content', '') for f in frames))
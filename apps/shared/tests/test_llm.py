@@ -0,0 +1,95 @@
+import json
+
+from django.test import SimpleTestCase, override_settings
+
+from apps.shared.llm import LLMGateway, get_llm_usage, normalize_prompt
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def read_stream(response):
+    return b''.join(response.streaming_content).decode()
+
+
+def stream_text(body):
+    frames = [line[6:] for line in body.split('\n\n') if line.startswith('data: {')]
+    return ''.join(json.loads(frame).get('content', '') for frame in frames)
+
+
+@override_settings(LLM_PROVIDER='stub', LLM_CACHE_TTL=60, CACHES=LOCMEM_CACHE)
+class LLMGatewayTests(SimpleTestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def gateway(self):
+        return LLMGateway(None, "Test", max_tokens=100, temperature=0)
+
+    def messages(self, question, history=()):
+        return [{"role": "system", "content": "prompt"}, *history, {"role": "user", "content": question}]
+
+    def test_normalize_prompt(self):
+        self.assertEqual(normalize_prompt("  How do I add a Household? "), "how do i add a household")
+
+    def test_repeated_question_is_replayed_from_cache(self):
+        first = self.gateway().streaming_response(self.messages("How do I add a household?"), cache_context="guide")
+        body = read_stream(first)
+        self.assertIn('"content"', body)
+        self.assertTrue(body.endswith("data: [DONE]\n\n"))
+
+        second = self.gateway().streaming_response(self.messages("how do i add a household"), cache_context="guide")
+        self.assertEqual(second['X-Basira-Cache'], 'HIT')
+        self.assertEqual(stream_text(read_stream(second)), stream_text(body))
+
+        usage = get_llm_usage()[0]
+        self.assertEqual(usage['requests'], 2)
+        self.assertEqual(usage['cache_hits'], 1)
+
+    def test_follow_ups_and_other_contexts_are_not_shared(self):
+        gateway = self.gateway()
+        question = self.messages("Total?")
+        self.assertIsNone(gateway.cache_key(question, None))
+        self.assertNotEqual(gateway.cache_key(question, "a"), gateway.cache_key(question, "b"))
+        follow_up = self.messages("Total?", history=[
+            {"role": "user", "content": "Zakat"}, {"role": "assistant", "content": "..."}
+        ])
+        self.assertIsNone(gateway.cache_key(follow_up, "a"))
+
+    def test_same_question_in_the_same_context_shares_a_key(self):
+        gateway = self.gateway()
+        first = [{"role": "system", "content": "Date: Monday"}, {"role": "user", "content": "How do I add a household?"}]
+        again = [{"role": "system", "content": "Date: Monday"}, {"role": "user", "content": "how do i add a household"}]
+        self.assertEqual(gateway.cache_key(first, "guide\n2026-10-19"), gateway.cache_key(again, "guide\n2026-10-19"))
+        self.assertNotEqual(gateway.cache_key(first, "guide\n2026-10-19"), gateway.cache_key(first, "guide\n2026-10-20"))
+
+
+@override_settings(LLM_PROVIDER='stub', CACHES=LOCMEM_CACHE)
+class StreamingTests(SimpleTestCase):
+    def test_token_budget_truncates_stream(self):
+        from apps.shared.streaming import StreamMonitor, relay_stream
+
+        monitor = StreamMonitor('test', max_tokens=3)
+        body = ''.join(relay_stream(iter(['a ', 'b ', 'c ', 'd ', 'e ']), monitor))
+        self.assertEqual(stream_text(body), 'a b c ')
+        self.assertIn('"truncated": "max_tokens"', body)
+        self.assertTrue(body.endswith('data: [DONE]\n\n'))
+        self.assertIsNotNone(monitor.ttft)
+
+    def test_client_disconnect_closes_upstream(self):
+        from apps.shared.streaming import StreamMonitor, relay_stream
+
+        closed = []
+
+        def upstream():
+            try:
+                while True:
+                    yield 'x'
+            finally:
+                closed.append(True)
+
+        monitor = StreamMonitor('test', max_tokens=0, max_seconds=0)
+        stream = relay_stream(upstream(), monitor)
+        next(stream)
+        stream.close()
+        self.assertEqual(closed, [True])
+        self.assertTrue(monitor.cancelled)
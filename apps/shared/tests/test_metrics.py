@@ -0,0 +1,130 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+import httpx
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from apps.shared import metrics
+from apps.shared.api import MetricsView
+from apps.shared.telegram import _record_send
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_REDIS_URL='memory://', METRICS_TOKEN='scrape-secret',
+                   CACHES=LOCMEM_CACHE)
+class MetricsTests(SimpleTestCase):
+    def setUp(self):
+        metrics.reset_store()
+        self.addCleanup(metrics.reset_store)
+        patcher = mock.patch.object(metrics, 'collect_gauges', return_value=[
+            ('celery_queue_length', 'Messages waiting', {'queue="celery"': 3}),
+        ])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_render_counters_and_cumulative_histograms(self):
+        metrics.inc('telegram_messages_total', result='ok')
+        metrics.inc('telegram_messages_total', 2, result='ok')
+        metrics.observe('celery_task_duration_seconds', 0.02, task='apps.shared.tasks.create_tenant_task')
+        metrics.observe('celery_task_duration_seconds', 3, task='apps.shared.tasks.create_tenant_task')
+
+        text = metrics.render()
+        self.assertIn('# TYPE digitaljamath_telegram_messages_total counter', text)
+        self.assertIn('digitaljamath_telegram_messages_total{result="ok"} 3', text)
+        task = 'task="apps.shared.tasks.create_tenant_task"'
+        self.assertIn(f'digitaljamath_celery_task_duration_seconds_bucket{{{task},le="0.025"}} 1', text)
+        self.assertIn(f'digitaljamath_celery_task_duration_seconds_bucket{{{task},le="5"}} 2', text)
+        self.assertIn(f'digitaljamath_celery_task_duration_seconds_bucket{{{task},le="+Inf"}} 2', text)
+        self.assertIn(f'digitaljamath_celery_task_duration_seconds_count{{{task}}} 2', text)
+        self.assertIn('digitaljamath_celery_queue_length{queue="celery"} 3', text)
+
+    def test_label_values_are_escaped(self):
+        metrics.inc('http_client_requests_total', host='a"b\\c')
+        self.assertIn('{host="a\\"b\\\\c"} 1', metrics.render())
+
+    def test_disabled_records_nothing(self):
+        with override_settings(METRICS_ENABLED=False):
+            metrics.inc('telegram_messages_total', result='ok')
+        self.assertNotIn('result="ok"', metrics.render())
+
+    def test_middleware_records_request_and_cache_lookups(self):
+        from django.core.cache import cache
+
+        def view(request):
+            cache.get('metrics-missing')
+            return HttpResponse('ok', status=201)
+
+        request = RequestFactory().post('/api/jamath/households/')
+        request.tenant = SimpleNamespace(schema_name='masjid1')
+        metrics.MetricsMiddleware(view)(request)
+
+        text = metrics.render()
+        labels = 'method="POST",route="unmatched",status="2xx",tenant="masjid1"'
+        self.assertIn(f'digitaljamath_http_requests_total{{{labels}}} 1', text)
+        self.assertIn('digitaljamath_http_request_duration_seconds_count{method="POST",route="unmatched",tenant="masjid1"} 1', text)
+        self.assertIn('digitaljamath_cache_requests_total{result="miss",tenant="masjid1"} 1', text)
+
+    def test_telegram_rate_limits_are_counted(self):
+        self.assertFalse(_record_send(httpx.Response(429)))
+        self.assertTrue(_record_send(httpx.Response(200)))
+        self.assertFalse(_record_send())
+        text = metrics.render()
+        for result in ('rate_limited', 'ok', 'error'):
+            self.assertIn(f'digitaljamath_telegram_messages_total{{result="{result}"}} 1', text)
+
+    def test_writes_from_async_code_run_off_the_event_loop(self):
+        store = metrics.get_store()
+        add, threads = store.add, []
+
+        def tracking_add(ops):
+            threads.append(threading.get_ident())
+            add(ops)
+
+        async def send():
+            metrics.inc('telegram_messages_total', result='ok')
+            return threading.get_ident()
+
+        with mock.patch.object(store, 'add', tracking_add):
+            # asyncio.run waits for the default executor before returning
+            loop_thread = asyncio.run(send())
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], loop_thread)
+        self.assertIn('digitaljamath_telegram_messages_total{result="ok"} 1', metrics.render())
+
+    def test_celery_task_timing(self):
+        metrics.task_started('abc')
+        metrics.task_finished('abc', 'apps.jamath.tasks.reconcile_payment_orders', 'SUCCESS')
+        text = metrics.render()
+        self.assertIn('digitaljamath_celery_tasks_total{state="SUCCESS",task="apps.jamath.tasks.reconcile_payment_orders"} 1', text)
+        self.assertIn('digitaljamath_celery_task_duration_seconds_count{task="apps.jamath.tasks.reconcile_payment_orders"} 1', text)
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_REDIS_URL='memory://', METRICS_TOKEN='scrape-secret')
+class MetricsViewTests(SimpleTestCase):
+    def setUp(self):
+        metrics.reset_store()
+        self.addCleanup(metrics.reset_store)
+        patcher = mock.patch.object(metrics, 'collect_gauges', return_value=[])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self, schema='public', token='scrape-secret'):
+        request = RequestFactory().get('/metrics', HTTP_AUTHORIZATION=f'Bearer {token}')
+        request.tenant = SimpleNamespace(schema_name=schema)
+        return MetricsView.as_view()(request)
+
+    def test_serves_prometheus_text_with_token(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn(b'# TYPE digitaljamath_http_requests_total counter', response.content)
+
+    def test_rejects_bad_token_and_tenant_schemas(self):
+        self.assertEqual(self.get(token='wrong').status_code, 401)
+        self.assertEqual(self.get(schema='masjid1').status_code, 403)
+        with override_settings(METRICS_TOKEN=''):
+            self.assertEqual(self.get().status_code, 404)
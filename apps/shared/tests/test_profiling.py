@@ -0,0 +1,85 @@
+import json
+import logging
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from apps.shared import profiling
+from apps.shared.log_format import JSONFormatter
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE, PROFILING_SLOW_MS=10_000, PROFILING_SLOW_SQL_MS=50, PROFILING_SAMPLE_RATE=0)
+class RequestProfilingMiddlewareTests(SimpleTestCase):
+    def test_records_cache_and_http_and_sets_server_timing(self):
+        def view(request):
+            cache.set('profiling-test', 1)
+            cache.get('profiling-test')
+            cache.get('profiling-missing')
+            profiling.record_http(12.5)
+            return HttpResponse('ok')
+
+        middleware = profiling.RequestProfilingMiddleware(view)
+        with self.assertLogs('digitaljamath.profiling', level='INFO') as logs:
+            response = middleware(RequestFactory().get('/api/jamath/households/'))
+
+        header = response['Server-Timing']
+        self.assertIn('cache;desc="1 hits, 1 misses"', header)
+        self.assertIn('http;dur=12.5;desc="1 calls"', header)
+        self.assertIn('total;dur=', header)
+        record = logs.records[0]
+        self.assertEqual(record.event, 'request')
+        self.assertEqual(record.path, '/api/jamath/households/')
+        self.assertEqual(record.http_calls, 1)
+
+    def test_cache_default_is_preserved(self):
+        profiling.instrument()
+        self.assertEqual(cache.get('profiling-absent', 'fallback'), 'fallback')
+
+    def test_process_view_names_the_view(self):
+        class HouseholdView:
+            pass
+
+        def view(request):
+            return HttpResponse('ok')
+        view.view_class = HouseholdView
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = profiling.RequestProfilingMiddleware(get_response)
+        with self.assertLogs('digitaljamath.profiling', level='INFO') as logs:
+            middleware(RequestFactory().get('/'))
+        self.assertTrue(logs.records[0].view.endswith('HouseholdView'))
+
+    def test_slow_sql_is_logged_with_view(self):
+        profile = profiling.RequestProfile(RequestFactory().get('/'))
+        profile.view = 'apps.jamath.api.HouseholdViewSet'
+        timer = profiling._QueryTimer(profile)
+
+        fast = lambda sql, params, many, context: 'rows'
+        self.assertEqual(timer(fast, 'SELECT 1', None, False, {}), 'rows')
+
+        def slow(sql, params, many, context):
+            import time
+            time.sleep(0.06)
+
+        with self.assertLogs('digitaljamath.profiling', level='WARNING') as logs:
+            timer(slow, 'SELECT pg_sleep(1)', None, False, {})
+        self.assertEqual(profile.db_count, 2)
+        self.assertIn('HouseholdViewSet', logs.output[0])
+        self.assertIn('pg_sleep', logs.output[0])
+
+
+class JSONFormatterTests(SimpleTestCase):
+    def test_includes_extra_fields(self):
+        record = logging.LogRecord('digitaljamath.profiling', logging.INFO, __file__, 1, 'GET %s', ('/x',), None)
+        record.db_queries = 3
+        payload = json.loads(JSONFormatter().format(record))
+        self.assertEqual(payload['message'], 'GET /x')
+        self.assertEqual(payload['level'], 'INFO')
+        self.assertEqual(payload['db_queries'], 3)
+        self.assertNotIn('args', payload)
@@ -0,0 +1,37 @@
+import asyncio
+import time
+from unittest import mock
+
+import httpx
+from django.test import SimpleTestCase, override_settings
+
+from apps.shared.telegram import AsyncRateLimiter, send_telegram_messages
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class AsyncRateLimiterTests(SimpleTestCase):
+    def test_spaces_out_starts(self):
+        async def run():
+            limiter = AsyncRateLimiter(rate=50)
+            started = time.monotonic()
+            await asyncio.gather(*(limiter.wait() for _ in range(6)))
+            return time.monotonic() - started
+
+        # First start is immediate, the next five wait 20 ms each
+        self.assertGreaterEqual(asyncio.run(run()), 0.09)
+
+
+@override_settings(TELEGRAM_FAKE_SEND=True, CACHES=LOCMEM_CACHE)
+class SendTelegramMessagesTests(SimpleTestCase):
+    def test_fan_out_client_is_closed_afterwards(self):
+        clients, real_client = [], httpx.AsyncClient
+
+        def make_client(*args, **kwargs):
+            clients.append(real_client(*args, **kwargs))
+            return clients[-1]
+
+        with mock.patch.object(httpx, 'AsyncClient', make_client):
+            self.assertEqual(send_telegram_messages([('1', 'Salaam'), ('2', 'Salaam')]), [True, True])
+        self.assertEqual(len(clients), 1)
+        self.assertTrue(clients[0].is_closed)
@@ -0,0 +1,6 @@
+"""
+Load-testing benchmarks for the API hot paths.
+
+Scenarios live in scenarios.py, the async driver in runner.py. Run them
+with `python manage.py run_benchmarks` (see that command's docstring).
+"""
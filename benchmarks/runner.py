@@ -0,0 +1,122 @@
+"""
+Async load driver: runs one scenario at a time with N concurrent workers
+over a shared httpx.AsyncClient and reports latency percentiles and RPS.
+"""
+import asyncio
+import json
+import math
+import platform
+import time
+from pathlib import Path
+
+import httpx
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+
+class ScenarioError(Exception):
+    """A scenario step got an unexpected response."""
+
+
+def percentile(sorted_values, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies, errors: int, elapsed: float) -> dict:
+    values = sorted(latencies)
+    return {
+        'requests': len(values),
+        'errors': errors,
+        'rps': round(len(values) / elapsed, 2) if elapsed else 0.0,
+        'mean_ms': round(sum(values) / len(values), 2) if values else 0.0,
+        'p50_ms': round(percentile(values, 50), 2),
+        'p95_ms': round(percentile(values, 95), 2),
+        'p99_ms': round(percentile(values, 99), 2),
+        'max_ms': round(values[-1], 2) if values else 0.0,
+    }
+
+
+async def run_scenario(scenario, context, concurrency: int = 10, duration: float = 30.0,
+                       max_requests: int = None, timeout: float = 60.0, transport=None) -> dict:
+    """
+    Call scenario(client, context, worker) in a loop from `concurrency`
+    workers until `duration` seconds pass or `max_requests` complete.
+    Each call is one timed operation (it may make several HTTP requests).
+    """
+    latencies, errors, samples = [], 0, []
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=context['base_url'], timeout=timeout, limits=limits,
+                                 transport=transport) as client:
+        async def worker(worker_id):
+            nonlocal errors
+            while time.perf_counter() < deadline and (max_requests is None or len(latencies) + errors < max_requests):
+                start = time.perf_counter()
+                try:
+                    await scenario(client, context, worker_id)
+                except (httpx.HTTPError, ScenarioError) as e:
+                    errors += 1
+                    if len(samples) < 5:
+                        samples.append(str(e)[:200])
+                    continue
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    result = summarize(latencies, errors, elapsed)
+    result['concurrency'] = concurrency
+    if samples:
+        result['error_samples'] = samples
+    return result
+
+
+# ============================================================================
+# RESULTS
+# ============================================================================
+
+def save_results(results: dict, meta: dict, path=None) -> Path:
+    """Write a run to benchmarks/results/<version>-<timestamp>.json (or path)."""
+    if path is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        path = RESULTS_DIR / f"{meta.get('version', 'dev')}-{stamp}.json"
+    path = Path(path)
+    payload = {'meta': {**meta, 'python': platform.python_version(), 'host': platform.node()}, 'scenarios': results}
+    path.write_text(json.dumps(payload, indent=2, sort_keys=True))
+    return path
+
+
+def load_results(path) -> dict:
+    return json.loads(Path(path).read_text())['scenarios']
+
+
+def compare(current: dict, baseline: dict) -> list:
+    """Rows of (scenario, metric, baseline, current, change %) for shared scenarios."""
+    rows = []
+    for name, result in current.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        for metric in ('rps', 'p50_ms', 'p95_ms', 'p99_ms'):
+            old, new = before.get(metric, 0), result.get(metric, 0)
+            change = round((new - old) / old * 100, 1) if old else None
+            rows.append((name, metric, old, new, change))
+    return rows
+
+
+def format_table(results: dict) -> str:
+    header = f"{'scenario':<20} {'reqs':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"
+    lines = [header, '-' * len(header)]
+    for name, r in results.items():
+        lines.append(
+            f"{name:<20} {r['requests']:>7} {r['errors']:>5} {r['rps']:>8.1f} "
+            f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['max_ms']:>8.1f}"
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,99 @@
+"""
+Benchmark scenarios modeled on real usage.
+
+Each scenario is `async def scenario(client, context, worker)` and makes
+one timed operation. `context` is built by the run_benchmarks command:
+base_url, schema, admin_token, members [(phone, chat_id)], search_terms,
+ledgers {'cash', 'income'}, fy_year and fixed_otp (demo tenants).
+"""
+import random
+import re
+from datetime import date
+
+from .runner import ScenarioError
+
+OTP_RE = re.compile(r'<code>(\d{6})</code>')
+
+
+def _check(response, expected=200):
+    if response.status_code != expected:
+        # Streamed responses have no body loaded yet
+        body = response.text[:120] if hasattr(response, '_content') else ''
+        raise ScenarioError(f"{response.request.method} {response.request.url.path}: HTTP {response.status_code} {body}")
+    return response
+
+
+def _admin(context) -> dict:
+    return {'Authorization': f"Bearer {context['admin_token']}"}
+
+
+async def portal_login(client, context, worker):
+    """RequestOTPView -> OTP from the fake Telegram outbox -> VerifyOTPView."""
+    from apps.shared.telegram import get_fake_messages
+
+    # One phone per worker so concurrent logins never overwrite each other's OTP
+    phone, chat_id = context['members'][worker % len(context['members'])]
+    _check(await client.post('/api/portal/request-otp/', json={'phone_number': phone}))
+    otp = context.get('fixed_otp')
+    if not otp:
+        messages = get_fake_messages(chat_id, schema_name=context['schema'])
+        match = OTP_RE.search(messages[-1]) if messages else None
+        if not match:
+            raise ScenarioError("No OTP in the fake outbox (is TELEGRAM_FAKE_SEND on for the server?)")
+        otp = match.group(1)
+    response = _check(await client.post('/api/portal/verify-otp/', json={'phone_number': phone, 'otp': otp}))
+    if 'access' not in response.json():
+        raise ScenarioError("verify-otp returned no token")
+
+
+async def household_list(client, context, worker):
+    _check(await client.get('/api/jamath/households/', headers=_admin(context)))
+
+
+async def household_search(client, context, worker):
+    term = random.choice(context['search_terms'])
+    _check(await client.get('/api/jamath/households/', params={'search': term}, headers=_admin(context)))
+
+
+async def voucher_entry(client, context, worker):
+    amount = f"{random.randrange(100, 2000, 50)}.00"
+    payload = {
+        'voucher_type': 'RECEIPT',
+        'date': date.today().isoformat(),
+        'narration': 'Benchmark donation',
+        'payment_mode': 'CASH',
+        'items': [
+            {'ledger': context['ledgers']['cash'], 'debit_amount': amount, 'credit_amount': '0.00'},
+            {'ledger': context['ledgers']['income'], 'debit_amount': '0.00', 'credit_amount': amount},
+        ],
+    }
+    _check(await client.post('/api/ledger/journal-entries/', json=payload, headers=_admin(context)), 201)
+
+
+async def trial_balance(client, context, worker):
+    _check(await client.get('/api/ledger/reports/trial-balance/', headers=_admin(context)))
+
+
+async def tally_export(client, context, worker):
+    _check(await client.get('/api/ledger/export/', params={'year': context['fy_year']}, headers=_admin(context)))
+
+
+async def basira(client, context, worker):
+    """Data agent with the server on LLM_PROVIDER=stub; reads the stream to the end."""
+    message = random.choice(['How many households?', 'Financial summary', 'Recent transactions'])
+    async with client.stream('POST', '/api/basira/data-query/', json={'message': message},
+                             headers=_admin(context)) as response:
+        _check(response)
+        async for _ in response.aiter_bytes():
+            pass
+
+
+SCENARIOS = {
+    'portal_login': portal_login,
+    'household_list': household_list,
+    'household_search': household_search,
+    'voucher_entry': voucher_entry,
+    'trial_balance': trial_balance,
+    'tally_export': tally_export,
+    'basira': basira,
+}
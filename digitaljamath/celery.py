@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.signals import task_postrun, task_prerun, worker_process_init
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'digitaljamath.settings')
@@ -15,6 +16,41 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
 
+
+@task_prerun.connect
+def reset_tenant_schema(**kwargs):
+    """
+    Start every task on the public schema. Worker DB connections are
+    persistent, so a task must never inherit the search_path of the
+    previous task; tenant tasks enter their schema via schema_context.
+    """
+    from django.db import connection
+    connection.set_schema_to_public()
+
+
+@task_prerun.connect
+def start_task_timer(task_id=None, **kwargs):
+    from apps.shared import metrics
+    if metrics.is_enabled():
+        metrics.task_started(task_id)
+
+
+@task_postrun.connect
+def record_task_metrics(task_id=None, task=None, state=None, **kwargs):
+    """Task duration and outcome for /metrics (METRICS_ENABLED)."""
+    from apps.shared import metrics
+    if metrics.is_enabled():
+        metrics.task_finished(task_id, task.name, state)
+
+
+@worker_process_init.connect
+def instrument_worker(**kwargs):
+    """Outbound HTTP from tasks (broadcasts, gateways) shows up in /metrics too."""
+    from apps.shared import metrics
+    if metrics.is_enabled():
+        from apps.shared.profiling import instrument
+        instrument()
+
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
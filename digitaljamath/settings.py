@@ -20,6 +20,8 @@ print(f"DEBUG: Final ALLOWED_HOSTS = {ALLOWED_HOSTS}")
 # Production Security Settings
 if not DEBUG:
     SECURE_SSL_REDIRECT = True
+    # Prometheus scrapes /metrics over plain HTTP inside the Docker network
+    SECURE_REDIRECT_EXEMPT = [r'^metrics$']
     SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
     SESSION_COOKIE_SECURE = True
     CSRF_COOKIE_SECURE = True
@@ -46,11 +48,30 @@ CACHES = {
 # Get token from @BotFather
 TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN', None)
 TELEGRAM_BOT_USERNAME = os.environ.get('TELEGRAM_BOT_USERNAME', 'DigitalJamathBot')
+# Record outgoing Telegram messages in the cache instead of calling the Bot API (tests/benchmarks)
+TELEGRAM_FAKE_SEND = os.environ.get('TELEGRAM_FAKE_SEND', 'false').lower() in ('1', 'true', 'yes')
 
 # Razorpay Configuration
 RAZORPAY_KEY_ID = os.environ.get('RAZORPAY_KEY_ID', None)
 RAZORPAY_KEY_SECRET = os.environ.get('RAZORPAY_KEY_SECRET', None)
 
+# Cashfree environment: 'sandbox' or 'production'
+CASHFREE_ENVIRONMENT = os.environ.get('CASHFREE_ENVIRONMENT', 'sandbox').lower()
+
+# Set to 'fake' to route all portal payments through the in-process fake gateway (tests/benchmarks)
+PAYMENT_GATEWAY_OVERRIDE = os.environ.get('PAYMENT_GATEWAY_OVERRIDE', '').lower()
+
+# Basira LLM gateway (apps.shared.llm). LLM_PROVIDER=stub answers locally (tests/benchmarks)
+LLM_PROVIDER = os.environ.get('LLM_PROVIDER', 'openrouter').lower()
+LLM_MODEL = os.environ.get('LLM_MODEL', 'meta-llama/llama-3.2-3b-instruct:free')
+LLM_FALLBACK_MODELS = [m.strip() for m in os.environ.get('LLM_FALLBACK_MODELS', '').split(',') if m.strip()]
+LLM_TIMEOUT = float(os.environ.get('LLM_TIMEOUT', 60))
+LLM_CACHE_TTL = int(os.environ.get('LLM_CACHE_TTL', 60 * 60 * 24))
+# Streaming budgets and frame batching (apps.shared.streaming)
+LLM_STREAM_MAX_SECONDS = float(os.environ.get('LLM_STREAM_MAX_SECONDS', 90))
+LLM_STREAM_MAX_TOKENS = int(os.environ.get('LLM_STREAM_MAX_TOKENS', 1500))
+LLM_STREAM_FLUSH_MS = int(os.environ.get('LLM_STREAM_FLUSH_MS', 50))
+
 
 # Application definition
 SHARED_APPS = (
@@ -98,6 +119,46 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Request profiling (apps.shared.profiling): Server-Timing headers, per-request
+# log lines, slow SQL log and sampled traces. Off by default.
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+PROFILING_SLOW_MS = float(os.environ.get('PROFILING_SLOW_MS', 500))
+PROFILING_SLOW_SQL_MS = float(os.environ.get('PROFILING_SLOW_SQL_MS', 100))
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_DIR = os.environ.get('PROFILING_DIR', os.path.join(BASE_DIR, 'profiles'))
+# Prometheus metrics (apps.shared.metrics), served at /metrics to requests
+# carrying `Authorization: Bearer <METRICS_TOKEN>`. Off by default.
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+# Shared by web and Celery processes; memory:// keeps metrics per process
+METRICS_REDIS_URL = os.environ.get('METRICS_REDIS_URL') or os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+METRICS_CELERY_QUEUES = [q.strip() for q in os.environ.get('METRICS_CELERY_QUEUES', 'celery').split(',') if q.strip()]
+
+# Right after tenant resolution so the schema is known and everything else is timed
+if METRICS_ENABLED:
+    MIDDLEWARE.insert(1, 'apps.shared.metrics.MetricsMiddleware')
+if PROFILING_ENABLED:
+    MIDDLEWARE.insert(1, 'apps.shared.profiling.RequestProfilingMiddleware')
+
+# Logging: LOG_FORMAT=json emits one JSON object per line (for log shippers)
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text').lower()
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'text': {'format': '%(asctime)s %(levelname)s %(name)s: %(message)s'},
+        'json': {'()': 'apps.shared.log_format.JSONFormatter'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'json' if LOG_FORMAT == 'json' else 'text'},
+    },
+    'root': {'handlers': ['console'], 'level': LOG_LEVEL},
+    'loggers': {
+        'django': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 ROOT_URLCONF = 'digitaljamath.urls'
 
 TEMPLATES = [
@@ -127,9 +188,33 @@ DATABASES = {
         'PASSWORD': os.environ.get('DATABASE_PASSWORD', 'password'),
         'HOST': os.environ.get('DATABASE_HOST', 'localhost'),
         'PORT': os.environ.get('DATABASE_PORT', '5432'),
+        # Persistent connections: reuse a connection for up to N seconds instead of
+        # reconnecting on every request. Health checks drop dead connections first.
+        'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('DATABASE_CONNECT_TIMEOUT', '5')),
+        },
     }
 }
 
+# DATABASE_PGBOUNCER=true -> running behind PgBouncer in *session* pooling mode
+#   (django-tenants keeps the tenant in the session-level search_path, so
+#   transaction pooling is not supported)
+# Django's in-process pool needs psycopg 3; this project runs on psycopg2, so
+# connection reuse comes from CONN_MAX_AGE (and optionally PgBouncer).
+DATABASE_PGBOUNCER = os.environ.get('DATABASE_PGBOUNCER', 'false').lower() in ('true', '1', 'yes')
+
+if DATABASE_PGBOUNCER:
+    # Server-side cursors do not survive PgBouncer connection reassignment
+    DISABLE_SERVER_SIDE_CURSORS = True
+
+# Keep setting `search_path` before every cursor. SET is transactional: if the
+# first SET on a persistent connection happens inside an atomic block that rolls
+# back, Postgres reverts to the previous tenant's path while django-tenants would
+# still consider it set, and later queries could hit another tenant's schema.
+TENANT_LIMIT_SET_CALLS = False
+
 DATABASE_ROUTERS = (
     'django_tenants.routers.TenantSyncRouter',
 )
@@ -170,6 +255,21 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
 
+# Periodic tasks (run with: celery -A digitaljamath beat)
+from celery.schedules import crontab
+CELERY_BEAT_SCHEDULE = {
+    # Cross-tenant usage rollup into the public schema (platform dashboard)
+    'rollup-platform-stats': {
+        'task': 'apps.shared.tasks.rollup_platform_stats',
+        'schedule': crontab(minute=15, hour='*/6'),
+    },
+    # Settle portal payments whose gateway webhook never arrived
+    'reconcile-payment-orders': {
+        'task': 'apps.jamath.tasks.reconcile_payment_orders',
+        'schedule': crontab(minute='*/15'),
+    },
+}
+
 # DRF & JWT Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -6,7 +6,7 @@ from rest_framework.routers import DefaultRouter
 # from apps.finance.api import TransactionViewSet, BudgetViewSet, AssetViewSet, FundCategoryViewSet
 from apps.jamath.api import (
     HouseholdViewSet, MemberViewSet, SurveyViewSet, SurveyResponseViewSet,
-    AnnouncementViewSet, ServiceRequestViewSet,
+    AnnouncementViewSet, ServiceRequestViewSet, DuplicateCandidateViewSet, CustomFieldDefinitionViewSet,
     # OTP Auth
     RequestOTPView, VerifyOTPView,
     # Member Portal
@@ -16,7 +16,7 @@ from apps.jamath.api import (
     MemberPortalAnnouncementsView, MemberPortalServiceRequestView,
     MemberPortalMemberView,
     # Payment
-    PortalPaymentOrderView, PortalPaymentVerifyView,
+    PortalPaymentOrderView, PortalPaymentVerifyView, PaymentWebhookView,
     # Admin
     AdminPendingMembersView, AdminMembershipConfigView,
     # User Profile
@@ -35,7 +35,8 @@ from apps.jamath.api import (
 from apps.welfare.api import VolunteerViewSet, GrantApplicationViewSet
 from apps.shared.api import    TenantRegistrationView, FindWorkspaceView, VerifyEmailView, CheckTenantView, \
     RequestRegistrationOTPView, VerifyRegistrationOTPView, SetupTenantView, \
-    PasswordResetRequestView, PasswordResetConfirmView, TenantInfoView
+    PasswordResetRequestView, PasswordResetConfirmView, TenantInfoView, PlatformStatsView, \
+    HealthCheckView, MetricsView
 
 from apps.shared.ai_guide import BasiraGuideView
 from apps.shared.data_agent import BasiraDataAgentView
@@ -57,6 +58,8 @@ router.register(r'jamath/surveys', SurveyViewSet)
 router.register(r'jamath/responses', SurveyResponseViewSet)
 router.register(r'jamath/announcements', AnnouncementViewSet)
 router.register(r'jamath/service-requests', ServiceRequestViewSet)
+router.register(r'jamath/duplicates', DuplicateCandidateViewSet)
+router.register(r'jamath/custom-fields', CustomFieldDefinitionViewSet)
 router.register(r'jamath/staff-roles', StaffRoleViewSet)
 router.register(r'jamath/staff-members', StaffMemberViewSet)
 
@@ -82,6 +85,12 @@ urlpatterns = [
     path('api/verify-email/', VerifyEmailView.as_view(), name='verify-email'),
     path('api/tenant-info/', TenantInfoView.as_view(), name='tenant-info'),
     
+    path('api/health/', HealthCheckView.as_view(), name='health'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
+    
+    # Platform (Superadmin, public schema)
+    path('api/platform/stats/', PlatformStatsView.as_view(), name='platform-stats'),
+    
     # Admin Auth (username/password)
     path('api/auth/password-reset-request/', PasswordResetRequestView.as_view(), name='password-reset-request'),
     path('api/auth/password-reset-confirm/', PasswordResetConfirmView.as_view(), name='password-reset-confirm'),
@@ -102,6 +111,7 @@ urlpatterns = [
     # Member Portal Payment
     path('api/portal/payment/create-order/', PortalPaymentOrderView.as_view(), name='portal-payment-create'),
     path('api/portal/payment/verify/', PortalPaymentVerifyView.as_view(), name='portal-payment-verify'),
+    path('api/portal/payment/webhook/', PaymentWebhookView.as_view(), name='portal-payment-webhook'),
     
     # Member Portal Receipts (new)
     path('api/portal/receipts/list/', PortalReceiptListView.as_view(), name='portal-receipts-list'),
@@ -0,0 +1,20 @@
+# Gunicorn configuration
+# WEB_SERVER_MODE=wsgi (default) - sync workers, digitaljamath.wsgi
+# WEB_SERVER_MODE=asgi           - uvicorn workers, digitaljamath.asgi
+#   Long I/O waits (Basira LLM streams, Telegram fan-out) run on the event
+#   loop instead of pinning a worker process each.
+import multiprocessing
+import os
+
+mode = os.environ.get('WEB_SERVER_MODE', 'wsgi').lower()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '300'))
+keepalive = 5
+
+if mode == 'asgi':
+    wsgi_app = 'digitaljamath.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'digitaljamath.wsgi:application'
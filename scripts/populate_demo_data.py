@@ -222,6 +222,7 @@ def populate(schema_name='demo'):
                 JournalItem.objects.create(journal_entry=entry, ledger=cash_account, debit_amount=amount, credit_amount=0)
                 # Credit Income
                 JournalItem.objects.create(journal_entry=entry, ledger=credit_ledger, debit_amount=0, credit_amount=amount)
+                entry.update_total()
             
             # Expenses (Payments)
             expense_types = [
@@ -249,6 +250,7 @@ def populate(schema_name='demo'):
                 JournalItem.objects.create(journal_entry=entry, ledger=exp_ledger, debit_amount=amt, credit_amount=0)
                 # Credit Cash
                 JournalItem.objects.create(journal_entry=entry, ledger=cash_account, debit_amount=0, credit_amount=amt)
+                entry.update_total()
 
         print("Data Population Complete!")
 